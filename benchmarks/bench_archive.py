@@ -0,0 +1,48 @@
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+from chat_thief.models.archive import Archive, in_range
+
+DAYS = 30
+EVENTS_PER_DAY = 5_000
+COMMANDS = ["steal", "give", "share", "me", "buy"]
+
+
+def _events():
+    start = datetime(2020, 7, 1)
+    step = timedelta(days=1) / EVENTS_PER_DAY
+    return [
+        {
+            "user": f"user_{event_id % 500}",
+            "command": COMMANDS[event_id % len(COMMANDS)],
+            "msg": "!steal damn @carti",
+            "result": [],
+            "created_at": str(start + step * event_id),
+        }
+        for event_id in range(DAYS * EVENTS_PER_DAY)
+    ]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        events = _events()
+        archive = Archive(tmp_dir, "created_at")
+        archive.add(events)
+        start, end = datetime(2020, 7, 15), datetime(2020, 7, 16)
+
+        # What a stats page had to do before: every event, then filter
+        def scan_everything():
+            in_range(archive.all(), "created_at", start, end, user="user_1")
+
+        def one_day():
+            archive.between(start, end, user="user_1")
+
+        print(f"{DAYS} days, {EVENTS_PER_DAY} events a day")
+        for label, func in [("scan everything", scan_everything), ("one day", one_day)]:
+            seconds = min(timeit.repeat(func, number=1, repeat=3))
+            print(f"{label:>16}: {seconds * 1_000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
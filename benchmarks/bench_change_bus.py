@@ -0,0 +1,63 @@
+import statistics
+import threading
+import time
+import timeit
+
+from benchmarks.support import temp_database
+from chat_thief.models.breaking_news import BreakingNews
+from chat_thief.models.change_bus import INSERTED, change_bus
+from chat_thief.models.user import User
+
+WRITES = 200
+STORIES = 50
+# What the bots used to sleep between looking at the database
+OLD_POLL_INTERVAL_IN_SECS = 1
+
+
+def _add_cool_points():
+    for _ in range(WRITES):
+        User("uzi").update_cool_points(1)
+
+
+def main():
+    with temp_database() as tmp_dir:
+        User("uzi")
+
+        write_secs = min(timeit.repeat(_add_cool_points, number=1, repeat=3))
+        print(f"{WRITES / write_secs:8.0f} writes/s, publishing on every one")
+
+        bus = change_bus(tmp_dir.joinpath("db"))
+        publish_secs = min(
+            timeit.repeat(lambda: bus.publish({"users"}), number=WRITES, repeat=3)
+        )
+        print(f"{publish_secs / WRITES * 1_000_000:8.1f} µs per publish")
+
+        # A news bot waiting on stories, how long until it notices one
+        latencies = []
+        with BreakingNews.subscribe(BreakingNews.topic(INSERTED)) as news:
+            woken = threading.Event()
+
+            def news_bot():
+                for _ in range(STORIES):
+                    news.wait()
+                    latencies.append(time.perf_counter() - saved_at)
+                    woken.set()
+
+            bot = threading.Thread(target=news_bot)
+            bot.start()
+            for story in range(STORIES):
+                woken.clear()
+                saved_at = time.perf_counter()
+                BreakingNews(scope=f"story {story}").save()
+                woken.wait(timeout=10)
+            bot.join()
+
+        print(
+            f"{statistics.median(latencies) * 1_000:8.2f} ms median until the news "
+            f"bot sees a story ({OLD_POLL_INTERVAL_IN_SECS / 2 * 1_000:.0f} ms "
+            "on average polling every second)"
+        )
+
+
+if __name__ == "__main__":
+    main()
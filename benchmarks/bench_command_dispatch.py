@@ -0,0 +1,124 @@
+import contextlib
+import io
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from chat_thief.chat_parsers.command_parser import CommandParser
+from chat_thief.command_router import DISPATCH_TABLE, ROUTERS
+from chat_thief.irc_msg import IrcMsg
+from chat_thief.models.base_db_model import BaseDbModel
+from chat_thief.models.user import User
+
+DEFAULT_CHAT_LOG = Path(__file__).parent.parent.joinpath("logs/chat.log")
+SYNTHETIC_MESSAGES = 2_000
+
+# Roughly what a stream looks like: mostly chatter and sfx
+SYNTHETIC_CHAT = [
+    "lol",
+    "what are we building today",
+    "!clap",
+    "!damn",
+    "!wow",
+    "!me",
+    "!perms",
+    "!help",
+    "!bets",
+    "!issues",
+    "!requests",
+]
+
+
+def _replayed_messages(chat_log):
+    lines = chat_log.read_text().splitlines() if chat_log.is_file() else []
+    messages = [line.split(": ", 1) for line in lines if ": " in line]
+    if messages:
+        return messages
+
+    users = [f"user_{i}" for i in range(50)]
+    return [
+        [random.choice(users), random.choice(SYNTHETIC_CHAT)]
+        for _ in range(SYNTHETIC_MESSAGES)
+    ]
+
+
+def _irc_msg(user, msg):
+    return IrcMsg(
+        [f":{user}!{user}@user.tmi.twitch.tv", "PRIVMSG", "#beginbot", f":{msg}"]
+    )
+
+
+# How CommandRouter used to route: parse, then try every router in turn
+def _route_sequentially(irc_msg):
+    parser = CommandParser(
+        user=irc_msg.user, command=irc_msg.command, args=irc_msg.args
+    ).parse()
+    for Router in ROUTERS:
+        try:
+            if result := Router(
+                irc_msg.user, irc_msg.command, irc_msg.args, parser
+            ).route():
+                return result
+        except Exception:
+            pass
+
+
+def _route_dispatched(irc_msg):
+    routers = DISPATCH_TABLE.get(irc_msg.command, [])
+    if routers:
+        parser = CommandParser(
+            user=irc_msg.user, command=irc_msg.command, args=irc_msg.args
+        ).parse()
+    for Router in routers:
+        try:
+            if result := Router(
+                irc_msg.user, irc_msg.command, irc_msg.args, parser
+            ).route():
+                return result
+        except Exception:
+            pass
+
+
+def _latencies(route, irc_msgs):
+    latencies = []
+    # Routers love to print
+    with contextlib.redirect_stdout(io.StringIO()):
+        for irc_msg in irc_msgs:
+            start = time.perf_counter()
+            route(irc_msg)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    chat_log = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CHAT_LOG
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        BaseDbModel.database_folder = f"{tmp_dir}/"
+        Path(tmp_dir).joinpath("db").mkdir()
+
+        messages = _replayed_messages(chat_log)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for user in {user for user, _ in messages}:
+                User(user)
+        irc_msgs = [_irc_msg(user, msg) for user, msg in messages]
+
+        print(f"{len(irc_msgs)} messages replayed")
+        for label, route in [
+            ("every router", _route_sequentially),
+            ("dispatch table", _route_dispatched),
+        ]:
+            latencies = sorted(_latencies(route, irc_msgs))
+            p50 = latencies[len(latencies) // 2]
+            p95 = latencies[int(len(latencies) * 0.95)]
+            print(
+                f"{label:>14}: mean {statistics.mean(latencies) * 1000:8.3f} ms"
+                f"  p50 {p50 * 1000:8.3f} ms  p95 {p95 * 1000:8.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import shutil
+import timeit
+
+from tinydb import TinyDB
+from tinydb.storages import JSONStorage
+from tinyrecord import transaction
+
+from benchmarks.support import temp_database, write_table
+from chat_thief.models.database import db_table
+from chat_thief.models.user import User
+
+USER_COUNT = 5_000
+WRITES = 200
+
+
+def _users():
+    return [
+        {
+            "name": f"user_{doc_id}",
+            "custom_css": None,
+            "street_cred": doc_id % 50,
+            "cool_points": doc_id % 100,
+            "mana": 3,
+            "top_eight": [],
+            "insured": False,
+        }
+        for doc_id in range(1, USER_COUNT + 1)
+    ]
+
+
+def _add_cool_points(doc):
+    doc["cool_points"] += 1
+
+
+def main():
+    with temp_database() as tmp_dir:
+        write_table(User, _users())
+        db_path = tmp_dir.joinpath("db/users.json")
+        rewrite_path = tmp_dir.joinpath("db/rewrite_users.json")
+        shutil.copy(db_path, rewrite_path)
+        rewrite_table = TinyDB(rewrite_path, storage=JSONStorage).table("users")
+        wal_table = db_table(str(db_path), "users")
+
+        def _writes(table):
+            for _ in range(WRITES):
+                with transaction(table) as tr:
+                    tr.update_callable(_add_cool_points, doc_ids=[1])
+
+        # What every write used to cost: the whole file, serialized and rewritten
+        def rewrite():
+            _writes(rewrite_table)
+
+        def wal():
+            _writes(wal_table)
+
+        print(f"{USER_COUNT} users, {WRITES} writes")
+        for label, func in [("rewrite JSON", rewrite), ("append to WAL", wal)]:
+            seconds = min(timeit.repeat(func, number=1, repeat=3))
+            print(f"{label:>14}: {seconds / WRITES * 1_000:8.2f} ms/write")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import json
+import random
+import statistics
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+from tinydb import Query
+
+from chat_thief.models.database import db_table
+
+USER_COUNT = 100_000
+LOOKUPS = 200
+# Lookups right after a write, when the index has to catch up first
+WRITES = 20
+
+
+def _write_users_table(db_path):
+    users = {
+        str(doc_id): {
+            "name": f"user_{doc_id}",
+            "custom_css": None,
+            "street_cred": doc_id % 50,
+            "cool_points": doc_id % 100,
+            "mana": 3,
+            "top_eight": [],
+            "insured": False,
+        }
+        for doc_id in range(1, USER_COUNT + 1)
+    }
+    db_path.write_text(json.dumps({"users": users}))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir).joinpath("users.json")
+        _write_users_table(db_path)
+        table = db_table(str(db_path), "users")
+        names = [f"user_{random.randint(1, USER_COUNT)}" for _ in range(LOOKUPS)]
+
+        def scan():
+            for name in names:
+                table.get(Query().name == name)
+
+        def indexed():
+            for name in names:
+                table.get_by("name", name)
+
+        # Build the index outside the timed loop, like a warm bot process
+        table.get_by("name", names[0])
+
+        print(f"{USER_COUNT} users, {LOOKUPS} lookups")
+        for label, func in [("Query().name scan", scan), ("name index", indexed)]:
+            seconds = min(timeit.repeat(func, number=1, repeat=3))
+            print(f"{label:>18}: {seconds / LOOKUPS * 1_000_000:10.1f} us/lookup")
+
+        lookup_secs = []
+        for doc_id in random.sample(range(1, USER_COUNT + 1), WRITES):
+            table.update({"cool_points": doc_id}, doc_ids=[doc_id])
+            started = time.perf_counter()
+            table.get_by("name", f"user_{doc_id}")
+            lookup_secs.append(time.perf_counter() - started)
+        print(
+            f"{'after a write':>18}: "
+            f"{statistics.median(lookup_secs) * 1_000_000:10.1f} us/lookup"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import random
+import timeit
+from collections import Counter
+from itertools import chain
+
+from benchmarks.support import temp_database, write_table
+from chat_thief.economist.leaderboard import Leaderboard, leaderboard
+from chat_thief.models.command import Command
+from chat_thief.models.user import User
+
+USER_COUNT = 10_000
+COMMAND_COUNT = 5_000
+
+
+def _fake_economy():
+    users = [f"user_{i}" for i in range(USER_COUNT)]
+    write_table(
+        User,
+        [
+            {
+                "name": user,
+                "custom_css": None,
+                "street_cred": random.randint(0, 50),
+                "cool_points": random.randint(0, 100),
+                "mana": 3,
+                "top_eight": [],
+                "insured": False,
+            }
+            for user in users
+        ],
+    )
+    write_table(
+        Command,
+        [
+            {
+                "name": f"command_{i}",
+                "user": "beginbot",
+                "permitted_users": random.sample(users, random.randint(0, 3)),
+                "health": 3,
+                "cost": random.randint(1, 30),
+            }
+            for i in range(COMMAND_COUNT)
+        ],
+    )
+
+
+# What the forbes bot, the economist and the stats page each used to do
+def sort_everything():
+    users = User.db().all()
+    commands = Command.db().all()
+    sum([user["cool_points"] for user in users])
+    sum([user["street_cred"] for user in users])
+    sorted(users, key=lambda user: user["cool_points"])[-1]
+    sorted(commands, key=lambda cmd: cmd["cost"])[-1]
+    sorted(commands, key=lambda command: command["cost"])[-5:]
+    Counter(chain.from_iterable([cmd["permitted_users"] for cmd in commands]))
+    sum([cmd["cost"] * len(cmd["permitted_users"]) for cmd in commands])
+
+
+def main():
+    random.seed(1337)
+    with temp_database():
+        _fake_economy()
+        # Load the tables outside the timings
+        User.db().all()
+        Command.db().all()
+
+        def rebuild():
+            Leaderboard(Leaderboard.columns())
+
+        def wealthiest_one_at_a_time():
+            richest = [
+                (user["name"], User(user["name"]).top_wealth())
+                for user in User.db().all()
+            ]
+            sorted(richest, key=lambda user: user[1])[-1][0]
+
+        print(f"{USER_COUNT} users, {COMMAND_COUNT} commands")
+        for label, func in [
+            ("sort every stat", sort_everything),
+            ("old wealthiest", wealthiest_one_at_a_time),
+            ("build snapshot", rebuild),
+            ("cached snapshot", leaderboard),
+        ]:
+            seconds = min(timeit.repeat(func, number=1, repeat=3))
+            print(f"{label:>16}: {seconds * 1_000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+import timeit
+
+from benchmarks.support import temp_database, write_table
+from chat_thief.commands.revolution import Revolution
+from chat_thief.models.command import Command
+from chat_thief.models.user import User
+from chat_thief.models.vote import Vote
+
+USER_COUNT = 2_000
+SOUNDS_PER_USER = 3
+
+
+def _users():
+    return [
+        {
+            "name": f"user_{user_id}",
+            "custom_css": None,
+            "street_cred": user_id % 50,
+            "cool_points": user_id % 100,
+            "mana": 3,
+            "top_eight": [],
+            "insured": False,
+        }
+        for user_id in range(USER_COUNT)
+    ]
+
+
+def _commands():
+    return [
+        {
+            "name": f"sound_{user_id}_{sound}",
+            "user": "beginbot",
+            "permitted_users": [f"user_{user_id}"],
+            "health": 3,
+            "cost": sound + 1,
+        }
+        for user_id in range(USER_COUNT)
+        for sound in range(SOUNDS_PER_USER)
+    ]
+
+
+# A third of chat for each side, the rest sitting on the fence
+def _votes():
+    return [
+        {"user": f"user_{user_id}", "vote": ["revolution", "peace"][user_id % 3]}
+        for user_id in range(USER_COUNT)
+        if user_id % 3 != 2
+    ]
+
+
+def main():
+    os.environ["TEST_MODE"] = "true"
+
+    def coup(tide):
+        with temp_database():
+            write_table(User, _users())
+            write_table(Command, _commands())
+            write_table(Vote, _votes())
+            # The coup prints every side's sounds
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = timeit.default_timer()
+                Revolution("user_0")._turn_the_tides(tide)
+                return timeit.default_timer() - start
+
+    print(f"{USER_COUNT} users, {USER_COUNT * SOUNDS_PER_USER} sounds")
+    for tide in ["revolution", "peace"]:
+        seconds = min(coup(tide) for _ in range(3))
+        print(f"{tide:>10} coup: {seconds * 1_000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
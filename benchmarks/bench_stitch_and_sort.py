@@ -0,0 +1,101 @@
+import random
+import time
+
+from chat_thief.models.command import Command
+from chat_thief.models.sfx_vote import SFXVote
+from chat_thief.models.user import User
+from chat_thief.models.user_code import UserCode
+from chat_thief.models.user_page import UserPage
+from chat_thief.stitch_and_sort import StitchAndSort
+
+from benchmarks.support import fake_samples, temp_database, write_table
+
+USER_COUNT = 10_000
+COMMAND_COUNT = 5_000
+
+
+def _fake_stream():
+    users = [f"user_{i}" for i in range(USER_COUNT)]
+    commands = [f"command_{i}" for i in range(COMMAND_COUNT)]
+
+    write_table(
+        User,
+        [
+            {
+                "name": user,
+                "custom_css": None,
+                "street_cred": random.randint(0, 50),
+                "cool_points": random.randint(0, 100),
+                "mana": 3,
+                "top_eight": [],
+                "insured": False,
+            }
+            for user in users
+        ],
+    )
+    write_table(
+        Command,
+        [
+            {
+                "name": command,
+                "user": "beginbot",
+                "permitted_users": random.sample(users, random.randint(0, 5)),
+                "health": 3,
+                "cost": random.randint(1, 30),
+            }
+            for command in commands
+        ],
+    )
+    write_table(
+        SFXVote,
+        [
+            {
+                "command": command,
+                "supporters": random.sample(users, 3),
+                "detractors": random.sample(users, 1),
+            }
+            for command in random.sample(commands, COMMAND_COUNT // 2)
+        ],
+    )
+    write_table(
+        UserCode,
+        [
+            {
+                "user": random.choice(users),
+                "name": f"widget_{i}",
+                "owners": random.sample(users, 2),
+                "code_link": f"https://gitlab.com/widget_{i}.js",
+                "code_type": "js",
+                "approved": i % 2 == 0,
+            }
+            for i in range(500)
+        ],
+    )
+    write_table(
+        UserPage,
+        [
+            {"user": user, "widgets": {"widget_1": False, "widget_2": True}}
+            for user in random.sample(users, 500)
+        ],
+    )
+    # Every user gets a theme song, and every command a sample
+    return users + commands
+
+
+def main():
+    with temp_database():
+        sample_names = _fake_stream()
+        with fake_samples(sample_names):
+            start = time.perf_counter()
+            result = StitchAndSort().call()
+            seconds = time.perf_counter() - start
+
+    print(f"{USER_COUNT} users, {COMMAND_COUNT} commands")
+    print(
+        f"StitchAndSort: {seconds:.2f}s for "
+        f"{len(result['users'])} users and {len(result['commands'])} commands"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import timeit
+
+from tinydb import TinyDB
+from tinyrecord import transaction
+
+from benchmarks.support import temp_database, write_table
+from chat_thief.models.database import db_table, storage_class, storage_path
+from chat_thief.models.sqlite_storage import migrate
+from chat_thief.models.user import User
+
+USER_COUNT = 5_000
+WRITES = 100
+
+
+def _users():
+    return [
+        {
+            "name": f"user_{doc_id}",
+            "custom_css": None,
+            "street_cred": doc_id % 50,
+            "cool_points": doc_id % 100,
+            "mana": 3,
+            "top_eight": [],
+            "insured": False,
+        }
+        for doc_id in range(1, USER_COUNT + 1)
+    ]
+
+
+def _add_cool_points(doc):
+    doc["cool_points"] += 1
+
+
+def main():
+    with temp_database() as tmp_dir:
+        write_table(User, _users())
+        migrate(tmp_dir.joinpath("db"))
+        db_path = tmp_dir.joinpath("db/users.json")
+
+        print(f"{USER_COUNT} users, {WRITES} writes")
+        for backend in ["json", "sqlite"]:
+            table = db_table(str(db_path), "users", backend=backend)
+            # Another bot process, catching up on every write
+            other = TinyDB(
+                storage_path(db_path, backend), storage=storage_class(backend)
+            ).table("users", cache_size=0)
+
+            def writes():
+                for doc_id in range(1, WRITES + 1):
+                    with transaction(table) as tr:
+                        tr.update_callable(_add_cool_points, doc_ids=[doc_id])
+
+            def catch_up():
+                for doc_id in range(1, WRITES + 1):
+                    with transaction(table) as tr:
+                        tr.update_callable(_add_cool_points, doc_ids=[doc_id])
+                    other.get(doc_id=doc_id)
+
+            def cold_start():
+                storage = storage_class(backend)(storage_path(db_path, backend))
+                storage.read()
+                storage.close()
+
+            write_secs = min(timeit.repeat(writes, number=1, repeat=3))
+            catch_up_secs = min(timeit.repeat(catch_up, number=1, repeat=3))
+            load_secs = min(timeit.repeat(cold_start, number=1, repeat=3))
+            print(
+                f"{backend:>6}: {WRITES / write_secs:8.0f} writes/s, "
+                f"{WRITES / catch_up_secs:8.0f} writes/s read by another process, "
+                f"{load_secs * 1_000:6.1f} ms to load"
+            )
+
+
+if __name__ == "__main__":
+    main()
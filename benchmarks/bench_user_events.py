@@ -0,0 +1,64 @@
+import timeit
+
+from tinydb import Query
+from tinyrecord import transaction
+
+from benchmarks.support import temp_database, write_table
+from chat_thief.models.database import db_table
+from chat_thief.models.user_event import UserEvent
+
+EVENT_COUNT = 50_000
+WRITES = 200
+COMMANDS = ["steal", "give", "share", "me", "buy"]
+
+
+def _events():
+    return [
+        {
+            "user": f"user_{event_id % 500}",
+            "command": COMMANDS[event_id % len(COMMANDS)],
+            "msg": "!steal damn @carti",
+            "result": [],
+            "created_at": "2020-07-04 20:00:00.000000",
+        }
+        for event_id in range(EVENT_COUNT)
+    ]
+
+
+def main():
+    with temp_database() as tmp_dir:
+        events = _events()
+        write_table(UserEvent, events)
+        table = db_table(str(tmp_dir.joinpath("db/user_events.json")), "user_events")
+        # Moves the events into the log, outside the timings
+        UserEvent.count()
+        event = UserEvent(user="user_1", command="steal", msg="!steal", result=[])
+
+        def table_save():
+            for _ in range(WRITES):
+                with transaction(table) as tr:
+                    tr.insert(event.doc())
+
+        def log_save():
+            for _ in range(WRITES):
+                event.save()
+
+        def table_find_thief():
+            table.search((Query().command == "steal") & (Query().user == "user_1"))
+
+        def log_find_thief():
+            UserEvent.count_for("user_1", "steal")
+
+        print(f"{EVENT_COUNT} events")
+        for label, func, number in [
+            ("table save", table_save, WRITES),
+            ("log save", log_save, WRITES),
+            ("table find_thief", table_find_thief, 1),
+            ("log find_thief", log_find_thief, 1),
+        ]:
+            seconds = min(timeit.repeat(func, number=1, repeat=3))
+            print(f"{label:>16}: {seconds / number * 1_000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
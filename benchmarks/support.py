@@ -0,0 +1,53 @@
+import contextlib
+import json
+import tempfile
+from pathlib import Path
+
+from chat_thief.audioworld.sample_catalog import SampleCatalog
+from chat_thief.audioworld.soundeffects_library import (
+    ALLOWED_AUDIO_FORMATS,
+    SoundeffectsLibrary,
+)
+from chat_thief.models.base_db_model import BaseDbModel
+
+
+@contextlib.contextmanager
+def temp_database():
+    """Point every model at an empty db/ folder in a temp dir"""
+    database_folder = BaseDbModel.database_folder
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        Path(tmp_dir).joinpath("db").mkdir()
+        BaseDbModel.database_folder = f"{tmp_dir}/"
+        try:
+            yield Path(tmp_dir)
+        finally:
+            BaseDbModel.database_folder = database_folder
+
+
+def write_table(model, docs):
+    db_path = Path(model.database_folder + model.database_path)
+    contents = json.loads(db_path.read_text()) if db_path.exists() else {}
+    contents[model.table_name] = {
+        str(doc_id): doc for doc_id, doc in enumerate(docs, start=1)
+    }
+    db_path.write_text(json.dumps(contents))
+
+
+@contextlib.contextmanager
+def fake_samples(names):
+    """Point SoundeffectsLibrary at a temp samples folder holding `names`"""
+    catalog = SoundeffectsLibrary.catalog
+    with tempfile.TemporaryDirectory() as samples_dir:
+        samples_path = Path(samples_dir)
+        samples_path.joinpath("theme_songs").mkdir()
+        for name in names:
+            samples_path.joinpath(f"{name}.opus").touch()
+
+        SoundeffectsLibrary.catalog = SampleCatalog(
+            samples_path, samples_path.joinpath("theme_songs"), ALLOWED_AUDIO_FORMATS
+        )
+        try:
+            yield samples_path
+        finally:
+            SoundeffectsLibrary.catalog.close()
+            SoundeffectsLibrary.catalog = catalog
@@ -3,34 +3,35 @@ import json
 import socket
 import asyncio
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
-from chat_thief.config.log import logger
+from chat_thief.config.log import logger, error
 from chat_thief.config.twitch import TwitchConfig
-from chat_thief.command_router import CommandRouter
+from chat_thief.command_router import BLACKLISTED_LOG_USERS, CommandRouter
+from chat_thief.config.commands_config import OBS_COMMANDS
+from chat_thief.irc_client import IrcClient, IrcLine, SharedRateLimiter
+from chat_thief.presence import presence
 
 CONNECTION_DATA = ("irc.chat.twitch.tv", 6667)
 ENCODING = "utf-8"
 CHAT_MSG = "PRIVMSG"
 ARE_YOU_ALIVE = "PING"
-I_AM_ALIVE = "PONG"
+PLEASE_RECONNECT = "RECONNECT"
+JOINED = "JOIN"
+LEFT = "PART"
+RECONNECT_DELAY_IN_SECS = 5
+# Commands that can keep a router busy for a while: a coup plays its
+# soundtrack, OBS commands switch scenes. They get a lane of their own
+SLOW_COMMANDS = {"coup", *OBS_COMMANDS}
 
 config = TwitchConfig()
 
 
-async def pong(server: socket.socket) -> None:
-    server.sendall(bytes(I_AM_ALIVE + "\r\n", ENCODING))
-
-
 def simple_send_msg(server: socket.socket, msg: str) -> None:
     if msg:
         server.sendall(bytes(f"{CHAT_MSG} #{config.channel} :{msg}\n", ENCODING))
 
 
-async def send_msg(server: socket.socket, msg: str) -> None:
-    if msg:
-        server.sendall(bytes(f"{CHAT_MSG} #{config.channel} :{msg}\n", ENCODING))
-
-
 def irc_handshake(server: socket.socket) -> None:
     logger.debug(
         json.dumps({"message": f"Connecting to #{config.channel} as {config.bot}"})
@@ -40,44 +41,90 @@ def irc_handshake(server: socket.socket) -> None:
     server.sendall(bytes("JOIN " + f"#{config.channel}" + "\r\n", ENCODING))
 
 
-async def chat_response(server: socket.socket):
-    return server.recv(2048).decode(ENCODING).split()
-
-
-async def run_bot(server: socket.socket) -> None:
-    while True:
-        irc_response = await chat_response(server)
-
-        if irc_response[0] == ARE_YOU_ALIVE:
-            await pong(server)
-        elif len(irc_response) < 2:
-            pass
-        elif irc_response[1] == CHAT_MSG:
-            try:
-                if response := CommandRouter(irc_response, logger).build_response():
-                    MESSAGE_LIMIT = 500
-
-                    if isinstance(response, List):
-                        for r in response:
-                            await send_msg(server, f"{r}")
-                    elif len(response) > MESSAGE_LIMIT:
-                        # This is dumb!
-                        # await send_msg(server, f"{''.join(response[:500])}")
-                        await send_msg(server, f"{response[:500]}")
-                        await send_msg(server, f"{response[500:]}")
-                    else:
-                        await send_msg(server, f"{response}")
-            except:
-                print("\033[91m")
-                traceback.print_exc()
-                print("\033[0m")
+def route(irc_msg: List[str]):
+    try:
+        return CommandRouter(irc_msg, logger).build_response()
+    except:
+        print("\033[91m")
+        traceback.print_exc()
+        print("\033[0m")
+
+
+class RouterLanes:
+    """
+    Commands take turns on a lane, one at a time off the event loop. Slow
+    commands get a lane of their own, so a !coup doesn't hold up everybody
+    else's !buy. The two lanes run at the same time: each command's unit
+    of work locks the databases it touches, and if they deadlock one of
+    them times out (WriteLockTimeout) and rolls back.
+    """
+
+    def __init__(self):
+        self.commands = ThreadPoolExecutor(max_workers=1)
+        self.slow_commands = ThreadPoolExecutor(max_workers=1)
+
+    def for_line(self, line: IrcLine) -> ThreadPoolExecutor:
+        command, *_ = line.trailing.split() or [""]
+        if command.startswith("!") and command[1:].lower() in SLOW_COMMANDS:
+            return self.slow_commands
+        return self.commands
+
+
+async def handle_chat_msg(client: IrcClient, lanes: RouterLanes, line: IrcLine) -> None:
+    loop = asyncio.get_running_loop()
+    executor = lanes.for_line(line)
+    if response := await loop.run_in_executor(executor, route, line.to_irc_msg()):
+        if isinstance(response, List):
+            for r in response:
+                client.send_msg(r)
+        else:
+            client.send_msg(response)
+
+
+async def run_bot(client: IrcClient, lanes: RouterLanes) -> None:
+    # Hold on to in-flight tasks so they don't get garbage collected
+    pending = set()
+
+    async for line in client.lines():
+        if line.command == ARE_YOU_ALIVE:
+            await client.pong(line)
+        elif line.command == CHAT_MSG:
+            task = asyncio.create_task(handle_chat_msg(client, lanes, line))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        elif line.command == JOINED and line.user not in BLACKLISTED_LOG_USERS:
+            presence().saw(line.user, chatted=False)
+        elif line.command == LEFT:
+            presence().left(line.user)
+        elif line.command == PLEASE_RECONNECT:
+            raise ConnectionError("Twitch asked us to reconnect")
 
 
 async def main():
-    with socket.socket() as server:
-        server.connect(CONNECTION_DATA)
-        irc_handshake(server)
-        await asyncio.gather(run_bot(server))
+    lanes = RouterLanes()
+
+    while True:
+        client = IrcClient(
+            *CONNECTION_DATA,
+            config.token,
+            config.bot,
+            config.channel,
+            # Sharing the budget with the background bots' messages
+            rate_limiter=SharedRateLimiter(),
+        )
+        sender = None
+        try:
+            await client.connect()
+            sender = asyncio.create_task(client.run_sender())
+            await run_bot(client, lanes)
+        except (ConnectionError, OSError) as e:
+            error(f"Lost connection to Twitch: {e}")
+        finally:
+            if sender:
+                sender.cancel()
+            await client.close()
+
+        await asyncio.sleep(RECONNECT_DELAY_IN_SECS)
 
 
 if __name__ == "__main__":
@@ -1,19 +1,43 @@
 from pathlib import Path
 
-import subprocess
-import traceback
-
+import atexit
+import os
+import threading
+
+from chat_thief.audioworld.playback_engine import (
+    DecodedSampleCache,
+    PlaybackEngine,
+)
 from chat_thief.config.log import success
+from chat_thief.models.database import after_commit
 from chat_thief.models.notification import Notification
 from chat_thief.models.command import Command
 
-MPLAYER_VOL_NORM = "0.50"
-
 
 class AudioPlayer:
+    engine = None
+    _engine_lock = threading.Lock()
+
+    @classmethod
+    def playback_engine(cls):
+        with cls._engine_lock:
+            if cls.engine is None:
+                # SOUNDBOARD_OVERLAP lets samples play over each other
+                cls.engine = PlaybackEngine(
+                    overlap="SOUNDBOARD_OVERLAP" in os.environ,
+                    decoded_cache=DecodedSampleCache(),
+                )
+                atexit.register(cls.engine.close)
+            return cls.engine
+
     @staticmethod
     def play_sample(sound_file, notification=True, user=None):
         sound_name = sound_file.name[: -len(sound_file.suffix)]
+
+        # Get the audio going before we touch the DB, or once a unit of work
+        # we're in has committed
+        after_commit(lambda: AudioPlayer.playback_engine().play(sound_file))
+
         Command(sound_name).decay()
 
         # success(f"Playing: {sound_name}")
@@ -24,11 +48,10 @@ class AudioPlayer:
             else:
                 Notification(f"Playing: !{sound_name}", duration=1).save()
 
-        try:
-            subprocess.call(
-                ["mplayer", "-af", f"volnorm=2:{MPLAYER_VOL_NORM}", sound_file],
-                stderr=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL,
-            )
-        except:
-            traceback.print_exc()
+    @staticmethod
+    def wait_until_ready(timeout=None):
+        return AudioPlayer.playback_engine().wait_until_ready(timeout)
+
+    @staticmethod
+    def metrics():
+        return AudioPlayer.playback_engine().metrics()
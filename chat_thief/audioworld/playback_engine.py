@@ -0,0 +1,327 @@
+from collections import OrderedDict, deque
+from pathlib import Path
+import hashlib
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import traceback
+
+from chat_thief.audioworld.sample_catalog import sample_name
+from chat_thief.config.log import error
+
+MPLAYER_VOL_NORM = "0.50"
+MPLAYER_COMMAND = [
+    "mplayer",
+    "-slave",
+    "-idle",
+    "-quiet",
+    "-msglevel",
+    "global=6",
+    "-af",
+    f"volnorm=2:{MPLAYER_VOL_NORM}",
+]
+# How many samples can play over each other when overlapping
+MAX_PLAYERS = 4
+# Nothing we play is this long, the player must be stuck
+MAX_SAMPLE_LENGTH_IN_SECS = 120
+# How often waiting for a free player looks for stuck ones
+STUCK_CHECK_INTERVAL_IN_SECS = 1
+DECODED_CACHE_SIZE = 100
+# How many plays of each sample we keep timings for
+METRICS_WINDOW = 50
+
+# What mplayer prints when it starts and stops playing a file
+STARTED_OUTPUT = ("Starting playback",)
+FINISHED_OUTPUT = ("EOF code", "Failed to open", "No stream found", "Exiting")
+
+
+def _ffmpeg_command(sound_file, decoded_file):
+    return ["ffmpeg", "-y", "-loglevel", "error", "-i", sound_file, decoded_file]
+
+
+class DecodedSampleCache:
+    """
+    LRU of hot samples decoded to WAV, on tmpfs when there is one.
+
+    A miss plays the original file and decodes it in the background, so
+    only the next play of that sample gets the decoded copy.
+    """
+
+    def __init__(self, size=DECODED_CACHE_SIZE, decode_command=None, cache_dir=None):
+        if decode_command is None and shutil.which("ffmpeg"):
+            decode_command = _ffmpeg_command
+        self.size = size
+        self._decode_command = decode_command
+        self._cache_dir = cache_dir
+        self._decoded = OrderedDict()
+        self._decoding = set()
+        self._lock = threading.Lock()
+
+    def get(self, sound_file):
+        try:
+            key = (str(sound_file), os.stat(sound_file).st_mtime_ns)
+        except FileNotFoundError:
+            return sound_file
+
+        with self._lock:
+            if key in self._decoded:
+                self._decoded.move_to_end(key)
+                return self._decoded[key]
+
+            if self._decode_command and key not in self._decoding:
+                self._decoding.add(key)
+                threading.Thread(
+                    target=self._decode, args=(key, sound_file), daemon=True
+                ).start()
+
+        return sound_file
+
+    def _decode(self, key, sound_file):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        decoded_file = self._directory().joinpath(f"{digest}.wav")
+        try:
+            decoded = (
+                subprocess.call(
+                    self._decode_command(str(sound_file), str(decoded_file)),
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                == 0
+            )
+        except OSError:
+            decoded = False
+
+        with self._lock:
+            self._decoding.discard(key)
+            if not decoded:
+                return
+
+            self._decoded[key] = decoded_file
+            while len(self._decoded) > self.size:
+                _, evicted = self._decoded.popitem(last=False)
+                evicted.unlink(missing_ok=True)
+
+    def _directory(self):
+        with self._lock:
+            if self._cache_dir is None:
+                tmpfs = "/dev/shm" if os.path.isdir("/dev/shm") else None
+                self._cache_dir = tempfile.mkdtemp(prefix="chat_thief_", dir=tmpfs)
+            return Path(self._cache_dir)
+
+    def close(self):
+        with self._lock:
+            if self._cache_dir:
+                shutil.rmtree(self._cache_dir, ignore_errors=True)
+            self._decoded.clear()
+
+
+class _Player:
+    """One long-lived mplayer in slave mode, fed files over stdin"""
+
+    def __init__(self, command, on_idle=None):
+        self._on_idle = on_idle
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        self._idle = threading.Event()
+        self._idle.set()
+        self._busy_since = None
+        self._on_start = None
+        threading.Thread(target=self._read_output, daemon=True).start()
+
+    def alive(self):
+        return self._process.poll() is None
+
+    def is_idle(self):
+        return self._idle.is_set()
+
+    def is_stuck(self):
+        return (
+            not self.is_idle()
+            and time.monotonic() - self._busy_since > MAX_SAMPLE_LENGTH_IN_SECS
+        )
+
+    def load(self, sound_file, on_start):
+        self._on_start = on_start
+        self._busy_since = time.monotonic()
+        self._idle.clear()
+        escaped = str(sound_file).replace("\\", "\\\\").replace('"', '\\"')
+        try:
+            self._process.stdin.write(f'loadfile "{escaped}"\n')
+            self._process.stdin.flush()
+        except OSError:
+            self.stop()
+
+    def stop(self):
+        self._process.kill()
+        self._went_idle()
+
+    def _went_idle(self):
+        self._idle.set()
+        if self._on_idle:
+            self._on_idle()
+
+    def _read_output(self):
+        for line in self._process.stdout:
+            if line.startswith(STARTED_OUTPUT):
+                if self._on_start:
+                    self._on_start()
+                    self._on_start = None
+            elif line.startswith(FINISHED_OUTPUT):
+                self._went_idle()
+        # It exited
+        self._went_idle()
+
+
+class PlaybackEngine:
+    """
+    Plays samples on long-lived player processes.
+
+    play() returns straight away. Samples queue up behind each other on one
+    player, or with overlap they play on up to max_players at once.
+    """
+
+    def __init__(
+        self,
+        player_command=MPLAYER_COMMAND,
+        overlap=False,
+        max_players=MAX_PLAYERS,
+        decoded_cache=None,
+    ):
+        self.player_command = player_command
+        self.overlap = overlap
+        self.max_players = max_players if overlap else 1
+        self.decoded_cache = decoded_cache
+        self._requests = queue.Queue()
+        self._players = []
+        self._time_to_first_audio = {}
+        self._lock = threading.Lock()
+        # Notified when a player goes idle or dies, or a request is done
+        self._changed = threading.Condition()
+        self._thread = None
+
+    def play(self, sound_file):
+        self._requests.put((Path(sound_file), time.monotonic()))
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="playback-engine", daemon=True
+                )
+                self._thread.start()
+
+    # Samples waiting for a player
+    def queue_depth(self):
+        return self._requests.qsize()
+
+    def metrics(self):
+        with self._lock:
+            time_to_first_audio = {
+                sample: {
+                    "plays": len(timings),
+                    "last": timings[-1],
+                    "average": sum(timings) / len(timings),
+                }
+                for sample, timings in self._time_to_first_audio.items()
+            }
+        return {
+            "queue_depth": self.queue_depth(),
+            "time_to_first_audio": time_to_first_audio,
+        }
+
+    # Whether a sample played now would start straight away
+    def is_ready(self):
+        players = self._alive_players()
+        return not self._requests.unfinished_tasks and (
+            len(players) < self.max_players
+            or any(player.is_idle() for player in players)
+        )
+
+    def wait_until_ready(self, timeout=None):
+        return self._wait_for(self.is_ready, timeout)
+
+    def wait_until_idle(self, timeout=None):
+        def _idle():
+            return not self._requests.unfinished_tasks and all(
+                player.is_idle() for player in self._alive_players()
+            )
+
+        return self._wait_for(_idle, timeout)
+
+    def close(self):
+        for player in self._alive_players():
+            player.stop()
+        if self.decoded_cache:
+            self.decoded_cache.close()
+
+    def _wait_for(self, condition, timeout):
+        with self._changed:
+            return self._changed.wait_for(condition, timeout)
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def _alive_players(self):
+        return [player for player in self._players if player.alive()]
+
+    def _run(self):
+        while True:
+            sound_file, queued_at = self._requests.get()
+            try:
+                self._play(sound_file, queued_at)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self._requests.task_done()
+                self._notify()
+
+    def _play(self, sound_file, queued_at):
+        player = self._idle_player()
+        if not player:
+            return
+
+        sample = sample_name(sound_file)
+        if self.decoded_cache:
+            sound_file = self.decoded_cache.get(sound_file)
+
+        def _started():
+            with self._lock:
+                self._time_to_first_audio.setdefault(
+                    sample, deque(maxlen=METRICS_WINDOW)
+                ).append(time.monotonic() - queued_at)
+
+        player.load(sound_file, on_start=_started)
+
+    def _idle_player(self):
+        while True:
+            self._players = self._alive_players()
+            for player in self._players:
+                if player.is_stuck():
+                    player.stop()
+                elif player.is_idle():
+                    return player
+
+            if len(self._players) < self.max_players:
+                try:
+                    player = _Player(self.player_command, on_idle=self._notify)
+                except OSError as e:
+                    error(f"Couldn't start the audio player: {e}")
+                    return None
+                self._players.append(player)
+                return player
+
+            # Woken by a player going idle, or time to check for stuck ones
+            self._wait_for(
+                lambda: any(player.is_idle() for player in self._players),
+                STUCK_CHECK_INTERVAL_IN_SECS,
+            )
@@ -0,0 +1,305 @@
+from collections import Counter
+from pathlib import Path
+import ctypes
+import ctypes.util
+import os
+import struct
+import threading
+import time
+
+POLL_INTERVAL_IN_SECS = 1
+
+# From <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (
+    IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def sample_name(path):
+    return path.name[: -len(path.suffix)]
+
+
+class _Inotify:
+    """Non-blocking inotify handle, so pending events can be drained inline"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(
+            self.fd, os.fsencode(str(directory)), WATCH_MASK
+        )
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Could not watch {directory}")
+        return wd
+
+    def remove_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        events = []
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SampleCatalog:
+    """
+    In-memory index of the samples folder.
+
+    Built with one walk of the folder, then kept up to date from inotify
+    events, or by re-listing only the directories whose mtime changed when
+    inotify isn't available.
+    """
+
+    def __init__(self, samples_path, theme_songs_path, allowed_formats):
+        self._samples_path = Path(samples_path)
+        self._theme_songs_path = Path(theme_songs_path)
+        self._allowed_formats = allowed_formats
+        self._lock = threading.RLock()
+        self._inotify = None
+        self._built = False
+
+    # ====================================================================
+
+    def paths_for(self, name):
+        with self._lock:
+            self.refresh()
+            return list(self._paths_by_name.get(name, []))
+
+    def all_paths(self):
+        with self._lock:
+            self.refresh()
+            return [path for paths in self._paths_by_name.values() for path in paths]
+
+    def names(self):
+        with self._lock:
+            self.refresh()
+            return list(self._paths_by_name)
+
+    def theme_songs(self):
+        with self._lock:
+            self.refresh()
+            return list(self._theme_songs)
+
+    def soundeffects_only(self):
+        with self._lock:
+            self.refresh()
+            return set(self._paths_by_name) - set(self._theme_songs)
+
+    def has_sample(self, name):
+        with self._lock:
+            self.refresh()
+            return name in self._paths_by_name
+
+    def is_theme_song(self, name):
+        with self._lock:
+            self.refresh()
+            return name in self._theme_songs
+
+    def is_soundeffect(self, name):
+        with self._lock:
+            self.refresh()
+            return name in self._paths_by_name and name not in self._theme_songs
+
+    # ====================================================================
+
+    # force skips the poll interval, for when we know we just changed a sample
+    def refresh(self, force=False):
+        with self._lock:
+            if not self._built:
+                self._build()
+            elif self._inotify:
+                self._process_events()
+            elif force or time.monotonic() - self._last_poll >= POLL_INTERVAL_IN_SECS:
+                self._poll()
+
+    def _build(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+        try:
+            self._inotify = _Inotify()
+        except (OSError, AttributeError):
+            # No inotify on this platform, fallback to polling
+            self._inotify = None
+
+        self._dirs = {}
+        self._watches = {}
+        self._paths_by_name = {}
+        self._theme_songs = Counter()
+        self._last_poll = time.monotonic()
+        self._scan_tree(self._samples_path)
+        self._polled_mtimes = self._settled_mtimes()
+        self._built = True
+
+    def _scan_tree(self, root):
+        for directory, _, _ in os.walk(root, followlinks=True):
+            self._scan_dir(Path(directory))
+
+    def _scan_dir(self, directory):
+        if self._inotify and directory not in self._watches.values():
+            try:
+                self._watches[self._inotify.add_watch(directory)] = directory
+            except OSError:
+                pass
+
+        entries = self._list_files(directory)
+        for filename in entries - self._dirs.get(directory, set()):
+            self._add_file(directory, filename)
+        for filename in self._dirs.get(directory, set()) - entries:
+            self._remove_file(directory, filename)
+        self._dirs[directory] = entries
+
+    def _drop_dir(self, directory):
+        def is_within(path):
+            return path == directory or directory in path.parents
+
+        for known_dir in [
+            known_dir for known_dir in self._dirs if is_within(known_dir)
+        ]:
+            for filename in list(self._dirs[known_dir]):
+                self._remove_file(known_dir, filename)
+            del self._dirs[known_dir]
+
+        for wd, watched in list(self._watches.items()):
+            if is_within(watched):
+                del self._watches[wd]
+                self._inotify.remove_watch(wd)
+
+    def _list_files(self, directory):
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name for entry in entries if not entry.is_dir()}
+        except (FileNotFoundError, NotADirectoryError):
+            return set()
+
+    def _add_file(self, directory, filename):
+        path = directory.joinpath(filename)
+        self._dirs.setdefault(directory, set()).add(filename)
+
+        if path.suffix in self._allowed_formats:
+            self._paths_by_name.setdefault(sample_name(path), []).append(path)
+        if directory == self._theme_songs_path:
+            self._theme_songs[sample_name(path)] += 1
+
+    def _remove_file(self, directory, filename):
+        path = directory.joinpath(filename)
+        self._dirs.get(directory, set()).discard(filename)
+
+        name = sample_name(path)
+        if path in self._paths_by_name.get(name, []):
+            self._paths_by_name[name].remove(path)
+            if not self._paths_by_name[name]:
+                del self._paths_by_name[name]
+        if directory == self._theme_songs_path and self._theme_songs[name]:
+            self._theme_songs[name] -= 1
+            if not self._theme_songs[name]:
+                del self._theme_songs[name]
+
+    def _process_events(self):
+        for wd, mask, filename in self._inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                return self._build()
+
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                self._drop_dir(directory)
+            elif mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._scan_tree(directory.joinpath(filename))
+                else:
+                    self._drop_dir(directory.joinpath(filename))
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                if filename not in self._dirs.get(directory, set()):
+                    self._add_file(directory, filename)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                if filename in self._dirs.get(directory, set()):
+                    self._remove_file(directory, filename)
+
+        # The samples folder didn't exist when we started watching
+        if not self._watches and self._samples_path.is_dir():
+            self._scan_tree(self._samples_path)
+
+    def _poll(self):
+        self._last_poll = time.monotonic()
+
+        for directory, mtime in list(self._dir_mtimes().items()):
+            if mtime is None:
+                self._drop_dir(directory)
+            elif mtime != self._polled_mtimes.get(directory):
+                self._scan_dir(directory)
+                self._scan_new_subdirs(directory)
+
+        if not self._dirs and self._samples_path.is_dir():
+            self._scan_tree(self._samples_path)
+
+        self._polled_mtimes = self._settled_mtimes()
+
+    def _scan_new_subdirs(self, directory):
+        try:
+            with os.scandir(directory) as entries:
+                subdirs = [Path(entry.path) for entry in entries if entry.is_dir()]
+        except FileNotFoundError:
+            return
+        for subdir in subdirs:
+            if subdir not in self._dirs:
+                self._scan_tree(subdir)
+
+    def _dir_mtimes(self):
+        return {directory: self._mtime(directory) for directory in self._dirs}
+
+    # A folder changed in the same clock tick as we listed it would keep its
+    # mtime, so recently changed folders get listed again on the next poll
+    def _settled_mtimes(self):
+        settled_before = time.time_ns() - 2 * 1_000_000_000
+        return {
+            directory: mtime
+            for directory, mtime in self._dir_mtimes().items()
+            if mtime is not None and mtime < settled_before
+        }
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def close(self):
+        with self._lock:
+            if self._inotify:
+                self._inotify.close()
+            self._inotify = None
+            self._built = False
@@ -5,6 +5,7 @@ import subprocess
 
 from chat_thief.irc_msg import IrcMsg
 from chat_thief.irc import send_twitch_msg
+from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
 from chat_thief.welcome_committee import WelcomeCommittee
 from chat_thief.prize_dropper import random_user
 from chat_thief.models.command import Command
@@ -32,6 +33,7 @@ class SampleSaver:
         if "TEST_MODE" not in os.environ:
             sample_updated = self._delete_old_sample()
             self._save_with_youtube_dl()
+            SoundeffectsLibrary.refresh()
             self._notify(sample_updated)
 
         command = Command(name=self.name)
@@ -1,4 +1,4 @@
-from pathlib import Path
+from chat_thief.audioworld.sample_catalog import SampleCatalog
 
 THEME_SONGS_PATH = "/home/begin/stream/Stream/Samples/theme_songs"
 SAMPLES_PATH = "/home/begin/stream/Stream/Samples/"
@@ -6,49 +6,46 @@ ALLOWED_AUDIO_FORMATS = [".mp3", ".m4a", ".wav", ".opus"]
 
 
 class SoundeffectsLibrary:
+    catalog = SampleCatalog(SAMPLES_PATH, THEME_SONGS_PATH, ALLOWED_AUDIO_FORMATS)
+
     @staticmethod
     def find_sample(name):
-        samples = [
-            sample
-            for sample in SoundeffectsLibrary.fetch_soundeffect_samples()
-            if name == sample.name[: -len(sample.suffix)]
-        ]
+        samples = SoundeffectsLibrary.catalog.paths_for(name)
         if samples:
-            return samples[0]
+            return samples[0].resolve()
 
     @staticmethod
     def fetch_theme_songs():
-        return [
-            theme.name[: -len(theme.suffix)]
-            for theme in Path(THEME_SONGS_PATH).glob("*")
-        ]
+        return SoundeffectsLibrary.catalog.theme_songs()
 
     @staticmethod
     def soundeffects_only():
-        return set(SoundeffectsLibrary.fetch_soundeffect_names()) - set(
-            SoundeffectsLibrary.fetch_theme_songs()
-        )
+        return SoundeffectsLibrary.catalog.soundeffects_only()
 
     @staticmethod
     def fetch_soundeffect_samples():
-        return {
-            p.resolve()
-            for p in Path(SAMPLES_PATH).glob("**/*")
-            if p.suffix in ALLOWED_AUDIO_FORMATS
-        }
+        return {path.resolve() for path in SoundeffectsLibrary.catalog.all_paths()}
 
     @staticmethod
     def fetch_soundeffect_names():
-        return [
-            sound_file.name[: -len(sound_file.suffix)]
-            for sound_file in SoundeffectsLibrary.fetch_soundeffect_samples()
-        ]
+        return SoundeffectsLibrary.catalog.names()
 
     @staticmethod
     def find_soundeffect_files(name):
-        return [
-            p
-            for p in Path(SAMPLES_PATH).glob("**/*")
-            if p.suffix in ALLOWED_AUDIO_FORMATS
-            if p.name[: -len(p.suffix)] == name
-        ]
+        return SoundeffectsLibrary.catalog.paths_for(name)
+
+    @staticmethod
+    def has_sample(name):
+        return SoundeffectsLibrary.catalog.has_sample(name)
+
+    @staticmethod
+    def is_theme_song(name):
+        return SoundeffectsLibrary.catalog.is_theme_song(name)
+
+    @staticmethod
+    def is_soundeffect(name):
+        return SoundeffectsLibrary.catalog.is_soundeffect(name)
+
+    @staticmethod
+    def refresh():
+        SoundeffectsLibrary.catalog.refresh(force=True)
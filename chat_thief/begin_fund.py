@@ -7,7 +7,7 @@ from chat_thief.models.command import Command
 from chat_thief.models.the_fed import TheFed
 from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
 from chat_thief.config.stream_lords import STREAM_LORDS, STREAM_GODS
-from chat_thief.chat_logs import ChatLogs
+from chat_thief.presence import random_present_user
 
 INVALID_USERS = ["nightbot", ".tim.twitch.tv"] + STREAM_GODS
 CONNECTING_MSG = '{"message": "Connecting to #beginbot as beginbotbot"}'
@@ -83,13 +83,4 @@ class BeginFund:
         return drop_effect(user, soundeffect)
 
     def random_user(self, blacklisted_users=[]):
-        try:
-            looking_for_user = True
-            while looking_for_user:
-                users = ChatLogs().recent_stream_peasants()
-                user = random.sample(users, 1)[0]
-                if user not in INVALID_USERS + blacklisted_users:
-                    looking_for_user = False
-            return user
-        except:
-            traceback.print_exc()
+        return random_present_user(exclude=INVALID_USERS + blacklisted_users)
@@ -1,4 +1,5 @@
 from typing import List, Dict
+import asyncio
 import json
 import random
 import traceback
@@ -6,10 +7,10 @@ import time
 from datetime import datetime
 import os
 
+from chat_thief.economist.leaderboard import leaderboard
 from chat_thief.models.breaking_news import BreakingNews
-from chat_thief.models.user import User
 from chat_thief.models.command import Command
-
+from chat_thief.models.user import User
 
 HOW_MANY_SECONDS_BETWEEN_NEWS = 300
 
@@ -17,71 +18,19 @@ HOW_MANY_SECONDS_BETWEEN_NEWS = 300
 class ForbesBot:
     def __init__(self):
         self.last_breaking_time = None
-        self.last_most_expensive = Command.most_expensive()
-        self.last_cool_points = User.richest_cool_points()
+        economy = leaderboard()
+        self.last_most_expensive = economy.most_expensive
+        self.last_cool_points = economy.richest_cool_points
 
     def loop(self):
+        changes = self.subscribe()
+
         while True:
             os.system("clear")
 
-            print(f"\nCommand: !{self.last_most_expensive['name']}")
-            print(
-                f"Cool Points: @{self.last_cool_points['name']} - {self.last_cool_points['cool_points']}"
-            )
-
-            if self.last_breaking_time:
-                how_long_since_break = datetime.now() - self.last_breaking_time
-                print(
-                    f"How Long: {how_long_since_break} / {HOW_MANY_SECONDS_BETWEEN_NEWS}"
-                )
-
             try:
-                self.new_top_cmd = Command.most_expensive()
-                self.updated_cool_points = User.richest_cool_points()
-
-                print(f"New Most Expensive: {self.new_top_cmd['name']}")
-                print(f"Old Most Expensive: {self.last_most_expensive['name']}")
-
-                if self.new_top_cmd["name"] != self.last_most_expensive["name"]:
-                    print(
-                        f"We have a new most expensive command: self.new_top_cmd['name']"
-                    )
-                    self.last_most_expensive = self.new_top_cmd
-
-                    if self.last_breaking_time:
-                        how_long_since_break = datetime.now() - self.last_breaking_time
-                        print(f"How Long: {how_long_since_break}")
-
-                        if how_long_since_break.seconds > HOW_MANY_SECONDS_BETWEEN_NEWS:
-                            self.breaking_news(
-                                f"New Most Expensive Command: {self.new_top_cmd['name']} - 💸{ self.new_top_cmd['cost']}"
-                            ).save()
-                    else:
-                        self.breaking_news(
-                            msg=f"New Most Expensive Command: {self.new_top_cmd['name']} - 💸{ self.new_top_cmd['cost']}"
-                        )
-
-                elif self.updated_cool_points["name"] != self.last_cool_points["name"]:
-                    print(
-                        f"We have a new richest user: {self.updated_cool_points['name']}"
-                    )
-                    self.last_cool_points = self.updated_cool_points
-                    if self.last_breaking_time:
-                        how_long_since_break = datetime.now() - self.last_breaking_time
-                        print(f"How Long: {how_long_since_break}")
-
-                        if how_long_since_break.seconds > 300:
-                            self.breaking_news(
-                                msg=f"New Richest in Cool Points: {self.updated_cool_points['name']}",
-                                user=self.updated_cool_points["name"],
-                            )
-                    else:
-                        self.breaking_news(
-                            msg=f"New Richest in Cool Points: {self.updated_cool_points['name']}",
-                            user=self.updated_cool_points["name"],
-                        )
-
-                time.sleep(1)
+                self.check_the_leaderboard()
+                changes.wait()
             except Exception as e:
                 traceback.print_exc()
                 time.sleep(1)
@@ -89,6 +38,72 @@ class ForbesBot:
                 if e is KeyboardInterrupt:
                     raise e
 
+    # For the bot supervisor, crashes are its problem
+    async def run(self):
+        with self.subscribe() as changes:
+            while True:
+                await asyncio.to_thread(self.check_the_leaderboard)
+                await changes.wait_async()
+
+    # The leaderboard only moves when these do
+    @staticmethod
+    def subscribe():
+        return Command.subscribe(Command.topic("cost"), User.topic("cool_points"))
+
+    def check_the_leaderboard(self):
+        print(f"\nCommand: !{self.last_most_expensive['name']}")
+        print(
+            f"Cool Points: @{self.last_cool_points['name']} - {self.last_cool_points['cool_points']}"
+        )
+
+        if self.last_breaking_time:
+            how_long_since_break = datetime.now() - self.last_breaking_time
+            print(f"How Long: {how_long_since_break} / {HOW_MANY_SECONDS_BETWEEN_NEWS}")
+
+        # Same snapshot until a user or command changes
+        economy = leaderboard()
+        self.new_top_cmd = economy.most_expensive
+        self.updated_cool_points = economy.richest_cool_points
+
+        print(f"New Most Expensive: {self.new_top_cmd['name']}")
+        print(f"Old Most Expensive: {self.last_most_expensive['name']}")
+
+        if self.new_top_cmd["name"] != self.last_most_expensive["name"]:
+            print(f"We have a new most expensive command: self.new_top_cmd['name']")
+            self.last_most_expensive = self.new_top_cmd
+
+            if self.last_breaking_time:
+                how_long_since_break = datetime.now() - self.last_breaking_time
+                print(f"How Long: {how_long_since_break}")
+
+                if how_long_since_break.seconds > HOW_MANY_SECONDS_BETWEEN_NEWS:
+                    # It saves the story itself
+                    self.breaking_news(
+                        f"New Most Expensive Command: {self.new_top_cmd['name']} - 💸{ self.new_top_cmd['cost']}"
+                    )
+            else:
+                self.breaking_news(
+                    msg=f"New Most Expensive Command: {self.new_top_cmd['name']} - 💸{ self.new_top_cmd['cost']}"
+                )
+
+        elif self.updated_cool_points["name"] != self.last_cool_points["name"]:
+            print(f"We have a new richest user: {self.updated_cool_points['name']}")
+            self.last_cool_points = self.updated_cool_points
+            if self.last_breaking_time:
+                how_long_since_break = datetime.now() - self.last_breaking_time
+                print(f"How Long: {how_long_since_break}")
+
+                if how_long_since_break.seconds > 300:
+                    self.breaking_news(
+                        msg=f"New Richest in Cool Points: {self.updated_cool_points['name']}",
+                        user=self.updated_cool_points["name"],
+                    )
+            else:
+                self.breaking_news(
+                    msg=f"New Richest in Cool Points: {self.updated_cool_points['name']}",
+                    user=self.updated_cool_points["name"],
+                )
+
     def breaking_news(self, msg, user=None):
         self.last_breaking_time = datetime.now()
         BreakingNews(scope=msg, user=user,).save()
@@ -1,4 +1,5 @@
 from typing import List, Dict
+import asyncio
 import json
 import random
 import traceback
@@ -15,44 +16,68 @@ from chat_thief.models.user import User
 from chat_thief.prize_dropper import drop_random_soundeffect_to_user
 
 BLACKLIST = []
+# Every 5 minutes, all the chatters have a chance at some street cred
+DROP_INTERVAL_IN_SECS = 300
+RETRY_INTERVAL_IN_SECS = 30
+
+
+def ring_opening_bell():
+    PlaySoundeffectRequest(user="beginbotbot", command="openingbell").save()
+
+
+def drop_to_peasants():
+    peasants = ChatLogs().recent_stream_peasants()
+    # We need to make this better
+    result = drop_random_soundeffect_to_user(random.sample(peasants, 1)[0])
+    send_twitch_msg(result)
+
+    for peasant in peasants:
+        if peasant not in BLACKLIST:
+            user = User(peasant)
+            user_karma = user.karma()
+            print(f"@{peasant} Karma: {user.karma()}")
+            user.update_street_cred(1)
+            # user.update_street_cred(1 + user_karma)
+            user.revive(3 + user_karma)
+
+    send_twitch_msg("CoolCat CoolCat CoolCat")
+    # formatted_peasants = [f"@{peasant}" for peasant in peasants]
+    # send_twitch_msg(
+    #     f"Squid1 Enjoy your street cred: {' '.join(formatted_peasants)} Squid4"
+    # )
 
 
 # I feel like this could also handle checking for the news
 def sync_main():
-    PlaySoundeffectRequest(user="beginbotbot", command="openingbell").save()
+    ring_opening_bell()
 
     while True:
         try:
-            peasants = ChatLogs().recent_stream_peasants()
-            # We need to make this better
-            result = drop_random_soundeffect_to_user(random.sample(peasants, 1)[0])
-            send_twitch_msg(result)
-
-            for peasant in peasants:
-                if peasant not in BLACKLIST:
-                    user = User(peasant)
-                    user_karma = user.karma()
-                    print(f"@{peasant} Karma: {user.karma()}")
-                    user.update_street_cred(1)
-                    # user.update_street_cred(1 + user_karma)
-                    user.revive(3 + user_karma)
-
-            send_twitch_msg("CoolCat CoolCat CoolCat")
-            # formatted_peasants = [f"@{peasant}" for peasant in peasants]
-            # send_twitch_msg(
-            #     f"Squid1 Enjoy your street cred: {' '.join(formatted_peasants)} Squid4"
-            # )
-
-            # Every 5 minutes, all the chatters have a chance at some street cred
+            drop_to_peasants()
             # os.system("time make deploy")
-            time.sleep(300)
+            time.sleep(DROP_INTERVAL_IN_SECS)
         except Exception as e:
-            time.sleep(30)
+            time.sleep(RETRY_INTERVAL_IN_SECS)
             if e is KeyboardInterrupt:
                 raise e
             else:
                 traceback.print_exc()
 
 
+# For the bot supervisor. A bad drop is retried here like sync_main does,
+# so the opening bell only rings again if the supervisor has to restart us
+async def run():
+    await asyncio.to_thread(ring_opening_bell)
+
+    while True:
+        try:
+            await asyncio.to_thread(drop_to_peasants)
+        except Exception:
+            traceback.print_exc()
+            await asyncio.sleep(RETRY_INTERVAL_IN_SECS)
+        else:
+            await asyncio.sleep(DROP_INTERVAL_IN_SECS)
+
+
 if __name__ == "__main__":
     sync_main()
@@ -1,3 +1,4 @@
+import asyncio
 import traceback
 import time
 from datetime import datetime
@@ -5,10 +6,10 @@ import os
 
 from chat_thief.chat_logs import ChatLogs
 from chat_thief.config.log import logger
+from chat_thief.economist.leaderboard import leaderboard
 from chat_thief.models.breaking_news import BreakingNews
-from chat_thief.models.command import Command
+from chat_thief.models.change_bus import INSERTED
 from chat_thief.models.soundeffect_request import SoundeffectRequest
-from chat_thief.models.user import User
 from chat_thief.prize_dropper import drop_random_soundeffect_to_user
 
 
@@ -16,15 +17,19 @@ class BreakingNewsBot:
     def __init__(self):
         self.in_coup = False
         self.last_breaking_time = None
-        self.initial_most_expensive = Command.most_expensive()
-        self.initial_richest_user = User.richest_cool_points()
+        economy = leaderboard()
+        self.initial_most_expensive = economy.most_expensive
+        self.initial_richest_user = economy.richest_cool_points
 
     def loop(self):
+        news = BreakingNews.subscribe(BreakingNews.topic(INSERTED))
 
         while True:
             try:
                 self.check_for_breaking_news()
-                time.sleep(1)
+                # Sleeps until a story comes in, news that came in too soon
+                # still gets another look in a bit
+                news.wait(timeout=self.recheck_in())
             except Exception as e:
                 time.sleep(30)
                 # https://docs.python.org/3/library/exceptions.html#KeyboardInterrupt
@@ -35,6 +40,17 @@ class BreakingNewsBot:
                 else:
                     traceback.print_exc()
 
+    # For the bot supervisor, crashes are its problem
+    async def run(self):
+        with BreakingNews.subscribe(BreakingNews.topic(INSERTED)) as news:
+            while True:
+                await asyncio.to_thread(self.check_for_breaking_news)
+                await news.wait_async(timeout=await asyncio.to_thread(self.recheck_in))
+
+    @staticmethod
+    def recheck_in():
+        return 1 if BreakingNews.unreported_news() else None
+
     def check_for_breaking_news(self):
         if BreakingNews.unreported_news():
             last_news_story = BreakingNews.last()
@@ -1,5 +1,5 @@
+import asyncio
 import subprocess
-import time
 import traceback
 
 from chat_thief.config.log import logger, success, warning, error
@@ -12,58 +12,67 @@ from chat_thief.audioworld.audio_player import AudioPlayer
 from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
 from chat_thief.config.stream_lords import STREAM_GODS
 
+# A supervised soundboard waits on the player in a thread this long at a
+# time, so a cancelled bot doesn't leave it waiting on a player that's stuck
+READY_WAIT_IN_SECS = 1
+
+
+def play_soundeffect(sfx):
+    command = Command(sfx["command"])
+    user = User(sfx["user"])
+
+    command_health = 5
+    # command_health = command.health()
+
+    user_mana = user.mana()
+    sfx_vote = SFXVote(command.name)
+
+    user_allowed_to_play = command.allowed_to_play(user.name)
+    public_approved = sfx_vote.is_enabled()
+
+    if user.name in STREAM_GODS:
+        soundfile = SoundeffectsLibrary.find_sample(sfx["command"])
+        if soundfile:
+            AudioPlayer.play_sample(soundfile.resolve(), sfx["notification"], user.name)
+    elif not public_approved:
+        msg = f"Command: '!{command.name}' silenced: {round(sfx_vote.like_to_hate_ratio(), 2)}% Love/Hate Ratio"
+        send_twitch_msg(msg)
+        warning(msg)
+    elif user_allowed_to_play and command_health > 0 and user_mana > 0:
+        soundfile = SoundeffectsLibrary.find_sample(sfx["command"])
+
+        print(f"WE ARE TRYING TO PLAY: {soundfile}")
+
+        if soundfile:
+            AudioPlayer.play_sample(soundfile.resolve(), sfx["notification"], user.name)
+            user.update_mana(-1)
+        else:
+            warning(f"Couldn't find soundfile for {sfx['command']}")
+    else:
+        if user.name not in ["beginbot", "beginbotbot"]:
+            # is the soundeffect isn't a real command
+            # don't say anything
+            msg = f"Not Playing '!{command.name}' for @{user.name} | Allowed: {user_allowed_to_play} | Mana: {user_mana}"
+            send_twitch_msg(msg)
+            warning(msg)
+
 
 def sync_main():
+    consumer = PlaySoundeffectRequest.queue().consumer()
+
     while True:
         try:
-            # This deletes them from the DB
-            all_effects = PlaySoundeffectRequest().pop_all_off()
-
-            for sfx in all_effects:
-                command = Command(sfx["command"])
-                user = User(sfx["user"])
-
-                command_health = 5
-                # command_health = command.health()
-
-                user_mana = user.mana()
-                sfx_vote = SFXVote(command.name)
-
-                user_allowed_to_play = command.allowed_to_play(user.name)
-                public_approved = sfx_vote.is_enabled()
-
-                if user.name in STREAM_GODS:
-                    soundfile = SoundeffectsLibrary.find_sample(sfx["command"])
-                    if soundfile:
-                        AudioPlayer.play_sample(
-                            soundfile.resolve(), sfx["notification"], user.name
-                        )
-                elif not public_approved:
-                    msg = f"Command: '!{command.name}' silenced: {round(sfx_vote.like_to_hate_ratio(), 2)}% Love/Hate Ratio"
-                    send_twitch_msg(msg)
-                    warning(msg)
-                elif user_allowed_to_play and command_health > 0 and user_mana > 0:
-                    soundfile = SoundeffectsLibrary.find_sample(sfx["command"])
-
-                    print(f"WE ARE TRYING TO PLAY: {soundfile}")
-
-                    if soundfile:
-                        AudioPlayer.play_sample(
-                            soundfile.resolve(), sfx["notification"], user.name
-                        )
-                        user.update_mana(-1)
-                    else:
-                        warning(f"Couldn't find soundfile for {sfx['command']}")
-                else:
-                    if user.name not in ["beginbot", "beginbotbot"]:
-                        # is the soundeffect isn't a real command
-                        # don't say anything
-                        msg = f"Not Playing '!{command.name}' for @{user.name} | Allowed: {user_allowed_to_play} | Mana: {user_mana}"
-                        send_twitch_msg(msg)
-                        warning(msg)
-
-            # time.sleep(15)
-            time.sleep(1)
+            # Playing doesn't block anymore, so only take the next request
+            # once it can start, or the queue's turn taking is for nothing
+            AudioPlayer.wait_until_ready()
+            # Wakes up as soon as a request is queued
+            item = consumer.get()
+            try:
+                play_soundeffect(item.doc)
+            except Exception:
+                # Retrying a request that blew up would just blow up again
+                traceback.print_exc()
+            consumer.ack(item)
         except Exception as e:
             if e is KeyboardInterrupt:
                 raise e
@@ -71,5 +80,24 @@ def sync_main():
                 traceback.print_exc()
 
 
+# For the bot supervisor, crashes are its problem
+async def run():
+    consumer = PlaySoundeffectRequest.queue().consumer()
+    try:
+        while True:
+            while not await asyncio.to_thread(
+                AudioPlayer.wait_until_ready, READY_WAIT_IN_SECS
+            ):
+                pass
+            item = await consumer.get_async()
+            try:
+                await asyncio.to_thread(play_soundeffect, item.doc)
+            except Exception:
+                traceback.print_exc()
+            consumer.ack(item)
+    finally:
+        consumer.close()
+
+
 if __name__ == "__main__":
     sync_main()
@@ -1,4 +1,5 @@
 from typing import List, Dict
+import asyncio
 import json
 import traceback
 import time
@@ -7,11 +8,18 @@ from chat_thief.config.log import logger
 from chat_thief.models.soundeffect_request import SoundeffectRequest
 
 
+# Requests get approved as they're made, or later by a streamlord
+def subscribe():
+    return SoundeffectRequest.subscribe(SoundeffectRequest.topic("approved"))
+
+
 def sync_main():
+    approvals = subscribe()
+
     while True:
         try:
             SoundeffectRequest.pop_all_off()
-            time.sleep(1)
+            approvals.wait()
         except Exception as e:
             if e is KeyboardInterrupt:
                 raise e
@@ -19,5 +27,13 @@ def sync_main():
                 traceback.print_exc()
 
 
+# For the bot supervisor, crashes are its problem
+async def run():
+    with subscribe() as approvals:
+        while True:
+            await asyncio.to_thread(SoundeffectRequest.pop_all_off)
+            await approvals.wait_async()
+
+
 if __name__ == "__main__":
     sync_main()
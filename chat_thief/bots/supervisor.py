@@ -0,0 +1,217 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+import argparse
+import asyncio
+import json
+import os
+import resource
+import time
+import traceback
+
+from chat_thief.config.log import error, success
+from chat_thief.models.database import open_databases
+
+# A bot that crashes (or returns) is restarted after this long, doubling
+# every time it stops again, up to the max
+FIRST_RESTART_DELAY_IN_SECS = 1
+MAX_RESTART_DELAY_IN_SECS = 300
+# A bot that ran at least this long before stopping starts over at the first delay
+HEALTHY_AFTER_IN_SECS = 60
+STATUS_HOST = "127.0.0.1"
+STATUS_PORT = 5050
+
+
+def restart_delay(crashes_in_a_row):
+    return min(
+        MAX_RESTART_DELAY_IN_SECS, FIRST_RESTART_DELAY_IN_SECS * 2**crashes_in_a_row
+    )
+
+
+@dataclass
+class SupervisedBot:
+    name: str
+    start: Callable[[], Awaitable[None]]
+    state: str = "starting"
+    restarts: int = 0
+    crashes_in_a_row: int = 0
+    started_at: Optional[float] = None
+    restart_at: Optional[float] = None
+    last_error: Optional[str] = None
+
+    def status(self) -> dict:
+        now = time.time()
+        return {
+            "state": self.state,
+            "restarts": self.restarts,
+            "up_secs": (
+                round(now - self.started_at) if self.state == "running" else None
+            ),
+            "restart_in_secs": (
+                round(self.restart_at - now, 1) if self.restart_at else None
+            ),
+            "last_error": self.last_error,
+        }
+
+
+class Supervisor:
+    """
+    Runs the background bots as asyncio tasks in one process, instead of a
+    process each.
+
+    They share the process's parsed databases (and the change bus waking
+    them up) and its one connection to Twitch chat, so every table is only
+    parsed, and kept in memory, once. A bot that crashes, or returns, is
+    restarted with exponential backoff, and GET /status on STATUS_PORT shows
+    how each one is doing, as JSON.
+    """
+
+    def __init__(self, bots: Dict[str, Callable[[], Awaitable[None]]]):
+        self.bots = {name: SupervisedBot(name, start) for name, start in bots.items()}
+        self.started_at = time.time()
+
+    async def run(self, status_port=STATUS_PORT) -> None:
+        server = None
+        if status_port is not None:
+            server = await asyncio.start_server(
+                self._serve_status, STATUS_HOST, status_port
+            )
+            success(f"Bot status on http://{STATUS_HOST}:{status_port}/status")
+
+        tasks = [
+            asyncio.create_task(self._supervise(bot), name=bot.name)
+            for bot in self.bots.values()
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if server:
+                server.close()
+                await server.wait_closed()
+
+    async def _supervise(self, bot: SupervisedBot) -> None:
+        while True:
+            bot.state = "running"
+            bot.started_at = time.time()
+            started = time.monotonic()
+            try:
+                await bot.start()
+            except asyncio.CancelledError:
+                bot.state = "stopped"
+                raise
+            except Exception as e:
+                traceback.print_exc()
+                bot.last_error = f"{type(e).__name__}: {e}"
+            else:
+                # The bots run until they're cancelled, so this is a bug too
+                bot.last_error = "Returned"
+
+            if time.monotonic() - started >= HEALTHY_AFTER_IN_SECS:
+                bot.crashes_in_a_row = 0
+            delay = restart_delay(bot.crashes_in_a_row)
+            bot.crashes_in_a_row += 1
+
+            error(f"{bot.name} stopped, restarting in {delay}s: {bot.last_error}")
+            bot.state = "backing off"
+            bot.restart_at = time.time() + delay
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                bot.state = "stopped"
+                raise
+            finally:
+                bot.restart_at = None
+            bot.restarts += 1
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "up_secs": round(time.time() - self.started_at),
+            # In KB on Linux, what running the bots together is meant to save
+            "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "databases": open_databases(),
+            "bots": {name: bot.status() for name, bot in self.bots.items()},
+        }
+
+    async def _serve_status(self, reader, writer) -> None:
+        try:
+            request = (await reader.readline()).decode("latin-1").split()
+            # The headers, which we don't need
+            while (await reader.readline()).strip():
+                pass
+
+            if request[:2] == ["GET", "/status"]:
+                status, body = "200 OK", json.dumps(self.status())
+            else:
+                status, body = "404 Not Found", json.dumps({"error": "Try /status"})
+            body = bytes(body, "utf-8")
+            writer.write(
+                bytes(
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n",
+                    "utf-8",
+                )
+                + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _forbes() -> None:
+    from chat_thief.bots.forbes_bot import ForbesBot
+
+    # Building the leaderboard reads the users and commands
+    bot = await asyncio.to_thread(ForbesBot)
+    await bot.run()
+
+
+async def _news() -> None:
+    from chat_thief.bots.new_news_bot import BreakingNewsBot
+
+    bot = await asyncio.to_thread(BreakingNewsBot)
+    await bot.run()
+
+
+def default_bots() -> Dict[str, Callable[[], Awaitable[None]]]:
+    from chat_thief.bots import (
+        hand_of_the_market,
+        soundboard_bot,
+        soundeffect_request_bot,
+    )
+    from chat_thief.mygeoangelfirespace import syncer
+
+    return {
+        "soundboard": soundboard_bot.run,
+        "soundeffect_requests": soundeffect_request_bot.run,
+        "news": _news,
+        "forbes": _forbes,
+        "hand_of_the_market": hand_of_the_market.run,
+        "syncer": syncer.run,
+    }
+
+
+if __name__ == "__main__":
+    bots = default_bots()
+    parser = argparse.ArgumentParser(description="Run the background bots together")
+    parser.add_argument(
+        "bots", nargs="*", help=f"Which of {', '.join(bots)} (all by default)"
+    )
+    parser.add_argument("--status-port", type=int, default=STATUS_PORT)
+    args = parser.parse_args()
+    if unknown := set(args.bots) - set(bots):
+        parser.error(f"No bot called {', '.join(sorted(unknown))}")
+
+    supervisor = Supervisor(
+        {name: start for name, start in bots.items() if name in (args.bots or bots)}
+    )
+    try:
+        asyncio.run(supervisor.run(args.status_port))
+    except KeyboardInterrupt:
+        pass
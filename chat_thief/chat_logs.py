@@ -1,5 +1,7 @@
 from pathlib import Path
-from collections import Counter
+from collections import Counter, deque
+import os
+import threading
 
 from chat_thief.config.stream_lords import STREAM_GODS
 
@@ -7,12 +9,109 @@ from chat_thief.config.stream_lords import STREAM_GODS
 # ALL_LINES has to also be False
 DEFAULT_LINE_COUNT = 100
 ALL_LINES = True
+CHAT_LOG_PATH = Path(__file__).parent.parent.joinpath("logs/chat.log")
+TAIL_BLOCK_SIZE = 8192
+
+
+def tail_lines(log_path, line_count=DEFAULT_LINE_COUNT, block_size=TAIL_BLOCK_SIZE):
+    """The last line_count lines, read backwards from the end of the file"""
+    with open(log_path, "rb") as log:
+        end = log.seek(0, os.SEEK_END)
+        _, contents = _read_backwards(log, end, line_count, block_size)
+    return _decode_lines(contents)[-line_count:] if line_count else []
+
+
+def _read_backwards(log, end, line_count, block_size=TAIL_BLOCK_SIZE):
+    position = end
+    contents = b""
+    # One extra newline, so the first line we keep is a whole one
+    while position > 0 and contents.count(b"\n") <= line_count:
+        read_size = min(block_size, position)
+        position -= read_size
+        log.seek(position)
+        contents = log.read(read_size) + contents
+    return position, contents
+
+
+def _decode_lines(contents):
+    return [
+        line.decode("utf-8", errors="replace") for line in contents.split(b"\n") if line
+    ]
+
+
+class ChatLogTail:
+    """
+    The last window_size lines of a log that only ever gets appended to.
+
+    Seeded by reading backwards from the end of the file, then refresh()
+    only reads what got appended since the byte offset we stopped at, so
+    it costs the same however big the log gets. A truncated or replaced
+    log gets seeded again.
+    """
+
+    def __init__(self, log_path=CHAT_LOG_PATH, window_size=DEFAULT_LINE_COUNT):
+        self.log_path = Path(log_path)
+        self.window = deque(maxlen=window_size)
+        self.offset = 0
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def lines(self):
+        with self._lock:
+            self._refresh()
+            return list(self.window)
+
+    def _refresh(self):
+        try:
+            stat = self.log_path.stat()
+        except FileNotFoundError:
+            self.window.clear()
+            self._inode = None
+            return
+
+        with open(self.log_path, "rb") as log:
+            if stat.st_ino != self._inode or stat.st_size < self.offset:
+                self.window.clear()
+                self._inode = stat.st_ino
+                position, contents = _read_backwards(
+                    log, stat.st_size, self.window.maxlen
+                )
+            elif stat.st_size > self.offset:
+                position = log.seek(self.offset)
+                contents = log.read(stat.st_size - self.offset)
+            else:
+                return
+
+        # A line still being written waits for the next refresh
+        complete, newline, _ = contents.rpartition(b"\n")
+        self.offset = position + len(complete) + len(newline)
+        self.window.extend(_decode_lines(complete))
+
+
+# One tail per log, shared by every ChatLogs in the process
+_tails = {}
+_tails_lock = threading.Lock()
+
+
+def chat_log_tail(log_path=CHAT_LOG_PATH) -> ChatLogTail:
+    with _tails_lock:
+        if log_path not in _tails:
+            _tails[log_path] = ChatLogTail(log_path)
+        return _tails[log_path]
 
 
 class ChatLogs:
-    def __init__(self):
-        lines = self._read_in_chat(all_lines=True)
-        self.raw_users = [chat_msg.split(":")[0] for chat_msg in lines]
+    def __init__(self, log_path=CHAT_LOG_PATH):
+        self.log_path = log_path
+        self._raw_users = None
+
+    # Everybody who ever chatted means the whole log, so only when asked
+    @property
+    def raw_users(self):
+        if self._raw_users is None:
+            lines = self._read_in_chat(all_lines=True)
+            self._raw_users = [chat_msg.split(":")[0] for chat_msg in lines]
+        return self._raw_users
 
     def users(self):
         return list(set(self.raw_users))
@@ -29,10 +128,15 @@ class ChatLogs:
         return peasants
 
     def _read_in_chat(self, line_count=DEFAULT_LINE_COUNT, all_lines=ALL_LINES):
-        with Path(__file__).parent.parent.joinpath("logs/chat.log") as log:
-            chat_lines = [line for line in log.read_text().split("\n") if line]
-            if all_lines:
-                lines = chat_lines
-            else:
-                lines = chat_lines[-line_count:]
-        return lines
+        if all_lines:
+            with open(self.log_path, "rb") as log:
+                return [
+                    line.decode("utf-8", errors="replace").rstrip("\n")
+                    for line in log
+                    if line.strip(b"\n")
+                ]
+
+        tail = chat_log_tail(self.log_path)
+        if line_count <= tail.window.maxlen:
+            return tail.lines()[-line_count:]
+        return tail_lines(self.log_path, line_count)
@@ -5,9 +5,7 @@ from dataclasses import dataclass
 
 from chat_thief.config.stream_lords import STREAM_GODS
 from chat_thief.prize_dropper import random_soundeffect
-from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
-from chat_thief.welcome_committee import WelcomeCommittee
-from chat_thief.models.user import User
+from chat_thief.chat_parsers.known_names import KnownNames
 
 
 @dataclass
@@ -21,14 +19,21 @@ class CommandRequest:
 
 class CommandParser:
     def __init__(
-        self, user, command, args=[], allow_random_user=False, allow_random_sfx=False
+        self,
+        user,
+        command,
+        args=[],
+        allow_random_user=False,
+        allow_random_sfx=False,
+        known_names=None,
     ):
         self.user = user
         self.target_command = command
         self.args = [self._sanitize(arg) for arg in args]
         self.allow_random_user = allow_random_user
         self.allow_random_sfx = allow_random_sfx
-        self.all_user_names = [user["name"] for user in User.all()]
+        # Pass the same KnownNames to every parser for a message
+        self.known_names = known_names or KnownNames()
 
     def parse(self):
         self._set_target_user_and_command()
@@ -70,24 +75,17 @@ class CommandParser:
         if self.allow_random_sfx and sfx == "random":
             return True
 
-        return sfx in SoundeffectsLibrary.soundeffects_only()
+        return self.known_names.is_soundeffect(sfx)
 
     def _is_user(self, user):
         if user in ["beginbot", "beginbotbot"]:
             return True
         elif user in STREAM_GODS:
             return True
-        elif self.allow_random_user:
-            return (
-                user in self.all_user_names
-                or user == "random"
-                or user in WelcomeCommittee().present_users()
-            )
+        elif self.allow_random_user and user == "random":
+            return True
         else:
-            return (
-                user in self.all_user_names
-                or user in WelcomeCommittee().present_users()
-            )
+            return self.known_names.is_user(user)
 
     def _is_valid_amount(self, val):
         try:
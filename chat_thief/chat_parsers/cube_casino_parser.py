@@ -32,7 +32,7 @@ class CubeCasinoParser:
         self.wager = []
 
         for arg in self.args:
-            if arg in SoundeffectsLibrary.soundeffects_only():
+            if SoundeffectsLibrary.is_soundeffect(arg):
                 self.wager.append(arg)
 
             if self._is_valid_bet(arg):
@@ -0,0 +1,33 @@
+from functools import cached_property
+
+from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
+from chat_thief.welcome_committee import WelcomeCommittee
+from chat_thief.models.user import User
+
+
+class KnownNames:
+    """
+    The user and sample names a chat message's args get resolved against.
+
+    Each set is loaded the first time it's needed, then reused by every
+    parser handed this object, so make one per message and pass it around.
+    Users are looked up one at a time in the users' name index instead.
+    """
+
+    @cached_property
+    def present_users(self):
+        return set(WelcomeCommittee().present_users())
+
+    @cached_property
+    def theme_songs(self):
+        return set(SoundeffectsLibrary.fetch_theme_songs())
+
+    @cached_property
+    def soundeffects(self):
+        return set(SoundeffectsLibrary.fetch_soundeffect_names()) - self.theme_songs
+
+    def is_user(self, name):
+        return User.get_by("name", name) is not None or name in self.present_users
+
+    def is_soundeffect(self, name):
+        return name in self.soundeffects
@@ -63,4 +63,4 @@ class RequestApproverParser:
             return item.lower()
 
     def _is_command(self, command):
-        return command in SoundeffectsLibrary.fetch_soundeffect_names()
+        return SoundeffectsLibrary.has_sample(command)
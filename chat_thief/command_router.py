@@ -6,12 +6,15 @@ import os
 from chat_thief.config.commands_config import OBS_COMMANDS
 from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
 from chat_thief.chat_parsers.command_parser import CommandParser
+from chat_thief.chat_parsers.known_names import KnownNames
 from chat_thief.config.log import error, success, warning
 from chat_thief.config.stream_lords import STREAM_LORDS, STREAM_GODS
 from chat_thief.irc_msg import IrcMsg
+from chat_thief.models.base_db_model import BaseDbModel
 from chat_thief.models.play_soundeffect_request import PlaySoundeffectRequest
 from chat_thief.models.breaking_news import BreakingNews
 from chat_thief.models.user_event import UserEvent
+from chat_thief.presence import presence
 
 from chat_thief.routers import *
 
@@ -36,6 +39,18 @@ ROUTERS = [
 ]
 
 
+def build_dispatch_table(routers):
+    dispatch_table = {}
+    for Router in routers:
+        for command in Router.commands:
+            dispatch_table.setdefault(command, []).append(Router)
+    return dispatch_table
+
+
+# command name or alias -> the routers that answer it, in ROUTERS order
+DISPATCH_TABLE = build_dispatch_table(ROUTERS)
+
+
 class CommandRouter:
     def __init__(self, irc_msg: List[str], logger: logging.Logger) -> None:
         self._logger = logger
@@ -51,6 +66,7 @@ class CommandRouter:
 
         if self.user not in BLACKLISTED_LOG_USERS:
             self._logger.info(f"{self.user}: {self.msg}")
+            presence().saw(self.user)
             WelcomeCommittee().welcome_new_users(self.user)
 
         success(f"\n{self.user}: {self.msg}")
@@ -64,32 +80,44 @@ class CommandRouter:
                 BreakingNews(" ".join(self.irc_msg.args), category="iasip").save()
                 return
 
-        parser = CommandParser(
-            user=self.user, command=self.command, args=self.args
-        ).parse()
-
-        for Router in ROUTERS:
+        routers = DISPATCH_TABLE.get(self.command, [])
+        if routers:
+            known_names = KnownNames()
+            parser = CommandParser(
+                user=self.user,
+                command=self.command,
+                args=self.args,
+                known_names=known_names,
+            ).parse()
+
+        for Router in routers:
             try:
-                if result := Router(self.user, self.command, self.args, parser).route():
-
-                    # TODO: Sort out this Result Concept Better
-                    if isinstance(result, Result):
-                        # TODO: Update This
-                        UserEvent(
-                            user=self.irc_msg.user,
-                            command=self.irc_msg.command,
-                            msg=self.irc_msg.msg,
-                            result=[],
-                            # result=result,
-                        ).save()
-                    else:
-                        UserEvent(
-                            user=self.irc_msg.user,
-                            command=self.irc_msg.command,
-                            msg=self.irc_msg.msg,
-                            result=result,
-                        ).save()
-
+                # A router that blows up halfway doesn't leave half its writes
+                with BaseDbModel.unit_of_work():
+                    result = Router(
+                        self.user, self.command, self.args, parser, known_names
+                    ).route()
+
+                # The log of what happened, once it has
+                # TODO: Sort out this Result Concept Better
+                if result and isinstance(result, Result):
+                    # TODO: Update This
+                    UserEvent(
+                        user=self.irc_msg.user,
+                        command=self.irc_msg.command,
+                        msg=self.irc_msg.msg,
+                        result=[],
+                        # result=result,
+                    ).save()
+                elif result:
+                    UserEvent(
+                        user=self.irc_msg.user,
+                        command=self.irc_msg.command,
+                        msg=self.irc_msg.msg,
+                        result=result,
+                    ).save()
+
+                if result:
                     return result
             except Exception as e:
                 traceback.print_exc()
@@ -99,6 +127,6 @@ class CommandRouter:
             print(f"executing OBS Command: {self.command}")
             return os.system(f"so {self.command}")
 
-        if self.command in SoundeffectsLibrary.fetch_soundeffect_names():
+        if SoundeffectsLibrary.has_sample(self.command):
             if self.command:
                 PlaySoundeffectRequest(user=self.user, command=self.command).save()
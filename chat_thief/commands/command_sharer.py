@@ -12,7 +12,7 @@ class CommandSharer:
         self.friend = friend
 
     def share(self):
-        if not self.command in SoundeffectsLibrary.fetch_soundeffect_names():
+        if not SoundeffectsLibrary.has_sample(self.command):
             raise ValueError(f"!{self.command} invalid command")
 
         command = Command(name=self.command)
@@ -23,15 +23,15 @@ class CommandSharer:
             perm_result = command.allow_user(self.friend)
             return f"{self.user} shared {perm_result}"
 
-        elif user_cool_points >= command_cost:
+        elif User(self.user).debit_if_at_least(command_cost):
             perm_result = command.allow_user(self.friend)
             if perm_result:
                 print("\nWe have a Perm Result")
-                User(self.user).update_cool_points(-command_cost)
                 command.increase_cost(command_cost * 2)
                 return f"{self.user} shared {perm_result}"
             else:
                 print("\nWe NOOOOO have a Perm Result")
+                User(self.user).update_cool_points(command_cost)
                 return f"{self.user} cannot add permissions"
 
         else:
@@ -1,6 +1,8 @@
 import os
-from itertools import chain, cycle
+import time
+from itertools import cycle
 
+from chat_thief.config.log import success
 from chat_thief.models.user import User
 from chat_thief.models.vote import Vote
 from chat_thief.permissions_fetcher import PermissionsFetcher
@@ -20,13 +22,19 @@ class Revolution:
 
         print(f"Cool Points: {user.cool_points()} | Coup Cost: {coup_cost}")
 
-        if user.cool_points() >= coup_cost or self.revolutionary == "beginbotbot":
-            print("WE HAVE ENOUGH FOR A REVOLUTION")
+        if self.revolutionary == "beginbotbot":
             user.update_cool_points(-coup_cost)
+            paid = True
+        else:
+            paid = user.debit_if_at_least(coup_cost)
+
+        if paid:
+            print("WE HAVE ENOUGH FOR A REVOLUTION")
             self.coup.increase_cost(coup_cost * 2)
 
+            # Not while the coup holds the users and commands
             if "TEST_MODE" not in os.environ:
-                os.system(f"so {tide}")
+                Command.after_commit(lambda: os.system(f"so {tide}"))
 
             return self._turn_the_tides(tide)
         else:
@@ -38,29 +46,21 @@ class Revolution:
         return User(self.revolutionary).bankrupt()
 
     def _turn_the_tides(self, tide):
+        start = time.perf_counter()
         fence_sitters = Vote.fence_sitters()
-        user = User("beginbot")
-        vote = Vote("beginbot")
+        transfer = WealthTransfer()
 
-        for fence_sitter in fence_sitters:
-            fs = User(fence_sitter)
-
-            # Maybe in peace time, you should only lose a fraction of your
-            # commands
-            fs.remove_all_commands()
-            if tide == "revolution":
-                print(fs.bankrupt())
+        # Maybe in peace time, you should only lose a fraction of your
+        # commands
+        transfer.strip(fence_sitters)
+        if tide == "revolution":
+            transfer.bankrupt(fence_sitters)
 
-        revolutionaries = vote.revolutionaries()
-        peace_keepers = vote.peace_keepers()
+        revolutionaries = Vote.revolutionaries()
+        peace_keepers = Vote.peace_keepers()
 
-        revolutionary_sounds = list(
-            chain.from_iterable([User(user).commands() for user in revolutionaries])
-        )
-
-        peace_keeper_sounds = list(
-            chain.from_iterable([User(user).commands() for user in peace_keepers])
-        )
+        revolutionary_sounds = transfer.sounds_of(revolutionaries)
+        peace_keeper_sounds = transfer.sounds_of(peace_keepers)
 
         print(f"Revolutionaries: {revolutionaries}")
         print(f"Sounds: {revolutionary_sounds}\n")
@@ -76,42 +76,38 @@ class Revolution:
             fence_sitters=fence_sitters,
         ).save()
 
+        result = None
         if tide == "peace":
-            power_users = peace_keepers
-            weaklings = revolutionaries
-            self._transfer_power(peace_keepers, revolutionaries, revolutionary_sounds)
-            return "REVOLUTIONS WILL NOT BE TOLERATED, AND REVOLUTIONARIES WILL BE PUNISHED"
+            self._transfer_power(
+                transfer, peace_keepers, revolutionaries, revolutionary_sounds
+            )
+            result = "REVOLUTIONS WILL NOT BE TOLERATED, AND REVOLUTIONARIES WILL BE PUNISHED"
 
         if tide == "revolution":
-            power_users = revolutionaries
-            weaklings = peace_keepers
-
             # We need to remove all Revolution permissionns before
-            for revolutionary in revolutionaries:
-                print(User(revolutionary).remove_all_commands())
-
+            transfer.strip(revolutionaries)
             self._transfer_power(
+                transfer,
                 revolutionaries,
                 peace_keepers,
                 peace_keeper_sounds + revolutionary_sounds,
             )
-            return "THE REVOLUTION IS NOW!"
+            result = "THE REVOLUTION IS NOW!"
 
-    #  Transferring power is Different
-    def _transfer_power(self, power_users, weaklings, bounty):
-        the_cycle_of_power_users = cycle(power_users)
-
-        for user in weaklings:
-            print(f"Removing All Commands for {user}")
-            poor_sap = User(user)
-            poor_sap.remove_all_commands()
-            poor_sap.bankrupt()
-
-        for sfx in bounty:
-            user = next(the_cycle_of_power_users)
-            print(f"Giving {user} SFX: {sfx}")
-            Command(sfx).allow_user(user)
+        transfer.commit()
+        success(
+            f"{tide} Wealth Transfer: {transfer.changed_commands} Commands "
+            f"& {len(transfer.bankrupts)} Users in "
+            f"{(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return result
 
+    #  Transferring power is Different
+    def _transfer_power(self, transfer, power_users, weaklings, bounty):
+        print(f"Removing All Commands for {len(weaklings)} Users")
+        transfer.strip(weaklings)
+        transfer.bankrupt(weaklings)
+        transfer.give(power_users, bounty)
         return f"Power Transferred: {power_users} | {weaklings} | {bounty}"
 
     # It should cost to coup
@@ -123,3 +119,84 @@ class Revolution:
         result = permissions_manager.purge()
         results.append(result)
         return results
+
+
+class WealthTransfer:
+    """
+    Everything a coup does to commands and users, worked out in memory.
+
+    Commands get read once up front, every strip/bankrupt/give just edits
+    the in-memory permissions, then commit() writes each changed doc in a
+    single transaction per table, instead of a few writes per user per sound.
+    """
+
+    def __init__(self):
+        self.commands = Command.db().all()
+        self.permitted_users = {
+            command["name"]: list(dict.fromkeys(command.get("permitted_users", [])))
+            for command in self.commands
+        }
+        self.bankrupts = set()
+        self.changed_commands = 0
+
+    # Every sound the users own, in the order User(user).commands() lists them
+    def sounds_of(self, users):
+        owned = {user: [] for user in users}
+        for name, permitted_users in self.permitted_users.items():
+            for user in permitted_users:
+                # Your theme song is yours, whatever happens
+                if user in owned and user != name:
+                    owned[user].append(name)
+        return [sound for user in users for sound in owned[user]]
+
+    def strip(self, users):
+        users = set(users)
+        for name, permitted_users in self.permitted_users.items():
+            if users.intersection(permitted_users):
+                self.permitted_users[name] = [
+                    user
+                    for user in permitted_users
+                    if user not in users or user == name
+                ]
+
+    def bankrupt(self, users):
+        self.bankrupts.update(users)
+
+    # Hands the bounty out to the power users in turn
+    def give(self, power_users, bounty):
+        if not power_users:
+            return
+        the_cycle_of_power_users = cycle(power_users)
+        for sfx in bounty:
+            user = next(the_cycle_of_power_users)
+            if sfx in self.permitted_users and user not in self.permitted_users[sfx]:
+                self.permitted_users[sfx].append(user)
+
+    def commit(self):
+        changed = {
+            command.doc_id: self.permitted_users[command["name"]]
+            for command in self.commands
+            if self.permitted_users[command["name"]]
+            != command.get("permitted_users", [])
+        }
+        self.changed_commands = len(changed)
+        bankrupt_ids = [
+            user.doc_id
+            for name in self.bankrupts
+            if (user := User.get_by("name", name))
+        ]
+
+        def set_permitted_users(doc):
+            doc["permitted_users"] = self.permitted_users[doc["name"]]
+
+        def go_bankrupt(doc):
+            doc["street_cred"] = 0
+            doc["cool_points"] = 0
+
+        with Command.unit_of_work():
+            if changed:
+                with Command.db().transaction() as tr:
+                    tr.update_callable(set_permitted_users, doc_ids=list(changed))
+            if bankrupt_ids:
+                with User.db().transaction() as tr:
+                    tr.update_callable(go_bankrupt, doc_ids=bankrupt_ids)
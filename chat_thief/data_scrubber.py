@@ -1,5 +1,3 @@
-from tinydb import Query
-
 from chat_thief.models.command import Command
 from chat_thief.models.user import User
 from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
@@ -9,7 +7,7 @@ class DataScrubber:
     @staticmethod
     def purge_duplicates():
         for cmd in Command.db().all():
-            results = Command.db().search(Query().name == cmd["name"])
+            results = Command.find_by("name", cmd["name"])
             if len(results) > 1:
                 unflatted_permitted_users = [
                     result["permitted_users"] for result in results
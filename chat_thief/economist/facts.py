@@ -1,15 +1,13 @@
 from pathlib import Path
 import traceback
-from collections import Counter
-from itertools import chain
 
 from tinydb import TinyDB, Query
 
-from chat_thief.models.user import User
 from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
 from chat_thief.models.vote import Vote
 from chat_thief.models.command import Command
 from chat_thief.models.breaking_news import BreakingNews
+from chat_thief.economist.leaderboard import leaderboard
 
 
 class Facts:
@@ -17,7 +15,7 @@ class Facts:
         return BreakingNews.last()
 
     def most_popular(self):
-        return Command.most_popular()
+        return leaderboard().most_popular
 
     def peace_count(self):
         vote = Vote("beginbot")
@@ -41,17 +39,10 @@ class Facts:
         return self.available_sounds() + self.unavailable_sounds()
 
     def cool_points(self):
-        return User.total_cool_points()
+        return leaderboard().total_cool_points
 
     def street_cred(self):
-        return User.total_street_cred()
+        return leaderboard().total_street_cred
 
     def top_users(self):
-        result = Command.db().all()
-
-        counter = Counter(
-            list(
-                chain.from_iterable([command["permitted_users"] for command in result])
-            )
-        )
-        return counter.most_common()[0:5]
+        return leaderboard().top_users
@@ -0,0 +1,92 @@
+from collections import Counter
+from itertools import chain
+import threading
+
+from chat_thief.models.command import Command
+from chat_thief.models.user import User
+
+# How many entries the top users and most popular lists hold
+TOP_COUNT = 5
+
+
+class Leaderboard:
+    """
+    Every economy-wide number the bots and the site show, from one pass.
+
+    Built off the users and commands columns, so it's a handful of sums over
+    flat lists instead of a sort (or a User() per user) for every stat.
+    """
+
+    def __init__(self, columns):
+        self._columns = columns
+        users, commands = columns
+        _, user_names = users["name"]
+        _, cool_points = users["cool_points"]
+        _, street_cred = users["street_cred"]
+        _, costs = commands["cost"]
+        _, permitted_users = commands["permitted_users"]
+
+        self.total_cool_points = sum(cool_points)
+        self.total_street_cred = sum(street_cred)
+        self.total_user_sfx_property = sum(
+            cost * len(permitted) for cost, permitted in zip(costs, permitted_users)
+        )
+
+        # Cool points plus what all your sounds cost, like User.top_wealth
+        sfx_wealth = Counter()
+        for cost, permitted in zip(costs, permitted_users):
+            for user in dict.fromkeys(permitted):
+                sfx_wealth[user] += cost
+        self.wealth = {
+            name: points + sfx_wealth[name]
+            for name, points in zip(user_names, cool_points)
+        }
+
+        # Ties go to the newest user, like sorting and taking the last
+        self.wealthiest = None
+        most_wealth = None
+        for name in user_names:
+            if most_wealth is None or self.wealth[name] >= most_wealth:
+                self.wealthiest, most_wealth = name, self.wealth[name]
+
+        self.top_users = Counter(chain.from_iterable(permitted_users)).most_common(
+            TOP_COUNT
+        )
+        self.richest_cool_points = User.max_of_field("cool_points")
+        self.richest_street_cred = User.max_of_field("street_cred")
+        self.most_expensive = Command.most_expensive()
+        self.most_popular = Command.most_popular()
+
+    @staticmethod
+    def columns():
+        users = {
+            field: User.db().column(field)
+            for field in ["name", "cool_points", "street_cred"]
+        }
+        commands = {
+            "cost": Command.db().column("cost", 1),
+            "permitted_users": Command.db().column("permitted_users", ()),
+        }
+        return users, commands
+
+    def built_from(self, columns):
+        return all(
+            column is self._columns[table][field]
+            for table, table_columns in enumerate(columns)
+            for field, column in table_columns.items()
+        )
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+# Shared by everything in the process, only rebuilt once users or commands change
+def leaderboard() -> Leaderboard:
+    global _leaderboard
+
+    with _leaderboard_lock:
+        columns = Leaderboard.columns()
+        if _leaderboard is None or not _leaderboard.built_from(columns):
+            _leaderboard = Leaderboard(columns)
+        return _leaderboard
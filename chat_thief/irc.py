@@ -1,20 +1,37 @@
 from typing import List, Dict
+import atexit
 import json
 import os
+import queue
+import select
 import socket
+import threading
+import time
 
 
-from chat_thief.config.log import logger
+from chat_thief.config.log import logger, error
 from chat_thief.config.twitch import TwitchConfig
+from chat_thief.irc_client import MESSAGE_LIMIT, RateLimiter, SharedRateLimiter
+from chat_thief.models.database import after_commit
 
 ENCODING = "utf-8"
 CHAT_MSG = "PRIVMSG"
 CONNECTION_DATA = ("irc.chat.twitch.tv", 6667)
 
+# Messages sent this close together go out as one chat line
+COALESCE_WINDOW_IN_SECS = 0.25
+COALESCE_SEPARATOR = " | "
+# How long to wait before each attempt at sending a line
+RETRY_DELAYS_IN_SECS = [0, 1, 2, 5, 10]
+# How often an idle connection checks for PINGs
+KEEPALIVE_INTERVAL_IN_SECS = 5
+CONNECT_TIMEOUT_IN_SECS = 10
+FLUSH_TIMEOUT_IN_SECS = 10
+
 config = TwitchConfig()
 
 
-def _irc_handshake(server: socket.socket) -> None:
+def _irc_handshake(server: socket.socket, config: TwitchConfig = config) -> None:
     logger.debug(
         json.dumps({"message": f"Connecting to #{config.channel} as {config.bot}"})
     )
@@ -23,14 +40,161 @@ def _irc_handshake(server: socket.socket) -> None:
     server.sendall(bytes("JOIN " + f"#{config.channel}" + "\r\n", ENCODING))
 
 
-def send_twitch_msg(msg):
-    with socket.socket() as server:
-        server.connect(CONNECTION_DATA)
-        _irc_handshake(server)
-        if msg:
-            if "BLOCK_TWITCH_MSGS" in os.environ:
-                print(msg)
+def coalesce(msgs: List[str], limit: int = MESSAGE_LIMIT) -> List[str]:
+    lines = []
+    for msg in msgs:
+        msg = f"{msg}".replace("\r", " ").replace("\n", " ")
+        for start in range(0, len(msg), limit):
+            chunk = msg[start : start + limit]
+            if lines and len(lines[-1] + COALESCE_SEPARATOR + chunk) <= limit:
+                lines[-1] += COALESCE_SEPARATOR + chunk
             else:
-                server.sendall(
-                    bytes(f"{CHAT_MSG} #{config.channel} :{msg}\n", ENCODING)
+                lines.append(chunk)
+    return lines
+
+
+class TwitchSender:
+    """
+    One long-lived connection to Twitch chat for everything in a process.
+
+    send() just queues the message, a background thread connects on first
+    use, coalesces whatever arrives within a short window into as few
+    lines as it can, keeps us inside Twitch's message budget, answers
+    PINGs, and reconnects when the connection drops.
+    """
+
+    def __init__(
+        self,
+        connection_data=CONNECTION_DATA,
+        config: TwitchConfig = config,
+        rate_limiter: RateLimiter = None,
+    ):
+        self.connection_data = connection_data
+        self.config = config
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._queue = queue.Queue()
+        self._server = None
+        self._buffer = b""
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def send(self, msg) -> None:
+        if not msg:
+            return
+        self._queue.put(msg)
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="twitch-sender", daemon=True
+                )
+                self._thread.start()
+
+    # Wait for everything queued so far to go out, before the process exits
+    def flush(self, timeout=FLUSH_TIMEOUT_IN_SECS) -> bool:
+        # Queue.join() can't time out, so it waits in a thread we can give up on
+        joined = threading.Thread(target=self._queue.join, daemon=True)
+        joined.start()
+        joined.join(timeout)
+        return not joined.is_alive()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                msg = self._queue.get(timeout=KEEPALIVE_INTERVAL_IN_SECS)
+            except queue.Empty:
+                self._keep_alive()
+                continue
+
+            msgs = [msg] + self._coalesce_window()
+            for line in coalesce(msgs):
+                self._send_line(line)
+            for _ in msgs:
+                self._queue.task_done()
+
+    def _coalesce_window(self) -> List[str]:
+        msgs = []
+        deadline = time.monotonic() + COALESCE_WINDOW_IN_SECS
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                msgs.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return msgs
+
+    def _send_line(self, line: str) -> None:
+        for delay in RETRY_DELAYS_IN_SECS:
+            time.sleep(delay)
+            try:
+                # Notice a dropped connection before writing into it
+                self._keep_alive()
+                self._connect()
+                while (wait := self.rate_limiter.take()) > 0:
+                    time.sleep(wait)
+                self._server.sendall(
+                    bytes(f"{CHAT_MSG} #{self.config.channel} :{line}\r\n", ENCODING)
                 )
+                return
+            except OSError as e:
+                error(f"Error Sending to Twitch, Reconnecting: {e}")
+                self._disconnect()
+
+        error(f"Gave up sending to Twitch: {line}")
+
+    def _connect(self) -> None:
+        if self._server:
+            return
+        self._server = socket.create_connection(
+            self.connection_data, timeout=CONNECT_TIMEOUT_IN_SECS
+        )
+        self._buffer = b""
+        _irc_handshake(self._server, self.config)
+
+    def _disconnect(self) -> None:
+        if self._server:
+            self._server.close()
+        self._server = None
+
+    def _keep_alive(self) -> None:
+        try:
+            self._answer_pings()
+        except OSError as e:
+            error(f"Lost Connection to Twitch: {e}")
+            self._disconnect()
+
+    def _answer_pings(self) -> None:
+        if not self._server:
+            return
+
+        while select.select([self._server], [], [], 0)[0]:
+            data = self._server.recv(4096)
+            if not data:
+                raise ConnectionError("Twitch closed the connection")
+
+            *lines, self._buffer = (self._buffer + data).split(b"\r\n")
+            for line in lines:
+                if line.startswith(b"PING"):
+                    self._server.sendall(b"PONG" + line[4:] + b"\r\n")
+
+
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def twitch_sender() -> TwitchSender:
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            # Sharing the budget with the chat bot's replies
+            _sender = TwitchSender(rate_limiter=SharedRateLimiter())
+            atexit.register(_sender.flush)
+        return _sender
+
+
+def send_twitch_msg(msg):
+    if msg:
+        if "BLOCK_TWITCH_MSGS" in os.environ:
+            print(msg)
+        else:
+            # Nothing gets announced that's then rolled back
+            after_commit(lambda: twitch_sender().send(msg))
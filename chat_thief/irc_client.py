@@ -0,0 +1,267 @@
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+import asyncio
+import fcntl
+import json
+import time
+
+from chat_thief.config.log import error, logger
+
+ENCODING = "utf-8"
+CHAT_MSG = "PRIVMSG"
+CRLF = b"\r\n"
+
+# Twitch drops anything longer
+MESSAGE_LIMIT = 500
+# Twitch's budget for a bot that isn't a mod: 20 PRIVMSGs per 30 seconds
+MESSAGES_PER_WINDOW = 20
+WINDOW_IN_SECS = 30
+# Every process sending as the bot shares the budget through this file
+SHARED_SENDS_PATH = Path(__file__).parent.parent.joinpath("tmp/twitch_sends")
+# Twitch lines carry a lot of tags, give them some room
+READ_LIMIT = 64 * 1024
+
+TAG_ESCAPES = {":": ";", "s": " ", "\\": "\\", "r": "\r", "n": "\n"}
+
+
+def _unescape_tag_value(value: str) -> str:
+    unescaped = []
+    chars = iter(value)
+    for char in chars:
+        if char == "\\":
+            # A trailing lone backslash is dropped
+            escaped = next(chars, "")
+            unescaped.append(TAG_ESCAPES.get(escaped, escaped))
+        else:
+            unescaped.append(char)
+    return "".join(unescaped)
+
+
+@dataclass
+class IrcLine:
+    command: str
+    params: List[str] = field(default_factory=list)
+    prefix: Optional[str] = None
+    tags: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def user(self) -> Optional[str]:
+        if self.prefix:
+            return self.prefix.split("!")[0]
+
+    @property
+    def trailing(self) -> str:
+        return self.params[-1] if self.params else ""
+
+    # The whitespace split list CommandRouter and IrcMsg have always taken
+    def to_irc_msg(self) -> List[str]:
+        *middle, trailing = self.params or [""]
+        return [f":{self.prefix}", self.command, *middle, *f":{trailing}".split()]
+
+
+# Raises ValueError for a line without a command
+def parse_irc_line(line: str) -> IrcLine:
+    tags = {}
+    if line.startswith("@"):
+        raw_tags, _, line = line[1:].partition(" ")
+        for tag in raw_tags.split(";"):
+            key, _, value = tag.partition("=")
+            tags[key] = _unescape_tag_value(value)
+        line = line.lstrip(" ")
+
+    prefix = None
+    if line.startswith(":"):
+        prefix, _, line = line[1:].partition(" ")
+        line = line.lstrip(" ")
+
+    line, has_trailing, trailing = line.partition(" :")
+    if not line.split():
+        raise ValueError("No command in IRC line")
+    command, *params = line.split()
+    if has_trailing:
+        params.append(trailing)
+
+    return IrcLine(command=command.upper(), params=params, prefix=prefix, tags=tags)
+
+
+class RateLimiter:
+    """Sliding window: at most `limit` sends in any `window` seconds"""
+
+    def __init__(
+        self, limit=MESSAGES_PER_WINDOW, window=WINDOW_IN_SECS, clock=time.monotonic
+    ):
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+        self._sent_at = deque()
+
+    def delay(self) -> float:
+        now = self._clock()
+        while self._sent_at and now - self._sent_at[0] >= self.window:
+            self._sent_at.popleft()
+        if len(self._sent_at) < self.limit:
+            return 0
+        return self.window - (now - self._sent_at[0])
+
+    def record(self) -> None:
+        self._sent_at.append(self._clock())
+
+    def take(self) -> float:
+        """Counts a send and returns 0 if there's room, otherwise how long to wait"""
+        wait = self.delay()
+        if wait <= 0:
+            self.record()
+        return wait
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    A RateLimiter with its window kept in a file, so the chat bot and the
+    background bots, all sending as the same account, stay inside Twitch's
+    one budget between them. The file is flocked while the window is read
+    and updated, like the databases' write locks.
+    """
+
+    def __init__(
+        self,
+        path=SHARED_SENDS_PATH,
+        limit=MESSAGES_PER_WINDOW,
+        window=WINDOW_IN_SECS,
+        clock=time.time,
+    ):
+        super().__init__(limit, window, clock)
+        self.path = Path(path)
+
+    @contextmanager
+    def _shared_window(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+") as sends:
+            fcntl.flock(sends, fcntl.LOCK_EX)
+            sends.seek(0)
+            self._sent_at = deque(float(line) for line in sends.read().split())
+            yield
+            sends.seek(0)
+            sends.truncate()
+            sends.write("".join(f"{sent_at}\n" for sent_at in self._sent_at))
+
+    def delay(self) -> float:
+        with self._shared_window():
+            return super().delay()
+
+    def record(self) -> None:
+        with self._shared_window():
+            super().record()
+
+    # Checking and counting under the one lock, or two processes could
+    # both see the last free spot
+    def take(self) -> float:
+        with self._shared_window():
+            wait = RateLimiter.delay(self)
+            if wait <= 0:
+                RateLimiter.record(self)
+            return wait
+
+
+class IrcClient:
+    """
+    Twitch chat over one asyncio connection.
+
+    Incoming lines are framed on CRLF and parsed with their IRCv3 tags.
+    Chat messages go through an outbound queue drained by run_sender(),
+    which keeps us inside Twitch's message budget. PONGs skip the queue.
+    """
+
+    def __init__(
+        self, host, port, token, bot, channel, rate_limiter: RateLimiter = None
+    ):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.bot = bot
+        self.channel = channel
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.outbound = asyncio.Queue()
+        self._reader = None
+        self._writer = None
+
+    async def connect(self) -> None:
+        logger.debug(
+            json.dumps({"message": f"Connecting to #{self.channel} as {self.bot}"})
+        )
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port, limit=READ_LIMIT
+        )
+        await self.send_raw(
+            "CAP REQ :twitch.tv/tags twitch.tv/commands twitch.tv/membership"
+        )
+        await self.send_raw(f"PASS {self.token}")
+        await self.send_raw(f"NICK {self.bot}")
+        await self.send_raw(f"JOIN #{self.channel}")
+
+    async def lines(self):
+        while True:
+            try:
+                raw_line = await self._reader.readuntil(CRLF)
+            except asyncio.IncompleteReadError:
+                raise ConnectionError("Twitch closed the connection")
+            except asyncio.LimitOverrunError as e:
+                await self._skip_line(e.consumed)
+                continue
+
+            line = raw_line[: -len(CRLF)].decode(ENCODING, errors="replace")
+            if not line:
+                continue
+            try:
+                parsed = parse_irc_line(line)
+            except ValueError as e:
+                # One garbled line isn't worth dropping the connection over
+                error(f"Skipping IRC line {line[:100]!r}: {e}")
+                continue
+            yield parsed
+
+    # Throws away the rest of a line too long to read, up to and including
+    # its CRLF, so none of it gets parsed as a line of its own
+    async def _skip_line(self, consumed: int) -> None:
+        while True:
+            try:
+                await self._reader.readexactly(consumed)
+                await self._reader.readuntil(CRLF)
+                return
+            except asyncio.IncompleteReadError:
+                raise ConnectionError("Twitch closed the connection")
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+
+    async def send_raw(self, line: str) -> None:
+        self._writer.write(bytes(f"{line}\r\n", ENCODING))
+        await self._writer.drain()
+
+    async def pong(self, ping: IrcLine) -> None:
+        await self.send_raw(f"PONG :{ping.trailing}" if ping.params else "PONG")
+
+    def send_msg(self, msg) -> None:
+        if not msg:
+            return
+        msg = f"{msg}".replace("\r", " ").replace("\n", " ")
+        for start in range(0, len(msg), MESSAGE_LIMIT):
+            self.outbound.put_nowait(msg[start : start + MESSAGE_LIMIT])
+
+    async def run_sender(self) -> None:
+        while True:
+            msg = await self.outbound.get()
+            while (delay := self.rate_limiter.take()) > 0:
+                await asyncio.sleep(delay)
+            await self.send_raw(f"{CHAT_MSG} #{self.channel} :{msg}")
+
+    async def close(self) -> None:
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self._writer = None
+        self._reader = None
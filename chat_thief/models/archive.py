@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+
+# How often the compactor looks for docs old enough to archive
+COMPACT_EVERY_IN_SECS = 60 * 60
+
+
+def parse_time(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def days_between(start, end):
+    day = start.date()
+    while day <= end.date():
+        yield str(day)
+        day += timedelta(days=1)
+
+
+class Archive:
+    """
+    Old docs of an append-only model, one gzipped file per day.
+
+    Each partition is stored by column ({"count": 2, "columns": {"user":
+    [...], "command": [...]}}), so a range query only opens the days it
+    covers, and filters a day on the filtered columns before it builds
+    any docs.
+    """
+
+    def __init__(self, folder, timestamp_field):
+        self.folder = Path(folder)
+        self.timestamp_field = timestamp_field
+        self._lock = threading.Lock()
+
+    def _partition_path(self, day):
+        return self.folder.joinpath(f"{day}.json.gz")
+
+    def days(self):
+        return sorted(
+            path.name[: -len(".json.gz")] for path in self.folder.glob("*.json.gz")
+        )
+
+    def _read_partition(self, day):
+        try:
+            with gzip.open(self._partition_path(day), "rt") as partition:
+                return json.load(partition)
+        except FileNotFoundError:
+            return {"count": 0, "columns": {}}
+
+    @staticmethod
+    def _rows(partition, positions=None):
+        columns = partition["columns"]
+        if positions is None:
+            positions = range(partition["count"])
+        return [
+            {field: values[position] for field, values in columns.items()}
+            for position in positions
+        ]
+
+    def add(self, docs):
+        """Files the docs into the partition for the day they were created"""
+        by_day = {}
+        for doc in docs:
+            day = str(parse_time(doc[self.timestamp_field]).date())
+            by_day.setdefault(day, []).append(doc)
+
+        with self._lock:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            for day, day_docs in sorted(by_day.items()):
+                rows = self._rows(self._read_partition(day)) + day_docs
+                fields = list(dict.fromkeys(field for row in rows for field in row))
+                partition = {
+                    "count": len(rows),
+                    "columns": {
+                        field: [row.get(field) for row in rows] for field in fields
+                    },
+                }
+
+                partition_path = self._partition_path(day)
+                tmp_path = partition_path.with_suffix(".tmp")
+                with gzip.open(tmp_path, "wt") as tmp:
+                    json.dump(partition, tmp)
+                os.replace(tmp_path, partition_path)
+
+    def column(self, field):
+        return [
+            value
+            for day in self.days()
+            for value in self._read_partition(day)["columns"].get(field, [])
+        ]
+
+    def all(self):
+        return [
+            doc for day in self.days() for doc in self._rows(self._read_partition(day))
+        ]
+
+    def between(self, start, end, **filters):
+        start, end = parse_time(start), parse_time(end)
+        archived_days = set(self.days())
+
+        docs = []
+        for day in days_between(start, end):
+            if day not in archived_days:
+                continue
+            partition = self._read_partition(day)
+            columns = partition["columns"]
+            # Only the first and last days can hold docs outside the range
+            whole_day = str(start.date()) < day < str(end.date())
+            filter_columns = [
+                (columns.get(field) or [None] * partition["count"], value)
+                for field, value in filters.items()
+            ]
+            positions = [
+                position
+                for position, created_at in enumerate(columns[self.timestamp_field])
+                if all(column[position] == value for column, value in filter_columns)
+                and (whole_day or start <= parse_time(created_at) <= end)
+            ]
+            docs.extend(self._rows(partition, positions))
+        return docs
+
+
+def in_range(docs, timestamp_field, start, end, **filters):
+    start, end = parse_time(start), parse_time(end)
+    return [
+        doc
+        for doc in docs
+        if start <= parse_time(doc[timestamp_field]) <= end
+        and all(doc.get(field) == value for field, value in filters.items())
+    ]
+
+
+def archived_models():
+    from chat_thief.models.breaking_news import BreakingNews
+    from chat_thief.models.rap_sheet import RapSheet
+    from chat_thief.models.user_event import UserEvent
+
+    return [BreakingNews, RapSheet, UserEvent]
+
+
+def compact_archives(now=None):
+    for model in archived_models():
+        archived = model.compact(now)
+        print(f"Archived {archived} {model.table_name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old events by day")
+    parser.add_argument(
+        "--loop", action="store_true", help="Keep compacting every hour"
+    )
+    args = parser.parse_args()
+
+    compact_archives()
+    while args.loop:
+        time.sleep(COMPACT_EVERY_IN_SECS)
+        compact_archives()
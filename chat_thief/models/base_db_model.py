@@ -1,14 +1,74 @@
+from datetime import datetime, timedelta
 import abc
 import itertools
 import operator
 
 from tinydb import Query
 
-from chat_thief.models.database import db_table
+from chat_thief.models.archive import Archive, in_range, parse_time
+from chat_thief.models import change_bus
+from chat_thief.models.database import (
+    PROJECT_ROOT,
+    after_commit,
+    db_table,
+    unit_of_work,
+)
 
 
 class BaseDbModel(abc.ABC):
     database_folder = ""
+    # Fields with a hash index for find_by / get_by point lookups
+    indexed_fields = ()
+    # Append-only models with a timestamp get docs older than
+    # archive_after_days moved into db/archive/<table>/ by compact()
+    timestamp_field = None
+    archive_after_days = 1
+    # "json" or "sqlite", None goes with CHAT_THIEF_STORAGE (json by default)
+    storage_backend = None
+
+    # Every model write in the block lands as one write per table when it
+    # ends, or not at all if it raises
+    @staticmethod
+    def unit_of_work():
+        return unit_of_work()
+
+    # Shell commands, sounds and chat messages wait for the writes to land
+    @staticmethod
+    def after_commit(side_effect):
+        return after_commit(side_effect)
+
+    @classmethod
+    def archive(cls):
+        archive_path = PROJECT_ROOT.joinpath(
+            cls.database_folder + "db/archive", cls.table_name
+        )
+        return Archive(archive_path, cls.timestamp_field)
+
+    @classmethod
+    def compact(cls, now=None):
+        if not cls.timestamp_field:
+            return 0
+
+        older_than = (now or datetime.now()) - timedelta(days=cls.archive_after_days)
+        old_docs = [
+            doc
+            for doc in cls.db().all()
+            # Docs from before the model had a timestamp stay where they are
+            if doc.get(cls.timestamp_field)
+            and parse_time(doc[cls.timestamp_field]) < older_than
+        ]
+        if old_docs:
+            cls.archive().add([dict(doc) for doc in old_docs])
+            cls.delete([doc.doc_id for doc in old_docs])
+        return len(old_docs)
+
+    @classmethod
+    def between(cls, start, end, **filters):
+        """Docs created from start to end (inclusive), archived or not"""
+        live_docs = [doc for doc in cls.db().all() if doc.get(cls.timestamp_field)]
+        return cls.archive().between(start, end, **filters) + in_range(
+            live_docs, cls.timestamp_field, start, end, **filters
+        )
 
     @classmethod
     def count_by_group(cls, category):
@@ -46,7 +106,40 @@ class BaseDbModel(abc.ABC):
 
     @classmethod
     def db(cls):
-        return db_table(cls.database_folder + cls.database_path, cls.table_name)
+        return db_table(
+            cls.database_folder + cls.database_path,
+            cls.table_name,
+            backend=cls.storage_backend,
+        )
+
+    # "users" for any change, "users.cool_points" for one field, or
+    # change_bus.INSERTED / REMOVED for docs coming and going
+    @classmethod
+    def topic(cls, field=None):
+        return change_bus.topic(cls.table_name, field)
+
+    @classmethod
+    def subscribe(cls, *topics):
+        """
+        Waits for writes from any process to change the topics (the whole
+        table by default), instead of polling. Topics can be from any model
+        in the same db folder.
+        """
+        db_path = PROJECT_ROOT.joinpath(cls.database_folder + cls.database_path)
+        bus = change_bus.change_bus(db_path.resolve().parent)
+        return bus.subscribe(topics or [cls.topic()])
+
+    @classmethod
+    def find_by(cls, field, value):
+        if field in cls.indexed_fields:
+            return cls.db().find_by(field, value)
+        return cls.db().search(Query()[field] == value)
+
+    @classmethod
+    def get_by(cls, field, value):
+        if field in cls.indexed_fields:
+            return cls.db().get_by(field, value)
+        return cls.db().get(Query()[field] == value)
 
     @classmethod
     def purge(cls):
@@ -60,9 +153,7 @@ class BaseDbModel(abc.ABC):
 
             return transform
 
-        from tinyrecord import transaction
-
-        with transaction(cls.db()) as tr:
+        with cls.db().transaction() as tr:
             tr.update_callable(_update_that_value(), doc_ids=[doc_id])
 
     @abc.abstractmethod
@@ -78,25 +169,24 @@ class BaseDbModel(abc.ABC):
 
             return transform
 
-        from tinyrecord import transaction
-
-        with transaction(self.db()) as tr:
+        with self.db().transaction() as tr:
             tr.update_callable(_update_that_value(), Query().name == self.name)
 
     def save(self):
-        from tinyrecord import transaction
-
-        with transaction(self.db()) as tr:
+        with self.db().transaction() as tr:
             tr.insert(self.doc())
         return self
 
     def update(self, update_func):
-        from tinyrecord import transaction
-
-        with transaction(self.db()) as tr:
+        with self.db().transaction() as tr:
             return tr.update_callable(update_func(), Query().name == self.name)
         return self
 
+    # Like update(), but only for a doc still passing check once no other
+    # process can write, so True means transform ran
+    def update_if(self, check, transform):
+        return bool(self.db().update_if(check, transform, Query().name == self.name))
+
     def update_value(self, field, amount=1):
         return self._update_value(field, amount=1)
 
@@ -110,7 +200,5 @@ class BaseDbModel(abc.ABC):
 
             return transform
 
-        from tinyrecord import transaction
-
-        with transaction(self.db()) as tr:
+        with self.db().transaction() as tr:
             tr.update_callable(_update_that_value(), Query().name == self.name)
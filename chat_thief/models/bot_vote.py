@@ -6,6 +6,7 @@ from chat_thief.models.base_db_model import BaseDbModel
 class BotVote(BaseDbModel):
     database_path = "db/bot_votes.json"
     table_name = "bot_votes"
+    indexed_fields = ("user",)
 
     def __init__(self, user, bot):
         self._user = user
@@ -24,7 +25,7 @@ class BotVote(BaseDbModel):
         return {"user": self._user, "bot": self._bot}
 
     def create_or_update(self):
-        old_vote = self.db().get(Query().user == self._user)
+        old_vote = self.get_by("user", self._user)
         if old_vote:
             result = self.db().update({"bot": self._bot}, doc_ids=[old_vote.doc_id])
             return result, "update"
@@ -9,6 +9,7 @@ from tinydb import Query
 class BreakingNews(BaseDbModel):
     table_name = "breaking_news"
     database_path = "db/breaking_news.json"
+    timestamp_field = "timestamp"
 
     def __init__(
         self,
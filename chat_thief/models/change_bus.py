@@ -0,0 +1,273 @@
+from pathlib import Path
+import asyncio
+import fcntl
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+
+# How long a subscriber waits without being woken up before checking anyway
+POLL_INTERVAL_IN_SECS = 5
+# Without a wakeup socket we fall back to checking the versions this often
+FALLBACK_POLL_INTERVAL_IN_SECS = 0.1
+
+# Topics for docs being added to, or removed from, a table
+INSERTED = ":inserted"
+REMOVED = ":removed"
+
+
+def topic(table, field=None):
+    """
+    "commands" for any change to the table, "commands.cost" when a doc's
+    cost changes (or a doc with a cost is inserted), and "commands:inserted"
+    or "commands:removed" as docs come and go.
+    """
+    if field is None:
+        return table
+    if field in (INSERTED, REMOVED):
+        return f"{table}{field}"
+    return f"{table}.{field}"
+
+
+class ChangeBus:
+    """
+    Tells bots in other processes when tables in a db folder change, so
+    they can block until something they care about happens instead of
+    polling the database.
+
+    Every topic has a version in <db folder>/changes/versions.json, bumped
+    under a flock each time a write changing it lands. Subscribers bind a
+    unix datagram socket in changes/subscribers/, and every publish pokes
+    all of them; each one then checks the versions of just its own topics.
+    A poke can get lost (a full socket buffer, say), the versions can't, so
+    subscribers also check every POLL_INTERVAL_IN_SECS regardless.
+    """
+
+    def __init__(self, db_folder):
+        self.folder = Path(db_folder).joinpath("changes")
+        self.versions_path = self.folder.joinpath("versions.json")
+        self.subscribers_path = self.folder.joinpath("subscribers")
+        self._lock = threading.Lock()
+        self._sender = None
+        # Socket paths, and the subscribers folder's mtime when we listed them
+        self._subscribers = []
+        self._subscribers_mtime = None
+
+    def _open_versions(self):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        return os.open(self.versions_path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    @staticmethod
+    def _read_versions(versions_file):
+        contents = os.pread(versions_file, os.fstat(versions_file).st_size, 0)
+        try:
+            return json.loads(contents) if contents else {}
+        except ValueError:
+            return {}
+
+    def publish(self, topics):
+        if not topics:
+            return
+
+        versions_file = self._open_versions()
+        try:
+            fcntl.flock(versions_file, fcntl.LOCK_EX)
+            versions = self._read_versions(versions_file)
+            for changed in topics:
+                versions[changed] = versions.get(changed, 0) + 1
+            contents = bytes(json.dumps(versions), "utf-8")
+            os.pwrite(versions_file, contents, 0)
+            os.ftruncate(versions_file, len(contents))
+        finally:
+            os.close(versions_file)
+
+        self._wake_subscribers()
+
+    def versions(self, topics=None):
+        try:
+            versions_file = os.open(self.versions_path, os.O_RDONLY)
+        except FileNotFoundError:
+            versions = {}
+        else:
+            try:
+                fcntl.flock(versions_file, fcntl.LOCK_SH)
+                versions = self._read_versions(versions_file)
+            finally:
+                os.close(versions_file)
+
+        if topics is None:
+            return versions
+        return {wanted: versions.get(wanted, 0) for wanted in topics}
+
+    def subscribe(self, topics) -> "ChangeSubscription":
+        return ChangeSubscription(self, topics)
+
+    def _wake_subscribers(self):
+        with self._lock:
+            try:
+                mtime = self.subscribers_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                return
+            # Only list them again once somebody's come or gone
+            if mtime != self._subscribers_mtime:
+                self._subscribers = [
+                    str(path) for path in self.subscribers_path.iterdir()
+                ]
+                self._subscribers_mtime = mtime
+
+            if self._sender is None:
+                self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._sender.setblocking(False)
+
+            for subscriber in self._subscribers:
+                try:
+                    self._sender.sendto(b"\n", subscriber)
+                except ConnectionRefusedError:
+                    # Left behind by a bot that died without closing it
+                    try:
+                        os.unlink(subscriber)
+                    except FileNotFoundError:
+                        pass
+                except OSError:
+                    # Gone already, or it has plenty of wakeups waiting
+                    pass
+
+
+class ChangeSubscription:
+    """
+    Waits on some of a ChangeBus's topics. Which topics changed is worked
+    out from their versions, so several writes landing while we're busy
+    just show up as one change.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, bus: ChangeBus, topics):
+        self.bus = bus
+        self.topics = list(topics)
+        # Listening before we look, so a write in between still wakes us
+        self._wakeup_path = None
+        self._wakeup = self._listen()
+        self._seen = bus.versions(self.topics)
+
+    def changed(self):
+        """The topics that changed since we last asked, without waiting"""
+        versions = self.bus.versions(self.topics)
+        changed = {
+            changed_topic
+            for changed_topic, version in versions.items()
+            # Not just bigger, the versions start over if the file's deleted
+            if version != self._seen[changed_topic]
+        }
+        self._seen = versions
+        return changed
+
+    def wait(self, timeout=None):
+        """
+        Blocks until at least one of our topics changes, returning which
+        ones did, or an empty set once timeout seconds go by.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            if changed := self.changed():
+                return changed
+            if (wait := self._time_left(deadline)) <= 0:
+                return set()
+            self._wait(wait)
+
+    async def wait_async(self, timeout=None):
+        """wait() for asyncio, the event loop keeps running while it waits"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            if changed := self.changed():
+                return changed
+            if (wait := self._time_left(deadline)) <= 0:
+                return set()
+            await self._wait_async(wait)
+
+    @staticmethod
+    def _time_left(deadline):
+        if deadline is None:
+            return POLL_INTERVAL_IN_SECS
+        return min(POLL_INTERVAL_IN_SECS, deadline - time.monotonic())
+
+    def close(self):
+        if self._wakeup:
+            self._wakeup.close()
+            self._wakeup = None
+            try:
+                os.unlink(self._wakeup_path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _listen(self):
+        subscribers_path = self.bus.subscribers_path
+        wakeup_path = subscribers_path.joinpath(f"{os.getpid()}-{next(self._ids)}")
+        try:
+            subscribers_path.mkdir(parents=True, exist_ok=True)
+            if wakeup_path.exists():
+                wakeup_path.unlink()
+            wakeup = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            wakeup.bind(str(wakeup_path))
+        except OSError:
+            # Path too long for a socket, or no unix sockets here
+            return None
+        self._wakeup_path = wakeup_path
+        return wakeup
+
+    def _wait(self, timeout):
+        if not self._wakeup:
+            time.sleep(min(timeout, FALLBACK_POLL_INTERVAL_IN_SECS))
+            return
+
+        self._wakeup.settimeout(timeout)
+        try:
+            self._wakeup.recv(64)
+        except socket.timeout:
+            return
+        self._drain()
+
+    async def _wait_async(self, timeout):
+        if not self._wakeup:
+            await asyncio.sleep(min(timeout, FALLBACK_POLL_INTERVAL_IN_SECS))
+            return
+
+        self._wakeup.setblocking(False)
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(loop.sock_recv(self._wakeup, 64), timeout)
+        except asyncio.TimeoutError:
+            return
+        self._drain()
+
+    # Several writes can land before we get around to reading
+    def _drain(self):
+        self._wakeup.setblocking(False)
+        try:
+            while self._wakeup.recv(64):
+                pass
+        except BlockingIOError:
+            pass
+
+
+# One bus per db folder, shared by every storage and model in the process
+_BUSES = {}
+_BUSES_LOCK = threading.Lock()
+
+
+def change_bus(db_folder) -> ChangeBus:
+    db_folder = str(Path(db_folder).resolve())
+    with _BUSES_LOCK:
+        if db_folder not in _BUSES:
+            _BUSES[db_folder] = ChangeBus(db_folder)
+        return _BUSES[db_folder]
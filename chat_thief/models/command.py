@@ -16,24 +16,23 @@ from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
 class Command(BaseDbModel):
     table_name = "commands"
     database_path = "db/commands.json"
+    indexed_fields = ("name", "permitted_users")
 
     def __init__(self, name, inital_cost=1):
         self.name = name
         self.permitted_users = []
         self.inital_health = 3
         self.inital_cost = inital_cost
-        self.is_theme_song = self.name in SoundeffectsLibrary.fetch_theme_songs()
+        self.is_theme_song = SoundeffectsLibrary.is_theme_song(self.name)
 
     def _fetch_field(self, field, default):
         return self.command().get(field, default)
 
     def command(self):
-        if command_result := self.db().search(Query().name == self.name):
-            return command_result[0]
+        if command_result := self.get_by("name", self.name):
+            return command_result
         else:
-            from tinyrecord import transaction
-
-            with transaction(self.db()) as tr:
+            with self.db().transaction() as tr:
                 tr.insert(self.doc())
             return self.doc()
 
@@ -57,19 +56,17 @@ class Command(BaseDbModel):
 
     @classmethod
     def most_expensive(cls):
-        cmds = cls.db().all()
-        if cmds:
-            return sorted(cmds, key=lambda cmd: cmd["cost"])[-1]
+        if cmds := cls.db().top("cost", 1):
+            return cmds[0]
 
     @classmethod
     def by_cost(cls):
-        cmds = cls.db().all()
-        if cmds:
-            return reversed(sorted(cmds, key=lambda cmd: cmd["cost"]))
+        if cmds := cls.db().top("cost"):
+            return cmds
 
     @classmethod
     def find_or_create(cls, name):
-        found_command = cls.db().get(Query().name == name)
+        found_command = cls.get_by("name", name)
 
         if found_command:
             return found_command
@@ -78,23 +75,12 @@ class Command(BaseDbModel):
 
     @classmethod
     def for_user(cls, user):
-        def in_permitted_users(permitted_users, current_user):
-            return current_user in permitted_users
-
-        return [
-            permission
-            for permission in cls.db().search(
-                Query().permitted_users.test(in_permitted_users, user)
-            )
-        ]
+        return cls.find_by("permitted_users", user)
 
     @classmethod
     def most_popular(cls):
-        result = cls.db().all()
-        sorted_commands = sorted(result, key=lambda command: command["cost"])
-        return [
-            f"{command['name']}: {command['cost']}" for command in sorted_commands[-5:]
-        ]
+        sorted_commands = reversed(cls.db().top("cost", 5))
+        return [f"{command['name']}: {command['cost']}" for command in sorted_commands]
 
     def exists(self):
         return cls.db().get(Query().name == name) is not None
@@ -106,7 +92,7 @@ class Command(BaseDbModel):
         if user in STREAM_GODS:
             return True
 
-        if command := self.db().get(Query().name == self.name):
+        if command := self.get_by("name", self.name):
             return user in command["permitted_users"]
 
         return False
@@ -121,12 +107,12 @@ class Command(BaseDbModel):
         return self.set_value("health", 0)
 
     def increase_cost(self, amount=1):
-        if command := self.db().get(Query().name == self.name):
+        if command := self.get_by("name", self.name):
             self._update_value("cost", amount)
 
     def unallow_user(self, target_user):
         try:
-            command = self.db().get(Query().name == self.name)
+            command = self.get_by("name", self.name)
             if command:
                 self._remove_user(target_user)
                 return f"@{target_user} lost access to !{self.name}"
@@ -137,7 +123,7 @@ class Command(BaseDbModel):
                 traceback.print_exc()
 
     def allow_user(self, target_user):
-        command = self.db().get(Query().name == self.name)
+        command = self.get_by("name", self.name)
 
         # What if we are none
         if command:
@@ -151,6 +137,19 @@ class Command(BaseDbModel):
             self.save()
             return f"@{target_user} is the 1st person with access to: !{self.name}"
 
+    def transfer_permission_if_owner(self, owner, new_owner):
+        """Moves owner's access over to new_owner, True if owner still had it"""
+
+        def owns_it(doc):
+            return owner in doc.get("permitted_users", [])
+
+        def transfer(doc):
+            doc["permitted_users"].remove(owner)
+            if new_owner not in doc["permitted_users"]:
+                doc["permitted_users"].append(new_owner)
+
+        return self.update_if(owns_it, transfer)
+
     def _add_user(self, target_user):
         def add_permitted_users():
             def transform(doc):
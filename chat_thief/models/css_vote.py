@@ -1,14 +1,13 @@
 import itertools
 import operator
 
-from tinydb import Query
-
 from chat_thief.models.base_db_model import BaseDbModel
 
 
 class CSSVote(BaseDbModel):
     table_name = "css_votes"
     database_path = "db/css_votes.json"
+    indexed_fields = ("voter",)
 
     def __init__(self, voter, candidate, page="homepage"):
         self.voter = voter
@@ -23,7 +22,7 @@ class CSSVote(BaseDbModel):
         }
 
     def create_or_update(self):
-        if old_vote := self.db().get(Query().voter == self.voter):
+        if old_vote := self.get_by("voter", self.voter):
             result = self.db().update(self.doc(), doc_ids=[old_vote.doc_id])
             return result, "update"
         else:
@@ -10,6 +10,7 @@ from tinydb import Query
 class CubeBet(BaseDbModel):
     table_name = "cube_bets"
     database_path = "db/cube_bets.json"
+    indexed_fields = ("user",)
 
     @classmethod
     def all_bets(cls):
@@ -22,15 +23,13 @@ class CubeBet(BaseDbModel):
         self._wager = wager
 
     def save(self):
-        bet = self.db().get(Query().user == self.user)
+        bet = self.get_by("user", self.user)
 
         if bet:
             self.set_value("duration", self._duration)
         else:
             success(f"Creating New Cube Bet: {self.doc()}")
-            from tinyrecord import transaction
-
-            with transaction(self.db()) as tr:
+            with self.db().transaction() as tr:
                 tr.insert(self.doc())
         return self.doc()
 
@@ -47,7 +46,7 @@ class CubeBet(BaseDbModel):
         return self._find_or_create_cube_bet()
 
     def create_or_update(self):
-        result = self.db().get(Query().user == self.user)
+        result = self.get_by("user", self.user)
 
         if result:
             success(f"Updating Cube Bet: {self.doc()}")
@@ -55,22 +54,18 @@ class CubeBet(BaseDbModel):
             return result
         else:
             success(f"Creating New Cube Bet: {self.doc()}")
-            from tinyrecord import transaction
-
-            with transaction(self.db()) as tr:
+            with self.db().transaction() as tr:
                 tr.insert(self.doc())
             return self.doc()
 
     def _find_or_create_cube_bet(self):
-        result = self.db().get(Query().user == self.user)
+        result = self.get_by("user", self.user)
 
         if result:
             return result
 
         success(f"Creating New Cube Bet: {self.doc()}")
-        from tinyrecord import transaction
-
-        with transaction(self.db()) as tr:
+        with self.db().transaction() as tr:
             tr.insert(self.doc())
         return self.doc()
 
@@ -84,7 +79,5 @@ class CubeBet(BaseDbModel):
 
             return transform
 
-        from tinyrecord import transaction
-
-        with transaction(self.db()) as tr:
+        with self.db().transaction() as tr:
             tr.update_callable(_update_that_value(), Query().user == self.user)
@@ -1,9 +1,1094 @@
+from collections import deque
+from contextlib import contextmanager
+import bisect
+import copy
+import atexit
+import fcntl
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import traceback
+from functools import wraps
 from pathlib import Path
 
 from tinydb import TinyDB
+from tinydb.database import Document, Table
+from tinydb.storages import Storage, touch
+from tinyrecord import transaction
 
+from chat_thief.models.change_bus import INSERTED, REMOVED, change_bus, topic
 
-def db_table(db_location, table_name):
-    return TinyDB(Path(__file__).parent.parent.parent.joinpath(db_location)).table(
-        table_name, cache_size=0
-    )
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Where tables live for models that don't pick: "json" or "sqlite"
+DEFAULT_STORAGE_BACKEND = os.environ.get("CHAT_THIEF_STORAGE", "json")
+
+# One open, parsed TinyDB per database file, shared by every model in the process
+_DATABASES = {}
+_DATABASES_LOCK = threading.Lock()
+
+# Appends landing this close together share one fsync
+GROUP_COMMIT_WINDOW_IN_SECS = 0.05
+# Fold the WAL back into the JSON file once it gets this big
+CHECKPOINT_WAL_BYTES = 1024 * 1024
+# How long a write waits for another process to finish writing the same file
+WRITE_LOCK_WAIT_IN_SECS = 30
+# Unless it's part of a unit of work already holding another file's write
+# lock, when the other process (or thread) could be waiting on us
+NESTED_WRITE_LOCK_WAIT_IN_SECS = 5
+# How many changes to a table its indexes can catch up on, instead of
+# being rebuilt
+TABLE_CHANGES_KEPT = 100
+
+
+class WriteLockTimeout(Exception):
+    pass
+
+
+class CachedStorage(Storage):
+    """
+    Storage that keeps every table parsed in memory, and only persists the
+    docs that changed since the last write.
+
+    Subclasses say where to: is_stale() and _refresh() pick up what other
+    processes wrote, _append(records) persists what _diff() found changed,
+    and _forget() makes the next read load everything again. Nested values
+    in the returned data are shared with the cache, so they must only be
+    mutated on the way to a write, like TinyDB already does.
+
+    Writes hold a write lock (_lock_writes() / _unlock_writes()) that keeps
+    other processes from writing the file, and exclusive() holds it around a
+    whole read-check-write, after catching up with everyone else's writes.
+    Inside a unit of work it's held until the unit commits or rolls back.
+
+    Once a write lands and the write lock is given back, the topics it
+    changed are published on the db folder's ChangeBus.
+
+    Every change to a cached table gives it a new version, and the ids of
+    the docs it touched are kept (see table_changes()), so SharedTable's
+    indexes only have to look at those docs again.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._data = None
+        # table name -> the table dict we last wrote or loaded, and a private
+        # copy of its docs to diff against, since callers mutate nested values
+        self._tables = {}
+        self._baseline = {}
+        # Set while a unit of work is holding our writes back, and the
+        # records of what it's written so far
+        self._buffering = False
+        self._pending = []
+        self._lock = threading.RLock()
+        # How many exclusive() blocks we're in, and whether we have the write lock
+        self._exclusive_depth = 0
+        self.holding_writes = False
+        # Bumped every time we pick up a write we didn't make
+        self.generation = 0
+        # Topics of writes that land when we give back the write lock
+        self._unpublished = set()
+        # table name -> its version and the table dict it's for, and the
+        # (previous version, version, doc ids touched) of its last changes
+        self._versions = itertools.count(1)
+        self._table_versions = {}
+        self._table_changes = {}
+
+    def is_stale(self):
+        raise NotImplementedError
+
+    def _refresh(self):
+        raise NotImplementedError
+
+    def _append(self, records):
+        raise NotImplementedError
+
+    def _forget(self):
+        raise NotImplementedError
+
+    # Raises WriteLockTimeout if it's not ours within wait seconds
+    def _lock_writes(self, wait):
+        raise NotImplementedError
+
+    def _unlock_writes(self):
+        raise NotImplementedError
+
+    # Another thread's unit of work can keep us locked until it's done. If
+    # ours already has other storages locked, that thread could be waiting
+    # on one of them, so we give up after a while instead of deadlocking
+    def _acquire(self):
+        work = _current_unit_of_work()
+        if work is None or not work.storages or self in work.storages:
+            self._lock.acquire()
+        elif not self._lock.acquire(timeout=NESTED_WRITE_LOCK_WAIT_IN_SECS):
+            raise WriteLockTimeout(
+                f"{self.path} was still locked by another thread after "
+                f"{NESTED_WRITE_LOCK_WAIT_IN_SECS}s"
+            )
+
+    @contextmanager
+    def _locked(self):
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def _take_writes(self, wait=None):
+        if not self.holding_writes:
+            self._lock_writes(WRITE_LOCK_WAIT_IN_SECS if wait is None else wait)
+            self.holding_writes = True
+
+    # Unless a unit of work or an exclusive() block still needs it
+    def _give_back_writes(self):
+        if self.holding_writes and not self._buffering and not self._exclusive_depth:
+            self.holding_writes = False
+            self._unlock_writes()
+            self._publish()
+
+    # Only once the write lock's given back, before that SQLite hasn't
+    # committed, and anyone woken up would read what was there before
+    def _publish(self):
+        topics, self._unpublished = self._unpublished, set()
+        if topics:
+            change_bus(Path(self.path).parent).publish(topics)
+
+    def _append_and_publish(self, records):
+        self._append(records)
+        for record in records:
+            self._unpublished.update(record["topics"])
+
+    # Catches up with other processes' writes underneath whatever a unit of
+    # work has written so far, which still wins
+    def _refresh_under_pending_writes(self):
+        self._refresh()
+        pending = []
+        for record in self._pending:
+            if not record.get("drop"):
+                docs = {
+                    doc_id: json.loads(doc_json)
+                    for doc_id, doc_json in record["set"].items()
+                }
+                record = dict(record, set=docs)
+            pending.append(record)
+        self._apply(pending)
+
+    # A unit of work's records, with the ones for the same table run together
+    @staticmethod
+    def _squash(records):
+        squashed = []
+        last = {}
+        for record in records:
+            name = record["table"]
+            previous = last.get(name)
+            if record.get("drop") or previous is None or previous.get("drop"):
+                record = last[name] = dict(record, topics=set(record["topics"]))
+                if not record.get("drop"):
+                    record["set"] = dict(record["set"])
+                    record["del"] = list(record["del"])
+                squashed.append(record)
+                continue
+
+            for doc_id in record["del"]:
+                previous["set"].pop(doc_id, None)
+                if doc_id not in previous["del"]:
+                    previous["del"].append(doc_id)
+            for doc_id, doc_json in record["set"].items():
+                if doc_id in previous["del"]:
+                    previous["del"].remove(doc_id)
+                previous["set"][doc_id] = doc_json
+            previous["topics"].update(record["topics"])
+        return squashed
+
+    # The tables were all just loaded, so there's nothing to catch up on
+    def _loaded(self):
+        self._table_changes = {}
+        self._table_versions = {
+            name: (next(self._versions), table)
+            for name, table in (self._data or {}).items()
+        }
+
+    def _table_changed(self, name, table, doc_ids):
+        previous, _ = self._table_versions.get(name, (None, None))
+        version = next(self._versions)
+        self._table_versions[name] = (version, table)
+        changes = self._table_changes.get(name)
+        if changes is None:
+            changes = self._table_changes[name] = deque(maxlen=TABLE_CHANGES_KEPT)
+        changes.append((previous, version, doc_ids))
+
+    def _table_dropped(self, name):
+        self._table_versions.pop(name, None)
+        self._table_changes.pop(name, None)
+
+    def table_changes(self, name, since=None):
+        """
+        A table's docs (None if there's no such table), its version, and
+        the ids of the docs that changed since version `since`. The ids are
+        None if that's too far back, or the version isn't known.
+        """
+        with self._locked():
+            table = (self.read() or {}).get(name)
+            version, versioned = self._table_versions.get(name, (None, None))
+            if table is None or table is not versioned:
+                return table, None, None
+            if since == version:
+                return table, version, set()
+
+            changed = None
+            for previous, _, doc_ids in self._table_changes.get(name, ()):
+                if previous == since and since is not None:
+                    changed = set()
+                if changed is not None:
+                    changed.update(doc_ids)
+            return table, version, changed
+
+    def _apply(self, records):
+        copied = set()
+        touched = {}
+        for record in records:
+            name = record["table"]
+            if record.get("drop"):
+                self._data.pop(name, None)
+                self._tables.pop(name, None)
+                self._baseline.pop(name, None)
+                self._table_dropped(name)
+                copied.discard(name)
+                touched.pop(name, None)
+                continue
+
+            # A new dict so SharedTable's indexes see the change
+            if name not in copied:
+                self._data[name] = dict(self._data.get(name, {}))
+                copied.add(name)
+            table = self._tables[name] = self._data[name]
+            baseline = self._baseline.setdefault(name, {})
+
+            for doc_id, doc in record.get("set", {}).items():
+                table[doc_id] = doc
+                baseline[doc_id] = copy.deepcopy(doc)
+            for doc_id in record.get("del", []):
+                table.pop(doc_id, None)
+                baseline.pop(doc_id, None)
+            touched.setdefault(name, set()).update(
+                record.get("set", {}), record.get("del", [])
+            )
+
+        for name, doc_ids in touched.items():
+            self._table_changed(name, self._data[name], doc_ids)
+
+    # Records of whatever's different from the last write, with each changed
+    # doc as its JSON, and rebuilds the cache from fresh copies so callers'
+    # objects don't alias it. Each record's topics are what to publish once
+    # it's written, they aren't persisted
+    def _diff(self, data):
+        records = []
+        new_data = {}
+
+        for name, table in data.items():
+            old_table = self._tables.get(name)
+            if table is old_table:
+                new_data[name] = table
+                continue
+
+            old_baseline = self._baseline.get(name, {})
+            baseline = {}
+            new_table = {}
+            changed = {}
+            topics = {topic(name)}
+            for doc_id, doc in table.items():
+                doc_id = str(doc_id)
+                old_doc = old_baseline.get(doc_id)
+                if old_doc is not None and old_doc == doc:
+                    new_table[doc_id] = old_table[doc_id]
+                    baseline[doc_id] = old_doc
+                else:
+                    doc_json = json.dumps(doc)
+                    new_table[doc_id] = json.loads(doc_json)
+                    baseline[doc_id] = json.loads(doc_json)
+                    changed[doc_id] = doc_json
+                    topics.update(self._changed_topics(name, old_doc, baseline[doc_id]))
+            removed = [doc_id for doc_id in old_baseline if doc_id not in baseline]
+            if removed:
+                topics.add(topic(name, REMOVED))
+
+            if changed or removed or old_table is None:
+                records.append(
+                    {"table": name, "set": changed, "del": removed, "topics": topics}
+                )
+            new_data[name] = new_table
+            self._baseline[name] = baseline
+            self._table_changed(name, new_table, changed.keys() | set(removed))
+
+        for name in self._tables:
+            if name not in data:
+                records.append({"table": name, "drop": True, "topics": {topic(name)}})
+                self._baseline.pop(name, None)
+                self._table_dropped(name)
+
+        self._data = new_data
+        self._tables = dict(new_data)
+        return records
+
+    # A new doc changes every field it has
+    @staticmethod
+    def _changed_topics(name, old_doc, doc):
+        if old_doc is None:
+            return [topic(name, INSERTED)] + [topic(name, field) for field in doc]
+        return [
+            topic(name, field)
+            for field in doc.keys() | old_doc.keys()
+            if field not in doc or field not in old_doc or doc[field] != old_doc[field]
+        ]
+
+    def read(self):
+        with self._locked():
+            # A unit of work sees its own writes, not other processes'
+            if not self._buffering and self.is_stale():
+                self._refresh()
+            return self._data
+
+    def write(self, data):
+        with self._locked():
+            if self._data is None:
+                self._refresh()
+
+            if work := _current_unit_of_work():
+                work.join(self)
+            if self._buffering:
+                # Diffed now so the cache (and its indexes) stay up to date,
+                # but only written once the unit commits
+                self._pending.extend(self._diff(data or {}))
+                return
+
+            self._take_writes()
+            try:
+                if records := self._diff(data or {}):
+                    self._append_and_publish(records)
+            finally:
+                self._give_back_writes()
+
+    def acquire_exclusive(self):
+        self._acquire()
+        try:
+            if not self.holding_writes:
+                wait = None
+                if work := _current_unit_of_work():
+                    if work.holding_writes():
+                        wait = NESTED_WRITE_LOCK_WAIT_IN_SECS
+                    work.join(self)
+                self._take_writes(wait)
+
+                # Even TinyDB opening a table can write (the empty table), so
+                # a unit of work's pending writes can't keep us from catching up
+                if self.is_stale():
+                    self._refresh_under_pending_writes()
+            self._exclusive_depth += 1
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def release_exclusive(self):
+        try:
+            self._exclusive_depth -= 1
+            self._give_back_writes()
+        finally:
+            self._lock.release()
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Nobody else writes until the block's done, and reads in it start
+        out up to date, so checking a doc and then changing it is atomic.
+        """
+        self.acquire_exclusive()
+        try:
+            yield
+        finally:
+            self.release_exclusive()
+
+    # Holds our lock, and every write after it, until commit() or rollback()
+    def begin(self):
+        self._acquire()
+        self._buffering = True
+
+    def commit(self):
+        try:
+            self._buffering = False
+            records, self._pending = self._squash(self._pending), []
+            if records:
+                self._take_writes()
+                self._append_and_publish(records)
+        finally:
+            try:
+                self._give_back_writes()
+            finally:
+                self._lock.release()
+
+    def rollback(self):
+        try:
+            self._buffering = False
+            self._pending = []
+            # The next read loads what's really on disk
+            self._forget()
+            self._give_back_writes()
+        finally:
+            self._lock.release()
+
+
+class SharedJSONStorage(CachedStorage):
+    """
+    JSON file storage with a write-ahead log, kept parsed in memory.
+
+    The JSON file is a snapshot in the same format TinyDB's JSONStorage
+    writes, so `make sync_json` can keep uploading it. A write only appends
+    the docs that changed to <file>.wal, and the fsyncs of writes landing
+    close together are batched. Once the WAL gets big it's checkpointed:
+    folded into a new snapshot that's swapped in with os.replace, and the
+    WAL starts over.
+
+    The WAL's first line names the snapshot it applies to, so once a
+    snapshot is replaced or deleted (new_day, the tests) its old WAL is
+    thrown away instead of replayed onto the wrong data. Other processes
+    pick up our writes by replaying the WAL past where they last read, and
+    a process starting up recovers by replaying all of it.
+
+    Appends and checkpoints hold an exclusive flock on the WAL, reads a
+    shared one. The write lock is a flock on <file>.lock, so reads never
+    wait on another process's unit of work.
+    """
+
+    def __init__(self, path, create_dirs=False, encoding=None, **kwargs):
+        super().__init__()
+        self.path = str(path)
+        self.wal_path = f"{self.path}.wal"
+        self.lock_path = f"{self.path}.lock"
+        self.kwargs = kwargs
+        self._create_dirs = create_dirs
+        self._encoding = encoding
+        # Held open so a replacement snapshot can never reuse its inode
+        self._snapshot_handle = None
+        self._snapshot = None
+        self._wal = None
+        self._wal_inode = None
+        # How much of the WAL is reflected in _data
+        self._wal_offset = 0
+        self._fsync_timer = None
+        self._write_lock = None
+
+    def _snapshot_identity(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def _header(self, identity):
+        return bytes(json.dumps({"snapshot": identity}) + "\n", "utf-8")
+
+    @contextmanager
+    def _flock(self, operation):
+        fcntl.flock(self._wal, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._wal, fcntl.LOCK_UN)
+
+    def _open_wal(self):
+        try:
+            replaced = os.stat(self.wal_path).st_ino != self._wal_inode
+        except FileNotFoundError:
+            replaced = True
+
+        if self._wal is None or replaced:
+            if self._wal is not None:
+                os.close(self._wal)
+            touch(self.path, create_dirs=self._create_dirs)
+            self._wal = os.open(
+                self.wal_path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644
+            )
+            self._wal_inode = os.fstat(self._wal).st_ino
+            # Whatever we had came from the WAL that's gone
+            self._snapshot = None
+
+    def is_stale(self):
+        if self._wal is None:
+            return True
+        try:
+            wal_stat = os.stat(self.wal_path)
+        except FileNotFoundError:
+            return True
+        return (
+            wal_stat.st_ino != self._wal_inode
+            or wal_stat.st_size != self._wal_offset
+            or self._snapshot_identity() != self._snapshot
+        )
+
+    def _refresh(self):
+        self._open_wal()
+        with self._flock(fcntl.LOCK_SH):
+            if self._catch_up():
+                return
+        with self._flock(fcntl.LOCK_EX):
+            if not self._catch_up():
+                self._reload()
+
+    # Replays what got appended since we last looked, False if that's not enough
+    def _catch_up(self):
+        if self._snapshot is None or self._snapshot_identity() != self._snapshot:
+            return False
+
+        wal_size = os.fstat(self._wal).st_size
+        if wal_size < self._wal_offset:
+            return False
+        if wal_size > self._wal_offset:
+            records, consumed = self._parse(
+                os.pread(self._wal, wal_size - self._wal_offset, self._wal_offset)
+            )
+            self._wal_offset += consumed
+            if records:
+                self._apply(records)
+                self.generation += 1
+        return True
+
+    # Needs the exclusive lock, it may have to fix up the WAL
+    def _reload(self):
+        touch(self.path, create_dirs=self._create_dirs)
+        if self._snapshot_handle:
+            self._snapshot_handle.close()
+        self._snapshot_handle = open(self.path, "r", encoding=self._encoding)
+        contents = self._snapshot_handle.read()
+        identity = self._snapshot_identity()
+        self._load(contents)
+
+        header = self._header(identity)
+        wal = os.pread(self._wal, os.fstat(self._wal).st_size, 0)
+        if wal.startswith(header):
+            records, consumed = self._parse(wal[len(header) :])
+            self._apply(records)
+            self._wal_offset = len(header) + consumed
+            if self._wal_offset < len(wal):
+                # Half an append from a process that died mid-write
+                os.ftruncate(self._wal, self._wal_offset)
+        else:
+            # Left over from a snapshot that's been replaced, it's either
+            # already in the new one or was meant to be thrown away
+            os.ftruncate(self._wal, 0)
+            os.write(self._wal, header)
+            self._wal_offset = len(header)
+
+        self._snapshot = identity
+        self.generation += 1
+
+    def _load(self, contents):
+        self._data = json.loads(contents) if contents else {}
+        self._tables = dict(self._data)
+        self._baseline = json.loads(contents) if contents else {}
+        self._loaded()
+
+    def _parse(self, contents):
+        records = []
+        # Anything after the last newline is an append still being written
+        *lines, _ = contents.split(b"\n")
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Blank, or the remains of a torn append
+                pass
+        return records, sum(len(line) + 1 for line in lines)
+
+    def _forget(self):
+        self._snapshot = None
+
+    def _lock_writes(self, wait):
+        if self._write_lock is None:
+            touch(self.lock_path, create_dirs=self._create_dirs)
+            self._write_lock = open(self.lock_path, "a")
+
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                fcntl.flock(self._write_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise WriteLockTimeout(
+                        f"{self.path} was still being written after {wait}s"
+                    )
+                time.sleep(0.001)
+
+    def _unlock_writes(self):
+        fcntl.flock(self._write_lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _wal_line(record):
+        if record.get("drop"):
+            return json.dumps({"table": record["table"], "drop": True})
+        # The changed docs are already JSON, so they're pasted in as is
+        changed = ", ".join(
+            f"{json.dumps(doc_id)}: {doc_json}"
+            for doc_id, doc_json in record["set"].items()
+        )
+        return (
+            f'{{"table": {json.dumps(record["table"])}, '
+            f'"set": {{{changed}}}, '
+            f'"del": {json.dumps(record["del"])}}}'
+        )
+
+    def _append(self, records):
+        payload = bytes(
+            "".join(f"{self._wal_line(record)}\n" for record in records), "utf-8"
+        )
+
+        with self._flock(fcntl.LOCK_EX):
+            touch(self.path, create_dirs=self._create_dirs)
+            identity = self._snapshot_identity()
+            header = self._header(identity)
+
+            wal_size = os.fstat(self._wal).st_size
+            if os.pread(self._wal, len(header), 0) != header:
+                os.ftruncate(self._wal, 0)
+                os.write(self._wal, header)
+                wal_size = len(header)
+            elif os.pread(self._wal, 1, wal_size - 1) != b"\n":
+                # Don't glue our append onto a torn one
+                payload = b"\n" + payload
+
+            os.write(self._wal, payload)
+            if identity == self._snapshot and wal_size == self._wal_offset:
+                self._wal_offset = wal_size + len(payload)
+            wal_size += len(payload)
+
+        self._schedule_fsync()
+        if wal_size > CHECKPOINT_WAL_BYTES:
+            self.checkpoint()
+
+    def _schedule_fsync(self):
+        if self._fsync_timer is None:
+            self._fsync_timer = threading.Timer(GROUP_COMMIT_WINDOW_IN_SECS, self.sync)
+            self._fsync_timer.daemon = True
+            self._fsync_timer.start()
+
+    # fsyncs every append so far, they're normally batched up on a timer
+    def sync(self):
+        with self._lock:
+            if self._fsync_timer:
+                self._fsync_timer.cancel()
+            self._fsync_timer = None
+            if self._wal is not None:
+                os.fsync(self._wal)
+
+    def checkpoint(self):
+        with self._lock:
+            self._open_wal()
+            with self._flock(fcntl.LOCK_EX):
+                if not self._catch_up():
+                    self._reload()
+
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding=self._encoding) as snapshot:
+                    snapshot.write(json.dumps(self._data, **self.kwargs))
+                    snapshot.flush()
+                    os.fsync(snapshot.fileno())
+                os.replace(tmp_path, self.path)
+
+                self._snapshot_handle.close()
+                self._snapshot_handle = open(self.path, "r", encoding=self._encoding)
+                identity = self._snapshot_identity()
+                header = self._header(identity)
+                # If we die before this, the stale WAL gets thrown away on reload
+                os.ftruncate(self._wal, 0)
+                os.write(self._wal, header)
+                os.fsync(self._wal)
+                self._snapshot = identity
+                self._wal_offset = len(header)
+
+    def close(self):
+        with self._lock:
+            if self._wal is not None:
+                self.sync()
+                os.close(self._wal)
+            if self._snapshot_handle:
+                self._snapshot_handle.close()
+            if self._write_lock:
+                self._write_lock.close()
+            self._write_lock = None
+            self._wal = None
+            self._wal_inode = None
+            self._snapshot_handle = None
+            self._snapshot = None
+            self._data = None
+            self._tables = {}
+            self._baseline = {}
+            self._loaded()
+
+
+def _exclusive(method):
+    @wraps(method)
+    def exclusively(self, *args, **kwargs):
+        with self._storage._storage.exclusive():
+            return method(self, *args, **kwargs)
+
+    return exclusively
+
+
+class _HashIndex:
+    """
+    A field value -> the ids of the docs holding it (or, for list fields,
+    the docs whose list contains it), in doc id order.
+    """
+
+    def __init__(self, field, table):
+        self.field = field
+        self.version = None
+        self._doc_ids = {}
+        # doc id -> the values it's indexed under, to take it back out
+        self._values = {}
+        for doc_id, doc in table.items():
+            self._add(doc_id, doc)
+
+    def find(self, value):
+        try:
+            return list(self._doc_ids.get(value, []))
+        except TypeError:
+            return []
+
+    # Looks at the docs again, whether they changed, came or went
+    def update(self, table, doc_ids):
+        for doc_id in doc_ids:
+            self._remove(doc_id)
+            if (doc := table.get(doc_id)) is not None:
+                self._add(doc_id, doc)
+
+    def _add(self, doc_id, doc):
+        values = doc.get(self.field)
+        # List fields (permitted_users) are indexed by each member
+        if not isinstance(values, list):
+            values = [values] if self.field in doc else []
+
+        indexed = []
+        for value in dict.fromkeys(values):
+            try:
+                bisect.insort(self._doc_ids.setdefault(value, []), doc_id, key=int)
+            except TypeError:
+                # Unhashable values don't get indexed
+                continue
+            indexed.append(value)
+        if indexed:
+            self._values[doc_id] = indexed
+
+    def _remove(self, doc_id):
+        for value in self._values.pop(doc_id, []):
+            doc_ids = self._doc_ids[value]
+            doc_ids.remove(doc_id)
+            if not doc_ids:
+                del self._doc_ids[value]
+
+
+class SharedTable(Table):
+    """
+    Table with hash indexes for point lookups on a field.
+
+    An index is built the first time a field's looked up by, and after that
+    kept up to date from the ids of the docs each change touched, whether
+    that was an insert/update/remove from this process or another process's
+    write we caught up on. Only a full reload of the file (or falling more
+    than TABLE_CHANGES_KEPT changes behind) rebuilds it.
+
+    Columns (every doc's value for a field, in doc order) for totals and
+    leaderboards are derived from the whole table, and rebuilt whenever it
+    changes.
+
+    Every write (and every transaction()) reads, changes and writes
+    the table inside the storage's exclusive(), so another bot can't write
+    in between and have its change lost.
+    """
+
+    # The same {} every time the table isn't there yet, so what's derived
+    # from it stays cached too
+    _missing_table = {}
+
+    def __init__(self, storage, name, **kwargs):
+        super().__init__(storage, name, **kwargs)
+        self._indexes = {}
+
+    insert = _exclusive(Table.insert)
+    insert_multiple = _exclusive(Table.insert_multiple)
+    update = _exclusive(Table.update)
+    upsert = _exclusive(Table.upsert)
+    remove = _exclusive(Table.remove)
+    write_back = _exclusive(Table.write_back)
+    purge = _exclusive(Table.purge)
+
+    @contextmanager
+    def transaction(self):
+        """
+        A tinyrecord transaction on the table, recorded and committed inside
+        the storage's exclusive(), instead of under tinyrecord's own
+        in-process lock.
+        """
+        with self._storage._storage.exclusive():
+            with transaction(self) as tr:
+                yield tr
+
+    def update_if(self, check, transform, cond=None, doc_ids=None):
+        """
+        Runs transform on the docs matching cond (or doc_ids) that pass
+        check, with nobody else writing between the check and the change.
+        Returns the ids of the docs it changed.
+        """
+        with self._storage._storage.exclusive():
+            if doc_ids is None:
+                docs = self.search(cond)
+            else:
+                docs = [self.get(doc_id=doc_id) for doc_id in doc_ids]
+            passed = [doc.doc_id for doc in docs if doc is not None and check(doc)]
+            if passed:
+                self.update(transform, doc_ids=passed)
+            return passed
+
+    def _raw_table(self):
+        raw_data = self._storage._storage.read() or {}
+        return raw_data.get(self.name, self._missing_table)
+
+    def _derived(self, key, build):
+        raw_table = self._raw_table()
+        # The table and what's derived from it swap together, so a thread
+        # still on the old table can't cache what it builds against the new one
+        cached = getattr(self, "_derived_cache", None)
+        if cached is None or cached[0] is not raw_table:
+            cached = self._derived_cache = (raw_table, {})
+
+        derived = cached[1]
+        if key not in derived:
+            derived[key] = build(raw_table)
+
+        return raw_table, derived[key]
+
+    # Only called holding the storage's lock, same as every write to the table
+    def _index(self, field):
+        index = self._indexes.get(field)
+        since = index.version if index else None
+        raw_table, version, changed = self._storage._storage.table_changes(
+            self.name, since
+        )
+        if raw_table is None:
+            raw_table = self._missing_table
+
+        if changed is None:
+            index = self._indexes[field] = _HashIndex(field, raw_table)
+        elif changed:
+            index.update(raw_table, changed)
+        index.version = version
+        return raw_table, index
+
+    def _column(self, field, default=0):
+        def build(raw_table):
+            doc_ids = list(raw_table)
+            return doc_ids, [
+                raw_table[doc_id].get(field, default) for doc_id in doc_ids
+            ]
+
+        return self._derived(("column", field, default), build)
+
+    def column(self, field, default=0):
+        """
+        (doc ids, values) for field across the whole table, in doc order.
+
+        The same tuple comes back until the table changes, so callers can
+        cache whatever they work out from it on its identity.
+        """
+        return self._column(field, default)[1]
+
+    def top(self, field, k=None):
+        """
+        The k docs with the biggest field, biggest first (all of them if k
+        is None). Ties go to the newest doc, same as reversed(sorted(...)).
+        """
+        raw_table, (doc_ids, values) = self._column(field)
+
+        def by_value(position):
+            return values[position], position
+
+        positions = range(len(values))
+        if k is None:
+            picked = sorted(positions, key=by_value, reverse=True)
+        else:
+            picked = heapq.nlargest(k, positions, key=by_value)
+        return [
+            Document(raw_table[doc_ids[position]], int(doc_ids[position]))
+            for position in picked
+        ]
+
+    def find_by(self, field, value):
+        with self._storage._storage._locked():
+            raw_table, index = self._index(field)
+            doc_ids = index.find(value)
+        return [Document(raw_table[doc_id], int(doc_id)) for doc_id in doc_ids]
+
+    def get_by(self, field, value):
+        if results := self.find_by(field, value):
+            return results[0]
+
+    def _get_next_id(self):
+        # Another process may have inserted since we last looked
+        storage = self._storage._storage
+        if getattr(self, "_generation", None) != storage.generation:
+            self._init_last_id(self._read())
+            self._generation = storage.generation
+        return super()._get_next_id()
+
+
+def storage_class(backend):
+    if backend == "json":
+        return SharedJSONStorage
+    if backend == "sqlite":
+        from chat_thief.models.sqlite_storage import SQLiteStorage
+
+        return SQLiteStorage
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+# Models name their JSON file, with SQLite it's the same path as .sqlite
+def storage_path(db_path, backend=None):
+    if (backend or DEFAULT_STORAGE_BACKEND) == "sqlite":
+        return str(Path(db_path).with_suffix(".sqlite"))
+    return str(db_path)
+
+
+def _database_for(db_path, backend="json"):
+    with _DATABASES_LOCK:
+        if db_path not in _DATABASES:
+            _DATABASES[db_path] = TinyDB(
+                db_path, storage=storage_class(backend), table_class=SharedTable
+            )
+        return _DATABASES[db_path]
+
+
+def db_table(db_location, table_name, backend=None):
+    backend = backend or DEFAULT_STORAGE_BACKEND
+    db_path = storage_path(PROJECT_ROOT.joinpath(db_location).resolve(), backend)
+    return _database_for(db_path, backend).table(table_name, cache_size=0)
+
+
+class UnitOfWork:
+    """
+    Every storage written to inside the block, committed together at the end.
+
+    Each storage it joins stays locked for the rest of the block, so other
+    threads wait on it rather than seeing (or clobbering) half a trade. Once
+    something in the block writes a storage, other processes can't write it
+    until the block's done either. Side effects queued with after_commit()
+    run once it's committed, with the locks let go.
+    """
+
+    def __init__(self):
+        self.storages = []
+        self.side_effects = []
+
+    def holding_writes(self):
+        return any(storage.holding_writes for storage in self.storages)
+
+    def join(self, storage):
+        if storage not in self.storages:
+            storage.begin()
+            self.storages.append(storage)
+
+    def commit(self):
+        storages, self.storages = self.storages, []
+        for position, storage in enumerate(storages):
+            try:
+                storage.commit()
+            except BaseException:
+                for rest in storages[position + 1 :]:
+                    rest.rollback()
+                raise
+
+    def rollback(self):
+        storages, self.storages = self.storages, []
+        self.side_effects = []
+        for storage in storages:
+            storage.rollback()
+
+    def run_side_effects(self):
+        side_effects, self.side_effects = self.side_effects, []
+        for side_effect in side_effects:
+            try:
+                side_effect()
+            except Exception:
+                # The writes are in, one side effect failing doesn't stop the rest
+                traceback.print_exc()
+
+
+_units_of_work = threading.local()
+
+
+def _current_unit_of_work():
+    return getattr(_units_of_work, "current", None)
+
+
+@contextmanager
+def unit_of_work():
+    # Nested ones are just part of the outer one
+    if work := _current_unit_of_work():
+        yield work
+        return
+
+    work = _units_of_work.current = UnitOfWork()
+    try:
+        yield work
+    except BaseException:
+        _units_of_work.current = None
+        work.rollback()
+        raise
+    _units_of_work.current = None
+    work.commit()
+    work.run_side_effects()
+
+
+def after_commit(side_effect):
+    """
+    Runs side_effect (a shell command, a sound, a chat message) once the
+    current unit of work commits, and never if it rolls back. Outside of
+    a unit of work it runs right away.
+    """
+    if work := _current_unit_of_work():
+        work.side_effects.append(side_effect)
+    else:
+        side_effect()
+
+
+# Brings every db/*.json up to date, for anything reading the files directly
+def checkpoint_databases(db_folder=PROJECT_ROOT.joinpath("db")):
+    for db_path in sorted(Path(db_folder).glob("*.json")):
+        _database_for(str(db_path.resolve())).storage.checkpoint()
+
+
+def sync_databases():
+    with _DATABASES_LOCK:
+        for database in _DATABASES.values():
+            database.storage.sync()
+
+
+atexit.register(sync_databases)
+
+
+# The database files this process has open and parsed
+def open_databases():
+    with _DATABASES_LOCK:
+        return sorted(_DATABASES)
+
+
+def close_databases():
+    with _DATABASES_LOCK:
+        for database in _DATABASES.values():
+            database.close()
+        _DATABASES.clear()
+
+
+if __name__ == "__main__":
+    checkpoint_databases()
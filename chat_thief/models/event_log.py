@@ -0,0 +1,285 @@
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+import fcntl
+import json
+import os
+import threading
+
+from chat_thief.models.archive import parse_time
+
+# Start a new segment once the one being appended to gets this big
+SEGMENT_BYTES = 4 * 1024 * 1024
+
+
+class EventLog:
+    """
+    Append-only JSON Lines log, split over numbered segment files.
+
+    Saving an event is one appended line, however long the log gets. Every
+    process keeps a count of events per (command, user), bumped as it reads
+    lines it hasn't seen yet, so questions like "how many times has @uzi
+    stolen" never scan the events.
+
+    Once a segment is full it's sealed: its counts get written next to it
+    (000001.counts.json), so a process starting up only reads those plus
+    the segment still being appended to. Segments are also sealed at the
+    end of each day, so once a day is old enough its segments can move into
+    the archive, leaving their counts behind. Appends, sealing and archiving
+    hold an exclusive flock on the folder's log.lock.
+    """
+
+    def __init__(self, folder, segment_bytes=SEGMENT_BYTES):
+        self.folder = Path(folder)
+        self.segment_bytes = segment_bytes
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        # command -> Counter of user -> events
+        self._counts = {}
+        self._total = 0
+        self._last = None
+        # The segment we're tailing, and how far into it we've read
+        self._segment = None
+        self._inode = None
+        self._offset = 0
+        self._segment_counts = {}
+        self._segment_total = 0
+
+    def _segment_path(self, index):
+        return self.folder.joinpath(f"{index:06d}.jsonl")
+
+    def _counts_path(self, index):
+        return self.folder.joinpath(f"{index:06d}.counts.json")
+
+    # Archived segments only leave their counts behind
+    def _segments(self):
+        return sorted(
+            {
+                int(path.name.split(".")[0])
+                for pattern in ["*.jsonl", "*.counts.json"]
+                for path in self.folder.glob(pattern)
+            }
+        )
+
+    @contextmanager
+    def _flock(self):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with open(self.folder.joinpath("log.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        segments = self._segments()
+        if self._segment is not None:
+            try:
+                stat = self._segment_path(self._segment).stat()
+            except FileNotFoundError:
+                stat = None
+            # Our segment got deleted or rewritten, so start over
+            if (
+                stat is None
+                or stat.st_ino != self._inode
+                or stat.st_size < self._offset
+            ):
+                self._reset()
+
+        for index in segments:
+            if self._segment is not None and index < self._segment:
+                continue
+            if index != self._segment:
+                if index != segments[-1] and self._load_sealed(index):
+                    continue
+                if not self._segment_path(index).exists():
+                    continue
+                self._start_segment(index)
+            self._tail()
+
+    def _load_sealed(self, index):
+        try:
+            sealed = json.loads(self._counts_path(index).read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        self._add_counts(self._counts, sealed["counts"])
+        self._total += sealed["total"]
+        self._last = sealed["last"] or self._last
+        return True
+
+    def _start_segment(self, index):
+        self._segment = index
+        self._inode = self._segment_path(index).stat().st_ino
+        self._offset = 0
+        self._segment_counts = {}
+        self._segment_total = 0
+
+    def _tail(self):
+        with open(self._segment_path(self._segment), "rb") as segment:
+            segment.seek(self._offset)
+            contents = segment.read()
+
+        # A line still being written waits for the next read
+        complete, newline, _ = contents.rpartition(b"\n")
+        self._offset += len(complete) + len(newline)
+        for line in complete.split(b"\n"):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # Blank, or torn by a crash mid-append
+                continue
+            self._count(event)
+
+    def _count(self, event):
+        for counts in [self._counts, self._segment_counts]:
+            counts.setdefault(event.get("command"), Counter())[event.get("user")] += 1
+        self._total += 1
+        self._segment_total += 1
+        self._last = event
+
+    @staticmethod
+    def _add_counts(counts, more_counts):
+        for command, users in more_counts.items():
+            counts.setdefault(command, Counter()).update(users)
+
+    def _seal(self, index):
+        sealed = {
+            "counts": self._segment_counts,
+            "total": self._segment_total,
+            "last": self._last,
+        }
+        counts_path = self._counts_path(index)
+        tmp_path = counts_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(sealed))
+        os.replace(tmp_path, counts_path)
+
+    def append(self, event):
+        with self._lock, self._flock():
+            self._catch_up()
+            self._write([event])
+        return event
+
+    # Only the first process to get here writes them, for moving old events over
+    def seed(self, load_events):
+        with self._lock, self._flock():
+            self._catch_up()
+            if not self._total:
+                self._write(load_events())
+
+    def _write(self, events):
+        lines = b"".join(bytes(json.dumps(event) + "\n", "utf-8") for event in events)
+        if not lines:
+            return
+
+        index = self._segment or 1
+        path = self._segment_path(index)
+        size = path.stat().st_size if path.exists() else 0
+
+        # A new segment every day too, so old days can be archived
+        if size >= self.segment_bytes or (size and self._written_before_today(path)):
+            self._seal(index)
+            index, size = index + 1, 0
+            path = self._segment_path(index)
+
+        with open(path, "ab") as segment:
+            if size and not self._ends_with_newline(path):
+                # Don't glue our events onto a torn one
+                lines = b"\n" + lines
+            segment.write(lines)
+
+        # Counts our own events, the same way another process will
+        self._catch_up()
+
+    @staticmethod
+    def _written_before_today(path):
+        return date.fromtimestamp(path.stat().st_mtime) != date.today()
+
+    def archive(self, archive, older_than, timestamp_field):
+        """
+        Moves sealed segments whose events are all older than older_than into
+        the archive. Their counts files stay, so the counters don't change.
+        """
+        archived = 0
+        with self._lock, self._flock():
+            self._catch_up()
+            for index in self._segments()[:-1]:
+                path = self._segment_path(index)
+                try:
+                    sealed = json.loads(self._counts_path(index).read_text())
+                except (FileNotFoundError, json.JSONDecodeError):
+                    continue
+                last = sealed["last"]
+                if not path.exists() or (
+                    last and parse_time(last[timestamp_field]) >= older_than
+                ):
+                    continue
+
+                events = self._read_events(path)
+                archive.add(events)
+                path.unlink()
+                archived += len(events)
+        return archived
+
+    @staticmethod
+    def _read_events(path):
+        events = []
+        with open(path, "rb") as segment:
+            for line in segment:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+        return events
+
+    @staticmethod
+    def _ends_with_newline(path):
+        with open(path, "rb") as segment:
+            segment.seek(-1, os.SEEK_END)
+            return segment.read(1) == b"\n"
+
+    def count(self, command=None, user=None):
+        with self._lock:
+            self._catch_up()
+            if command is None:
+                return self._total
+            counts = self._counts.get(command, Counter())
+            if user is None:
+                return sum(counts.values())
+            return counts[user]
+
+    # user -> events for the command, in the order they first showed up
+    def counts_for(self, command):
+        with self._lock:
+            self._catch_up()
+            return dict(self._counts.get(command, Counter()))
+
+    def last(self):
+        with self._lock:
+            self._catch_up()
+            return self._last
+
+    # Everything that hasn't been archived yet
+    def all(self):
+        with self._lock:
+            return [
+                event
+                for index in self._segments()
+                if self._segment_path(index).exists()
+                for event in self._read_events(self._segment_path(index))
+            ]
+
+
+# One log per folder, shared by every model in the process
+_LOGS = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def event_log(folder) -> EventLog:
+    folder = str(Path(folder).resolve())
+    with _LOGS_LOCK:
+        if folder not in _LOGS:
+            _LOGS[folder] = EventLog(folder)
+        return _LOGS[folder]
@@ -1,15 +1,27 @@
 import json
 import traceback
 
-from tinydb import Query
+from chat_thief.models.database import after_commit
+from chat_thief.models.work_queue import WorkQueue
 
-from chat_thief.models.database import db_table
-from chat_thief.models.base_db_model import BaseDbModel
 
+# Not a table, so not a BaseDbModel: requests go through a spool the
+# soundboard bot wakes up on, taking turns between users
+class PlaySoundeffectRequest:
+    database_folder = ""
+    spool_path = "db/play_soundeffects.spool"
 
-class PlaySoundeffectRequest(BaseDbModel):
-    table_name = "play_soundeffects"
-    database_path = "db/play_soundeffects.json"
+    @classmethod
+    def queue(cls):
+        return WorkQueue(cls.database_folder + cls.spool_path, fair_by="user")
+
+    @classmethod
+    def all(cls):
+        return cls.queue().pending()
+
+    @classmethod
+    def count(cls):
+        return len(cls.all())
 
     def __init__(self, user=None, command=None, notification=True):
         self.user = user
@@ -37,15 +49,8 @@ class PlaySoundeffectRequest(BaseDbModel):
             "notification": self.notification,
         }
 
-    def pop_all_off(self):
-        from tinyrecord import transaction
-
-        all_effects = self.all()
-
-        doc_ids_to_delete = [sfx.doc_id for sfx in all_effects]
-        if doc_ids_to_delete:
-            with transaction(self.db()) as tr:
-                tr.remove(doc_ids=doc_ids_to_delete)
-            return all_effects
-        else:
-            return []
+    # Only played once the command asking for it has committed
+    def save(self):
+        doc = self.doc()
+        after_commit(lambda: self.queue().put(doc))
+        return self
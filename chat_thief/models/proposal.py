@@ -1,4 +1,3 @@
-from tinydb import Query
 from datetime import datetime
 import time
 
@@ -10,6 +9,7 @@ DEFAULT_EXPIRE_TIME_IN_SECS = 300
 class Proposal(BaseDbModel):
     table_name = "proposals"
     database_path = "db/proposals.json"
+    indexed_fields = ("user",)
     EXPIRE_TIME_IN_SECS = DEFAULT_EXPIRE_TIME_IN_SECS
 
     # A User can only have one proposal at a time
@@ -22,7 +22,7 @@ class Proposal(BaseDbModel):
         self.supporters = []
 
     def is_expired(self):
-        info = self.db().get(Query().user == self.user)
+        info = self.get_by("user", self.user)
 
         if info:
             current_time = datetime.fromtimestamp(time.time())
@@ -60,7 +60,7 @@ class Proposal(BaseDbModel):
 
     @classmethod
     def find_by_user(cls, user):
-        return cls.db().get(Query().user == user)
+        return cls.get_by("user", user)
 
     def doc(self):
         proposed_at = str(datetime.fromtimestamp(time.time()))
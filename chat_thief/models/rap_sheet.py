@@ -1,9 +1,13 @@
+from datetime import datetime
+import time
+
 from chat_thief.models.base_db_model import BaseDbModel
 
 
 class RapSheet(BaseDbModel):
     database_path = "db/rap_sheet.json"
     table_name = "rap_sheet"
+    timestamp_field = "created_at"
 
     def __init__(self, user, action, metadata={}):
         self._user = user
@@ -11,4 +15,11 @@ class RapSheet(BaseDbModel):
         self._metadata = metadata
 
     def doc(self):
-        return {"user": self._user, "action": self._action, "metadata": self._metadata}
+        created_at = str(datetime.fromtimestamp(time.time()))
+
+        return {
+            "user": self._user,
+            "action": self._action,
+            "metadata": self._metadata,
+            "created_at": created_at,
+        }
@@ -9,6 +9,7 @@ from chat_thief.models.base_db_model import BaseDbModel
 class SFXVote(BaseDbModel):
     table_name = "sfx_votes"
     database_path = "db/sfx_votes.json"
+    indexed_fields = ("command",)
 
     def is_enabled(self):
         if self.supporter_count() == 0 and self.detractor_count() == 0:
@@ -67,15 +68,13 @@ class SFXVote(BaseDbModel):
         return len(vote["detractors"])
 
     def _find_or_create_vote(self):
-        vote = self.db().get(Query().command == self.command)
+        vote = self.get_by("command", self.command)
 
         if vote:
             return vote
         else:
             print(f"Creating New SFXVote: {self.doc()}")
-            from tinyrecord import transaction
-
-            with transaction(self.db()) as tr:
+            with self.db().transaction() as tr:
                 tr.insert(self.doc())
             return self.doc()
 
@@ -13,10 +13,11 @@ from chat_thief.models.base_db_model import BaseDbModel
 class SoundeffectRequest(BaseDbModel):
     table_name = "soundeffect_requests"
     database_path = "db/soundeffect_requests.json"
+    indexed_fields = ("command", "requester")
 
     @classmethod
     def get(cls, command):
-        return cls.db().get(Query().command == command)
+        return cls.get_by("command", command)
 
     @classmethod
     def unapproved_count(cls):
@@ -98,7 +99,7 @@ class SoundeffectRequest(BaseDbModel):
 
     @classmethod
     def approve_all_for_user(cls, approver, requester):
-        results = cls.db().search(Query().requester == requester)
+        results = cls.find_by("requester", requester)
         return cls._save_samples(results, approver)
 
     @classmethod
@@ -108,12 +109,12 @@ class SoundeffectRequest(BaseDbModel):
 
     @classmethod
     def approve_command(cls, approver, command):
-        results = cls.db().search(Query().command == command)
+        results = cls.find_by("command", command)
         return cls._save_samples(results, approver)
 
     @classmethod
     def approve_user(cls, approver, user):
-        results = cls.db().search(Query().requester == user)
+        results = cls.find_by("requester", user)
         return cls._save_samples(results, approver)
 
     @classmethod
@@ -141,9 +142,7 @@ class SoundeffectRequest(BaseDbModel):
         doc_ids_to_delete = [sfx.doc_id for sfx in results]
         if doc_ids_to_delete:
             print(f"Deleting the following IDs: {doc_ids_to_delete}")
-            from tinyrecord import transaction
-
-            with transaction(cls.db()) as tr:
+            with cls.db().transaction() as tr:
                 tr.remove(doc_ids=doc_ids_to_delete)
 
         for sfx in results:
@@ -176,18 +175,14 @@ class SoundeffectRequest(BaseDbModel):
         self.approver = self.auto_approver()
 
     def save(self):
-        results = self.db().search(Query().command == self.command)
+        results = self.find_by("command", self.command)
         doc_ids_to_delete = [sfx.doc_id for sfx in results]
         if doc_ids_to_delete:
-            from tinyrecord import transaction
-
-            with transaction(self.db()) as tr:
+            with self.db().transaction() as tr:
                 tr.remove(doc_ids=doc_ids_to_delete)
 
         print(f"Creating New SFX Request: {self.doc()}")
-        from tinyrecord import transaction
-
-        with transaction(self.db()) as tr:
+        with self.db().transaction() as tr:
             tr.insert(self.doc())
         return self.doc()
 
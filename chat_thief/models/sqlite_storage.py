@@ -0,0 +1,359 @@
+from pathlib import Path
+import argparse
+import json
+import os
+import sqlite3
+
+from chat_thief.models.database import (
+    PROJECT_ROOT,
+    CachedStorage,
+    SharedJSONStorage,
+    WriteLockTimeout,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    tbl TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    name TEXT GENERATED ALWAYS AS (json_extract(doc, '$.name')) VIRTUAL,
+    user TEXT GENERATED ALWAYS AS (json_extract(doc, '$.user')) VIRTUAL,
+    command TEXT GENERATED ALWAYS AS (json_extract(doc, '$.command')) VIRTUAL,
+    PRIMARY KEY (tbl, doc_id)
+);
+CREATE INDEX IF NOT EXISTS docs_version ON docs (version);
+CREATE INDEX IF NOT EXISTS docs_name ON docs (tbl, name);
+CREATE INDEX IF NOT EXISTS docs_user ON docs (tbl, user);
+CREATE INDEX IF NOT EXISTS docs_command ON docs (tbl, command);
+
+CREATE TABLE IF NOT EXISTS tables (
+    tbl TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS removed (
+    tbl TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS removed_version ON removed (version);
+
+CREATE TABLE IF NOT EXISTS meta (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL,
+    pruned INTEGER NOT NULL,
+    dropped INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta VALUES (0, 0, 0, 0);
+"""
+
+
+class SQLiteStorage(CachedStorage):
+    """
+    Storage in an SQLite database in WAL mode, for models that set
+    storage_backend = "sqlite" (db/users.json becomes db/users.sqlite).
+
+    Every doc is a row of docs, keyed on (table, doc id), holding the doc as
+    JSON, so list fields like permitted_users stay lists (json_each() can
+    look inside them). name, user and command are indexed generated columns,
+    for looking docs up with sqlite3 without loading everything.
+
+    Like SharedJSONStorage, the tables stay parsed in memory, and a write is
+    one SQLite transaction upserting just the docs that changed. Each write
+    bumps a version that gets stamped on the rows it touches (and the doc
+    ids it deletes, kept in removed), so other processes catch up by reading
+    the rows newer than the last version they saw. Pruning removed, or
+    dropping a table, makes everyone behind it reload instead. The write
+    lock is an open BEGIN IMMEDIATE transaction, which readers never wait on.
+    """
+
+    def __init__(self, path, create_dirs=False, **kwargs):
+        super().__init__()
+        self.path = str(path)
+        self._create_dirs = create_dirs
+        self._connection = None
+        self._inode = None
+        # What PRAGMA data_version said when we last caught up, it changes
+        # when another connection commits
+        self._data_version = None
+        # The last write reflected in _data
+        self._version = None
+
+    def _connect(self):
+        if self._connection is not None:
+            self._connection.close()
+        if self._create_dirs:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # Our own lock keeps threads off it, so one connection is shared
+        self._connection = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False, timeout=30
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # Commits only wait on an fsync at checkpoints, like the JSON WAL
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._inode = os.stat(self.path).st_ino
+        self._data_version = None
+        self._version = None
+
+    def _replaced(self):
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def _meta(self):
+        return self._connection.execute(
+            "SELECT version, pruned, dropped FROM meta"
+        ).fetchone()
+
+    def is_stale(self):
+        if self._connection is None or self._replaced():
+            return True
+        data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        return data_version != self._data_version
+
+    def _refresh(self):
+        # Holding the write lock, we're already in a transaction on the file
+        if self.holding_writes:
+            self._read_changes()
+            return
+
+        if self._connection is None or self._replaced():
+            self._connect()
+        self._connection.execute("BEGIN")
+        try:
+            self._read_changes()
+        finally:
+            self._connection.execute("COMMIT")
+
+    def _read_changes(self):
+        connection = self._connection
+        self._data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+        version, pruned, dropped = self._meta()
+        if self._version is None or self._version < max(pruned, dropped):
+            self._load()
+        elif version != self._version:
+            self._catch_up(self._version)
+        self._version = version
+
+    def _load(self):
+        connection = self._connection
+        tables = {name: {} for (name,) in connection.execute("SELECT tbl FROM tables")}
+        for name, doc_id, doc in connection.execute(
+            "SELECT tbl, doc_id, doc FROM docs ORDER BY rowid"
+        ):
+            tables.setdefault(name, {})[doc_id] = doc
+
+        self._data = {
+            name: {doc_id: json.loads(doc) for doc_id, doc in table.items()}
+            for name, table in tables.items()
+        }
+        self._tables = dict(self._data)
+        self._baseline = {
+            name: {doc_id: json.loads(doc) for doc_id, doc in table.items()}
+            for name, table in tables.items()
+        }
+        self._loaded()
+        self.generation += 1
+
+    def _catch_up(self, since):
+        connection = self._connection
+        created = [
+            {"table": name}
+            for (name,) in connection.execute(
+                "SELECT tbl FROM tables WHERE version > ?", (since,)
+            )
+        ]
+        removed = {}
+        for name, doc_id in connection.execute(
+            "SELECT tbl, doc_id FROM removed WHERE version > ?", (since,)
+        ):
+            removed.setdefault(name, []).append(doc_id)
+        changed = {}
+        for name, doc_id, doc in connection.execute(
+            "SELECT tbl, doc_id, doc FROM docs WHERE version > ? ORDER BY rowid",
+            (since,),
+        ):
+            changed.setdefault(name, {})[doc_id] = json.loads(doc)
+
+        # Deletes first, a doc that's been deleted and put back is in docs
+        self._apply(
+            created
+            + [{"table": name, "del": doc_ids} for name, doc_ids in removed.items()]
+            + [{"table": name, "set": docs} for name, docs in changed.items()]
+        )
+        self.generation += 1
+
+    def _lock_writes(self, wait):
+        if self._connection is None or self._replaced():
+            # Deleted out from under us, so writes go in the new one
+            self._connect()
+        self._connection.execute(f"PRAGMA busy_timeout = {int(wait * 1000)}")
+        try:
+            self._connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as error:
+            raise WriteLockTimeout(
+                f"{self.path} was still being written after {wait}s: {error}"
+            ) from error
+
+    def _unlock_writes(self):
+        self._connection.execute("COMMIT")
+
+    # Only called holding the write lock, so it lands when that's given back
+    def _append(self, records):
+        connection = self._connection
+        connection.execute("SAVEPOINT append")
+        try:
+            version, _, dropped = self._meta()
+            caught_up = version == self._version
+            version += 1
+
+            for record in records:
+                name = record["table"]
+                if record.get("drop"):
+                    connection.execute("DELETE FROM docs WHERE tbl = ?", (name,))
+                    connection.execute("DELETE FROM tables WHERE tbl = ?", (name,))
+                    dropped = version
+                    continue
+
+                connection.execute(
+                    "INSERT INTO tables VALUES (?, ?) ON CONFLICT (tbl) DO NOTHING",
+                    (name, version),
+                )
+                connection.executemany(
+                    "INSERT INTO docs (tbl, doc_id, doc, version) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (tbl, doc_id) DO UPDATE "
+                    "SET doc = excluded.doc, version = excluded.version",
+                    [
+                        (name, doc_id, doc_json, version)
+                        for doc_id, doc_json in record["set"].items()
+                    ],
+                )
+                connection.executemany(
+                    "DELETE FROM docs WHERE tbl = ? AND doc_id = ?",
+                    [(name, doc_id) for doc_id in record["del"]],
+                )
+                connection.executemany(
+                    "INSERT INTO removed VALUES (?, ?, ?)",
+                    [(name, doc_id, version) for doc_id in record["del"]],
+                )
+
+            connection.execute(
+                "UPDATE meta SET version = ?, dropped = ?", (version, dropped)
+            )
+            connection.execute("RELEASE append")
+        except BaseException:
+            connection.execute("ROLLBACK TO append")
+            connection.execute("RELEASE append")
+            raise
+
+        # Otherwise the next read replays what we missed, and this with it
+        if caught_up:
+            self._version = version
+
+    def _forget(self):
+        self._version = None
+        self._data_version = None
+
+    # Commits are already in the WAL, this gets them fsynced
+    def sync(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def checkpoint(self):
+        with self._lock:
+            # Anyone still behind the deletes we forget about reloads
+            self._take_writes()
+            try:
+                self._connection.execute("DELETE FROM removed")
+                self._connection.execute("UPDATE meta SET pruned = version")
+            finally:
+                self._give_back_writes()
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+            self._inode = None
+            self._forget()
+            self._data = None
+            self._tables = {}
+            self._baseline = {}
+            self._loaded()
+
+
+def migrate(db_folder=PROJECT_ROOT.joinpath("db"), force=False, names=None):
+    """
+    Copies every table in db/*.json into db/*.sqlite next to it. Databases
+    that already have tables are left alone, unless force is set.
+    """
+    for json_path in sorted(Path(db_folder).glob("*.json")):
+        if names and json_path.stem not in names:
+            continue
+        json_storage = SharedJSONStorage(json_path)
+        sqlite_storage = SQLiteStorage(json_path.with_suffix(".sqlite"))
+        try:
+            if sqlite_storage.read() and not force:
+                print(f"Skipping {json_path.name}, it's already been migrated")
+                continue
+
+            data = json_storage.read() or {}
+            sqlite_storage.write(data)
+            docs = sum(len(table) for table in data.values())
+            print(f"Migrated {docs} docs from {json_path.name}")
+        finally:
+            json_storage.close()
+            sqlite_storage.close()
+
+
+def export(db_folder=PROJECT_ROOT.joinpath("db"), names=None):
+    """
+    Copies every db/*.sqlite back over the db/*.json next to it, for the
+    backups and the site, which only know about the JSON files.
+    """
+    for sqlite_path in sorted(Path(db_folder).glob("*.sqlite")):
+        if names and sqlite_path.stem not in names:
+            continue
+        sqlite_storage = SQLiteStorage(sqlite_path)
+        json_storage = SharedJSONStorage(sqlite_path.with_suffix(".json"))
+        try:
+            data = sqlite_storage.read() or {}
+            json_storage.write(data)
+            json_storage.checkpoint()
+            docs = sum(len(table) for table in data.values())
+            print(f"Exported {docs} docs from {sqlite_path.name}")
+        finally:
+            sqlite_storage.close()
+            json_storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Copy the JSON databases into SQLite ones, or back with --export"
+    )
+    parser.add_argument(
+        "databases",
+        nargs="*",
+        help="Just these, like users commands (all of them by default)",
+    )
+    parser.add_argument(
+        "--db-folder", default=str(PROJECT_ROOT.joinpath("db")), help="Where they are"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Overwrite ones already migrated"
+    )
+    parser.add_argument(
+        "--export", action="store_true", help="Copy the SQLite ones into the JSON"
+    )
+    args = parser.parse_args()
+
+    if args.export:
+        export(args.db_folder, names=args.databases)
+    else:
+        migrate(args.db_folder, force=args.force, names=args.databases)
@@ -9,24 +9,26 @@ class TheFed(BaseDbModel):
     table_name = "the_fed"
     database_path = "db/the_fed.json"
     version = "0.0.0"
+    indexed_fields = ("version",)
 
     @classmethod
     def reserve(cls):
-        if command := cls.db().get(Query().version == cls.version):
+        if command := cls.get_by("version", cls.version):
             return command["reserve"]
         else:
             return 0
 
     def collect_taxes(self):
-        for command in Command.db().all():
-            if command["cost"] > 1:
-                print(f"Taxing {command['name']}")
-                new_cost = int(command["cost"] / 2)
-                Command(command["name"]).set_value("cost", new_cost)
-                self.collect_tax(new_cost)
+        with self.unit_of_work():
+            for command in Command.db().all():
+                if command["cost"] > 1:
+                    print(f"Taxing {command['name']}")
+                    new_cost = int(command["cost"] / 2)
+                    Command(command["name"]).set_value("cost", new_cost)
+                    self.collect_tax(new_cost)
 
     def collect_tax(self, tax):
-        if self.db().search(Query().version == self.version):
+        if self.find_by("version", self.version):
             self._update_value("reserve", tax)
         else:
             self._reserve = tax
@@ -42,9 +44,7 @@ class TheFed(BaseDbModel):
 
             return transform
 
-        from tinyrecord import transaction
-
-        with transaction(self.db()) as tr:
+        with self.db().transaction() as tr:
             tr.update_callable(_update_that_value(), Query().version == self.version)
 
     def doc(self):
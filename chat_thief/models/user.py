@@ -11,6 +11,7 @@ from chat_thief.models.base_db_model import BaseDbModel
 class User(BaseDbModel):
     table_name = "users"
     database_path = "db/users.json"
+    indexed_fields = ("name",)
 
     def __init__(
         self, name, cool_points=0, top_eight=[], custom_css=None, insured=False,
@@ -42,7 +43,8 @@ class User(BaseDbModel):
 
     @classmethod
     def _total_of_field(cls, field):
-        return sum([user[field] for user in cls.db().all()])
+        _, values = cls.db().column(field)
+        return sum(values)
 
     @classmethod
     def richest_street_cred(cls):
@@ -54,19 +56,19 @@ class User(BaseDbModel):
 
     @classmethod
     def max_of_field(cls, field):
-        users = [user for user in cls.db().all()]
-        if users:
-            return sorted(users, key=lambda user: user[field])[-1]
+        if users := cls.db().top(field, 1):
+            return users[0]
 
     @classmethod
     def by_cool_points(cls):
-        users = [user for user in cls.db().all()]
-        if users:
-            return reversed(sorted(users, key=lambda user: user["cool_points"]))
+        if users := cls.db().top("cool_points"):
+            return users
 
     @classmethod
     def richest(cls):
-        users = [[user["name"], user["cool_points"]] for user in cls.db().all()]
+        _, names = cls.db().column("name")
+        _, cool_points = cls.db().column("cool_points")
+        users = [[name, points] for name, points in zip(names, cool_points)]
         return sorted(users, key=lambda user: user[1])
 
     # ====================================================================
@@ -172,21 +174,29 @@ class User(BaseDbModel):
 
     def _find_or_create_user(self):
         # We should be using get
-        user_result = self.db().search(Query().name == self.name)
+        user_result = self.get_by("name", self.name)
         if user_result:
-            user_result = user_result[0]
             return user_result
         else:
             success(f"Creating New User: {self.doc()}")
-            from tinyrecord import transaction
-
-            with transaction(self.db()) as tr:
+            with self.db().transaction() as tr:
                 tr.insert(self.doc())
             return self.doc()
 
     def update_cool_points(self, amount=1):
         return self._update_value("cool_points", amount)
 
+    def debit_if_at_least(self, amount, field="cool_points"):
+        """Takes amount off field if there's at least that much, True if it did"""
+
+        def has_enough(doc):
+            return doc.get(field, 0) >= amount
+
+        def debit(doc):
+            doc[field] = doc.get(field, 0) - amount
+
+        return self.update_if(has_enough, debit)
+
     def update_street_cred(self, amount=1):
         return self._update_value("street_cred", amount)
 
@@ -221,11 +231,9 @@ class User(BaseDbModel):
 
     @classmethod
     def wealthiest(cls):
-        richest = [
-            (user["name"], User(user["name"]).top_wealth()) for user in cls.db().all()
-        ]
+        from chat_thief.economist.leaderboard import leaderboard
 
-        return sorted(richest, key=lambda user: user[1])[-1][0]
+        return leaderboard().wealthiest
 
     def remove_all_commands(self):
         for command in self.commands():
@@ -238,17 +246,26 @@ class User(BaseDbModel):
 
     def wealth(self):
         return (
-            sum([Command(command).cost() for command in self.commands()])
+            sum(
+                [
+                    command.get("cost", 1)
+                    for command in Command.for_user(self.name)
+                    if command["name"] != self.name
+                ]
+            )
             + self.cool_points()
         )
 
     def buy_insurance(self):
-        current_cool_points = self.cool_points()
-        if current_cool_points > 0:
-            cool_points = current_cool_points - 1
-            self.db().upsert(
-                {"cool_points": cool_points, "insured": True}, Query().name == self.name
-            )
+        def has_a_cool_point(doc):
+            return doc.get("cool_points", 0) >= 1
+
+        # Paying and getting insured are the one write
+        def insure(doc):
+            doc["cool_points"] = doc.get("cool_points", 0) - 1
+            doc["insured"] = True
+
+        if self.update_if(has_a_cool_point, insure):
             return f"@{self.name} thank you for purchasing insurance"
         else:
             return f"YA Broke @{self.name} - it costs 1 Cool Point to buy insurance"
@@ -12,6 +12,7 @@ from chat_thief.models.user_page import UserPage
 class UserCode(BaseDbModel):
     database_path = "db/user_code.json"
     table_name = "user_code"
+    indexed_fields = ("name", "user")
 
     def __init__(
         self, user, code_link, code_type, name=None, approved=False, owners=[]
@@ -57,11 +58,11 @@ class UserCode(BaseDbModel):
     @classmethod
     def approve(cls, user, widget_name=None):
         if user:
-            result = cls.db().get(Query().user == user)
+            result = cls.get_by("user", user)
             cls.set_value_by_id(result.doc_id, "approved", True)
             return f"@{result['user']}'s {result['name']}.js has been approved!"
 
-        result = cls.db().get(Query().name == widget_name)
+        result = cls.get_by("name", widget_name)
         if result:
             cls.set_value_by_id(result.doc_id, "approved", True)
             return f"@{result['user']}'s {result['name']}.js has been approved!"
@@ -93,7 +94,7 @@ class UserCode(BaseDbModel):
 
     @classmethod
     def owned_by(cls, user):
-        directly_owned = cls.db().search((Query().user == user))
+        directly_owned = cls.find_by("user", user)
 
         def is_owner(user_code):
             return user_code["approved"] and user in user_code.get("owners", [])
@@ -139,3 +140,32 @@ class UserCode(BaseDbModel):
                 ]
             owned_by["deactivated"] = deactivated
         return owned_by
+
+    # js_for_user for everyone at once, from one pass over UserCode and UserPage
+    @classmethod
+    def js_by_user(cls):
+        def _owned_by():
+            return {"approved": [], "unapproved": [], "deactivated": []}
+
+        js_by_user = {}
+        for user_code in cls.db().all():
+            status = "approved" if user_code.get("approved", False) else "unapproved"
+            owners = [user_code["user"]] + user_code.get("owners", [])
+            for owner in dict.fromkeys(owners):
+                js_by_user.setdefault(owner, _owned_by())[status].append(
+                    f"{user_code['name']}.js"
+                )
+
+        seen_pages = set()
+        for user_page in UserPage.db().all():
+            # UserPage.for_user goes with a user's first page
+            if user_page["user"] in seen_pages:
+                continue
+            seen_pages.add(user_page["user"])
+
+            if widgets := user_page["widgets"]:
+                js_by_user.setdefault(user_page["user"], _owned_by())["deactivated"] = [
+                    f"{widget}.js" for (widget, active) in widgets.items() if not active
+                ]
+
+        return js_by_user
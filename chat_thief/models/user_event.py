@@ -1,12 +1,19 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import os
 import time
 
+from chat_thief.models.archive import in_range
 from chat_thief.models.base_db_model import BaseDbModel
+from chat_thief.models.database import PROJECT_ROOT, storage_path
+from chat_thief.models.event_log import event_log
 
 
 class UserEvent(BaseDbModel):
     table_name = "user_events"
+    # Where events lived before the log, only read to move them over
     database_path = "db/user_events.json"
+    log_path = "db/user_events"
+    timestamp_field = "created_at"
 
     def __init__(self, user, command, msg, result):
         self._user = user
@@ -14,6 +21,53 @@ class UserEvent(BaseDbModel):
         self._msg = msg
         self._result = result
 
+    @classmethod
+    def log(cls):
+        log = event_log(PROJECT_ROOT.joinpath(cls.database_folder + cls.log_path))
+        legacy_path = storage_path(
+            PROJECT_ROOT.joinpath(cls.database_folder + cls.database_path),
+            cls.storage_backend,
+        )
+        if not log.count() and os.path.isfile(legacy_path):
+            log.seed(lambda: [dict(event) for event in cls.db().all()])
+        return log
+
+    @classmethod
+    def count_for(cls, user, command):
+        return cls.log().count(command, user)
+
+    @classmethod
+    def counts_for(cls, command):
+        return cls.log().counts_for(command)
+
+    @classmethod
+    def count(cls):
+        return cls.log().count()
+
+    @classmethod
+    def last(cls):
+        return cls.log().last()
+
+    @classmethod
+    def all(cls):
+        return cls.archive().all() + cls.log().all()
+
+    # Only whole segments get archived, so a day can take a little longer
+    @classmethod
+    def compact(cls, now=None):
+        older_than = (now or datetime.now()) - timedelta(days=cls.archive_after_days)
+        return cls.log().archive(cls.archive(), older_than, cls.timestamp_field)
+
+    @classmethod
+    def between(cls, start, end, **filters):
+        return cls.archive().between(start, end, **filters) + in_range(
+            cls.log().all(), cls.timestamp_field, start, end, **filters
+        )
+
+    def save(self):
+        self.log().append(self.doc())
+        return self
+
     def doc(self):
         created_at = str(datetime.fromtimestamp(time.time()))
 
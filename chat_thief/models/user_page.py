@@ -1,11 +1,10 @@
-from tinydb import Query
-
 from chat_thief.models.base_db_model import BaseDbModel
 
 
 class UserPage(BaseDbModel):
     database_path = "db/user_pages.json"
     table_name = "user_pages"
+    indexed_fields = ("user",)
 
     @classmethod
     def bootstrap_user_page(cls, user, widgets):
@@ -26,7 +25,7 @@ class UserPage(BaseDbModel):
 
     @classmethod
     def for_user(cls, user):
-        return cls.db().get(Query().user == user)
+        return cls.get_by("user", user)
 
     @classmethod
     def deactivate(cls, user, widget_name):
@@ -38,13 +37,13 @@ class UserPage(BaseDbModel):
 
     @classmethod
     def _change_widget_status(cls, user, widget_name, status):
-        user_page = cls.db().get(Query().user == user)
+        user_page = cls.get_by("user", user)
 
         if user_page is None:
             print(f"Could Not Find User Page: {user} - Bootstrapping")
 
             cls.bootstrap_user_page(user, [widget_name])
-            user_page = cls.db().get(Query().user == user)
+            user_page = cls.get_by("user", user)
 
         if "widgets" in user_page:
             user_page["widgets"][widget_name] = status
@@ -8,16 +8,17 @@ from chat_thief.config.log import error, warning, success
 class Vote(BaseDbModel):
     table_name = "votes"
     database_path = "db/votes.json"
+    indexed_fields = ("user", "vote")
 
     @classmethod
     def peace_keepers(cls):
-        return [vote["user"] for vote in cls.db().search(Query().vote == "peace")]
+        return [vote["user"] for vote in cls.find_by("vote", "peace")]
 
     @classmethod
     def revolutionaries(cls):
         return [
             freedom_fighter["user"]
-            for freedom_fighter in cls.db().search(Query().vote == "revolution")
+            for freedom_fighter in cls.find_by("vote", "revolution")
         ]
 
     @classmethod
@@ -75,9 +76,7 @@ class Vote(BaseDbModel):
             self.db().update(user_vote(vote), Query().user == self.user)
         else:
             warning(f"NO Previous Vote for User {self.user}!")
-            from tinyrecord import transaction
-
-            with transaction(self.db()) as tr:
+            with self.db().transaction() as tr:
                 tr.insert(self.doc(vote))
             # self.doc(vote)
 
@@ -87,7 +86,7 @@ class Vote(BaseDbModel):
         return {"user": self.user, "vote": vote}
 
     def _find_user(self):
-        user = self.db().search(Query().user == self.user)
+        user = self.find_by("user", self.user)
 
         if user:
             print("We Found a user!")
@@ -0,0 +1,283 @@
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import asyncio
+import fcntl
+import json
+import os
+import socket
+import time
+
+from chat_thief.models.database import PROJECT_ROOT
+
+# How long a consumer waits without being woken up before checking anyway
+POLL_INTERVAL_IN_SECS = 5
+# Without a wakeup socket we fall back to checking the spool this often
+FALLBACK_POLL_INTERVAL_IN_SECS = 0.1
+
+
+@dataclass
+class QueuedItem:
+    doc: dict
+    offset: int
+    end: int
+    acked: bool = False
+
+
+class WorkQueue:
+    """
+    Append-only spool file of JSON lines, shared between processes.
+
+    Producers append under a file lock, then poke the consumer over a unix
+    datagram socket so it wakes up straight away. The consumer keeps how far
+    into the spool it has acked in a separate offset file, and only moves
+    that past an item once everything before it is acked too, so whatever
+    wasn't acked when the consumer died is handed out again (at-least-once).
+    Once everything is acked, the spool is truncated.
+
+    There's meant to be a single consumer per queue.
+    """
+
+    def __init__(self, spool_location, fair_by=None):
+        self.spool_path = PROJECT_ROOT.joinpath(spool_location)
+        self.offset_path = Path(f"{self.spool_path}.offset")
+        self.wakeup_path = Path(f"{self.spool_path}.sock")
+        self.fair_by = fair_by
+
+    def put(self, doc) -> None:
+        line = bytes(json.dumps(doc) + "\n", "utf-8")
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spool_path, "ab") as spool:
+            fcntl.flock(spool, fcntl.LOCK_EX)
+            spool.write(line)
+            spool.flush()
+        self._wake_consumer()
+
+    def pending(self):
+        return [item.doc for item in self._read_from(self.acked_offset())]
+
+    def consumer(self) -> "WorkQueueConsumer":
+        return WorkQueueConsumer(self)
+
+    def clear(self) -> None:
+        for path in [self.spool_path, self.offset_path]:
+            if path.exists():
+                path.unlink()
+
+    def acked_offset(self) -> int:
+        try:
+            return int(self.offset_path.read_text() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _save_acked_offset(self, offset) -> None:
+        tmp_path = Path(f"{self.offset_path}.tmp")
+        tmp_path.write_text(str(offset))
+        os.replace(tmp_path, self.offset_path)
+
+    def _read_from(self, offset):
+        try:
+            with open(self.spool_path, "rb") as spool:
+                return self._read_items(spool, offset)
+        except FileNotFoundError:
+            return []
+
+    def _read_items(self, spool, offset):
+        spool.seek(offset)
+        contents = spool.read()
+
+        items = []
+        # Anything after the last newline is a put still being written
+        for line in contents.split(b"\n")[:-1]:
+            end = offset + len(line) + 1
+            try:
+                items.append(QueuedItem(json.loads(line), offset, end))
+            except ValueError:
+                pass
+            offset = end
+        return items
+
+    def _wake_consumer(self) -> None:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as wakeup:
+                wakeup.setblocking(False)
+                wakeup.sendto(b"\n", str(self.wakeup_path))
+        except OSError:
+            # No consumer listening, or it already has wakeups waiting
+            pass
+
+
+class WorkQueueConsumer:
+    """
+    Hands out a WorkQueue's items one at a time.
+
+    Items are handed out round-robin across the queue's fair_by value
+    (the user for soundeffects), so one spammer can't hog the queue.
+    """
+
+    def __init__(self, queue: WorkQueue):
+        self.queue = queue
+        self._wakeup = self._listen()
+        self._spool = None
+        self._reset(queue.acked_offset())
+
+    def get(self, timeout=None) -> Optional[QueuedItem]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            self._read_new_items()
+            if item := self._next_fair_item():
+                return item
+
+            wait = POLL_INTERVAL_IN_SECS
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return None
+            self._wait(wait)
+
+    async def get_async(self, timeout=None) -> Optional[QueuedItem]:
+        """get() for asyncio, the event loop keeps running while it waits"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            self._read_new_items()
+            if item := self._next_fair_item():
+                return item
+
+            wait = POLL_INTERVAL_IN_SECS
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return None
+            await self._wait_async(wait)
+
+    def ack(self, item: QueuedItem) -> None:
+        item.acked = True
+        acked_offset = self._acked_offset
+        while self._unacked:
+            first = next(iter(self._unacked.values()))
+            if not first.acked:
+                break
+            del self._unacked[first.offset]
+            acked_offset = first.end
+
+        if acked_offset != self._acked_offset:
+            self._acked_offset = acked_offset
+            self.queue._save_acked_offset(acked_offset)
+        if not self._unacked:
+            self._compact()
+
+    def close(self) -> None:
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+        if self._wakeup:
+            self._wakeup.close()
+            self._wakeup = None
+            try:
+                self.queue.wakeup_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _reset(self, offset) -> None:
+        self._acked_offset = offset
+        self._read_offset = offset
+        # Every item read and not acked yet, in spool order
+        self._unacked = {}
+        # fair_by value -> items waiting, in the order they get their turn
+        self._waiting = {}
+
+    def _read_new_items(self) -> None:
+        try:
+            stat = self.queue.spool_path.stat()
+        except FileNotFoundError:
+            return
+
+        # Holding the spool open means a new spool can't reuse its inode
+        if not self._spool or os.fstat(self._spool.fileno()).st_ino != stat.st_ino:
+            if self._spool:
+                self._spool.close()
+                # Somebody cleared the spool out from under us
+                self._reset(0)
+                self.queue._save_acked_offset(0)
+            self._spool = open(self.queue.spool_path, "rb")
+        elif stat.st_size < self._read_offset:
+            self._reset(0)
+            self.queue._save_acked_offset(0)
+
+        if stat.st_size == self._read_offset:
+            return
+
+        for item in self.queue._read_items(self._spool, self._read_offset):
+            self._unacked[item.offset] = item
+            key = item.doc.get(self.queue.fair_by) if self.queue.fair_by else None
+            self._waiting.setdefault(key, deque()).append(item)
+            self._read_offset = item.end
+
+    def _next_fair_item(self) -> Optional[QueuedItem]:
+        for key in self._waiting:
+            items = self._waiting.pop(key)
+            item = items.popleft()
+            if items:
+                # Back of the line
+                self._waiting[key] = items
+            return item
+
+    def _compact(self) -> None:
+        with open(self.queue.spool_path, "ab") as spool:
+            fcntl.flock(spool, fcntl.LOCK_EX)
+            if os.fstat(spool.fileno()).st_size != self._acked_offset:
+                return
+            # Offset first: if we die in between, we replay rather than skip
+            self.queue._save_acked_offset(0)
+            spool.truncate(0)
+        self._reset(0)
+
+    def _listen(self) -> Optional[socket.socket]:
+        wakeup_path = self.queue.wakeup_path
+        try:
+            wakeup_path.parent.mkdir(parents=True, exist_ok=True)
+            if wakeup_path.exists():
+                wakeup_path.unlink()
+            wakeup = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            wakeup.bind(str(wakeup_path))
+            return wakeup
+        except OSError:
+            # Path too long for a socket, or no unix sockets here
+            return None
+
+    def _wait(self, timeout) -> None:
+        if not self._wakeup:
+            time.sleep(min(timeout, FALLBACK_POLL_INTERVAL_IN_SECS))
+            return
+
+        self._wakeup.settimeout(timeout)
+        try:
+            self._wakeup.recv(64)
+        except socket.timeout:
+            return
+        self._drain_wakeups()
+
+    async def _wait_async(self, timeout) -> None:
+        if not self._wakeup:
+            await asyncio.sleep(min(timeout, FALLBACK_POLL_INTERVAL_IN_SECS))
+            return
+
+        self._wakeup.setblocking(False)
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(loop.sock_recv(self._wakeup, 64), timeout)
+        except asyncio.TimeoutError:
+            return
+        self._drain_wakeups()
+
+    # Several puts can land before we get around to reading
+    def _drain_wakeups(self) -> None:
+        self._wakeup.setblocking(False)
+        try:
+            while self._wakeup.recv(64):
+                pass
+        except BlockingIOError:
+            pass
@@ -0,0 +1,92 @@
+from pathlib import Path
+import hashlib
+import json
+import os
+
+
+class BuildManifest:
+    """
+    Remembers a content hash of every page's inputs from the last publish.
+
+    A page whose inputs hash the same as last time, and is still sitting in
+    the build dir, doesn't get rendered or written again. Whatever did get
+    written is added to the changed file, and pages we used to publish but
+    didn't this time are deleted and added to the removed file, so
+    sync_html.sh only has to upload those. The lists pile up over publishes
+    until sync_html.sh empties them after a sync that worked.
+    """
+
+    def __init__(self, build_path, manifest_path=None, full=False):
+        self.build_path = Path(build_path)
+        self.manifest_path = Path(manifest_path or f"{self.build_path}.manifest.json")
+        self.changed_path = Path(f"{self.build_path}.changed")
+        self.removed_path = Path(f"{self.build_path}.removed")
+        self.full = full
+        self.changed = []
+        self.removed = []
+        self._previous = self._load()
+        self._current = {}
+        self._pending = {}
+
+    @staticmethod
+    def digest(*inputs) -> str:
+        # default=str so the odd datetime or tuple in a context still hashes
+        content = json.dumps(inputs, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def is_fresh(self, page, *inputs) -> bool:
+        digest = self.digest(*inputs)
+        self._pending[page] = digest
+
+        if (
+            not self.full
+            and self._previous.get(page) == digest
+            and self.build_path.joinpath(page).exists()
+        ):
+            self._current[page] = self._pending.pop(page)
+            return True
+        return False
+
+    # Only call this after the page is on disk, a page that blew up
+    # rendering gets tried again next publish
+    def wrote(self, page) -> None:
+        self._current[page] = self._pending.pop(page)
+        self.changed.append(page)
+
+    def save(self) -> None:
+        self.removed = [
+            page
+            for page in self._previous
+            if page not in self._current and page not in self._pending
+        ]
+        for page in self.removed:
+            self.build_path.joinpath(page).unlink(missing_ok=True)
+
+        self._write(self.manifest_path, json.dumps(self._current, indent=2))
+        # A page written since the last sync and removed now only needs
+        # removing, and the other way around
+        changed = self._read_lines(self.changed_path) - set(self.removed)
+        removed = self._read_lines(self.removed_path) - set(self.changed)
+        changed.update(self.changed)
+        removed.update(self.removed)
+        self._write(self.changed_path, "".join(f"{p}\n" for p in sorted(changed)))
+        self._write(self.removed_path, "".join(f"{p}\n" for p in sorted(removed)))
+
+    def _load(self):
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @staticmethod
+    def _read_lines(path):
+        try:
+            return {line for line in path.read_text().splitlines() if line}
+        except FileNotFoundError:
+            return set()
+
+    def _write(self, path, content) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(f"{path}.tmp")
+        tmp_path.write_text(content)
+        os.replace(tmp_path, path)
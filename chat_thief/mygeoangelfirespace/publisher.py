@@ -1,12 +1,11 @@
 from argparse import ArgumentParser
 from pathlib import Path
-from shutil import copyfile, rmtree, copytree
+from shutil import copyfile
 import asyncio
+import hashlib
 import time
 from datetime import datetime
-import filecmp
 
-import jinja2
 from jinja2 import Template
 
 from chat_thief.models.bot_vote import BotVote
@@ -15,6 +14,8 @@ from chat_thief.models.user import User
 from chat_thief.models.command import Command
 from chat_thief.models.sfx_vote import SFXVote
 from chat_thief.config.log import success, warning, error
+from chat_thief.mygeoangelfirespace.build_manifest import BuildManifest
+from chat_thief.mygeoangelfirespace.render_pool import RenderPool, render_pages
 from chat_thief.models.css_vote import CSSVote
 from chat_thief.models.user_code import UserCode
 
@@ -30,61 +31,48 @@ base_url = "/home/begin/code/chat_thief/build/beginworld_finance"
 DEPLOY_URL = "https://mygeoangelfirespace.city"
 
 
-# this handles setup and destroy
-def setup_build_dir():
+# Copies over any styles and JS that changed since the last publish
+def setup_build_dir(manifest):
     warning("Setting Up Build Dir")
-
-    # Delete and Recreate Build Direction for BeginWorld Finance HTML
-    old_build_path = Path(__file__).parent.parent.parent.joinpath(
-        "tmp/old_build/beginworld_finance"
-    )
-    rmtree(old_build_path, ignore_errors=True)
-    copytree(rendered_template_path, old_build_path)
-
-    rmtree(rendered_template_path, ignore_errors=True)
-    # This aint working!!!
     rendered_template_path.mkdir(exist_ok=True, parents=True)
 
-    # Move the CSS File
-    css_source = Path(__file__).parent.parent.joinpath("static")
-    css_dest = Path(__file__).parent.parent.parent.joinpath(
-        "build/beginworld_finance/styles"
-    )
-    copytree(css_source, css_dest)
+    static_dirs = {
+        "styles": Path(__file__).parent.parent.joinpath("static"),
+        "js": Path(__file__).parent.parent.joinpath("js"),
+    }
+    for dest_dir, source_dir in static_dirs.items():
+        for source in sorted(source_dir.rglob("*")):
+            if not source.is_file():
+                continue
 
-    # Move JS Files
-    js_source = Path(__file__).parent.parent.joinpath("js")
+            page = f"{dest_dir}/{source.relative_to(source_dir)}"
+            content_hash = hashlib.sha256(source.read_bytes()).hexdigest()
+            if manifest.is_fresh(page, content_hash):
+                continue
 
-    js_dest = Path(__file__).parent.parent.parent.joinpath(
-        "build/beginworld_finance/js"
-    )
-    copytree(js_source, js_dest)
+            dest = rendered_template_path.joinpath(page)
+            dest.parent.mkdir(exist_ok=True, parents=True)
+            copyfile(source, dest)
+            manifest.wrote(page)
 
     success("Finished Setting Up Build Dir")
 
 
-async def _render_and_save_html(file_name, context, dest_filename=None):
-    # warning(f"Rendering Template: {dest_filename}")
-    template = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(template_path),
-    ).get_template(file_name)
-
-    rendered_template = template.render(context)
-    # success(f"Finished Rendering Template: {dest_filename}")
-
-    # warning(f"Writing Template: {file_name}")
+async def _render_and_save_html(file_name, context, dest_filename=None, pool=None):
     if dest_filename:
         html_file = dest_filename
-
     else:
         html_file = file_name
 
-    with open(rendered_template_path.joinpath(html_file), "w") as f:
-        f.write(rendered_template)
-    # success(f"Finished Writing Template: {file_name}")
+    if pool:
+        pool.add(file_name, context, html_file)
+    else:
+        render_pages(
+            template_path, rendered_template_path, [(file_name, context, html_file)]
+        )
 
 
-async def generate_widgets_page(winner):
+async def generate_widgets_page(winner, pool=None):
     widgets = UserCode.all()
     dev_leaderboard = UserCode.dev_leaderboard()
 
@@ -94,10 +82,10 @@ async def generate_widgets_page(winner):
         "winner": winner,
         "dev_leaderboard": dev_leaderboard,
     }
-    await _render_and_save_html("widgets.html", context, "widgets.html")
+    await _render_and_save_html("widgets.html", context, "widgets.html", pool)
 
 
-async def generate_bots_page(winner):
+async def generate_bots_page(winner, pool=None):
     bots = User.bots()
     bot_votes = BotVote.count_by_group("bot")
 
@@ -107,32 +95,33 @@ async def generate_bots_page(winner):
         "bot_votes": bot_votes,
         "winner": winner,
     }
-    await _render_and_save_html("bots.html", context, "bots.html")
+    await _render_and_save_html("bots.html", context, "bots.html", pool)
 
 
-async def generate_stats_page(stats, winner):
+async def generate_stats_page(stats, winner, pool=None):
     context = {
         "base_url": DEPLOY_URL,
         "winner": winner,
     }
-    await _render_and_save_html("stats.html", {**context, **stats}, "stats.html")
+    await _render_and_save_html("stats.html", {**context, **stats}, "stats.html", pool)
 
 
-async def generate_home(all_data, stylish_users, homepage_candidates, winner):
+async def generate_home(
+    all_data, stylish_users, homepage_candidates, winner, pool=None
+):
     # We just find fancy pages here
     commands = all_data["commands"]
     users = all_data["users"]
 
     updated_at = datetime.now().isoformat()
 
-    new_styles = Path(__file__).parent.parent.joinpath("static/")
-    old_styles = Path(__file__).parent.parent.parent.joinpath(
-        "tmp/old_build/beginworld_finance/styles/"
-    )
-
-    recently_updated_users = [
-        f.split(".")[0] for f in filecmp.dircmp(new_styles, old_styles).diff_files
-    ]
+    recently_updated_users = []
+    if pool and pool.manifest:
+        recently_updated_users = [
+            Path(page).name.split(".")[0]
+            for page in pool.manifest.changed
+            if page.startswith("styles/")
+        ]
     context = {
         "recently_updated_users": recently_updated_users,
         "candidates": homepage_candidates,
@@ -143,12 +132,12 @@ async def generate_home(all_data, stylish_users, homepage_candidates, winner):
         "commands": commands,
         "base_url": DEPLOY_URL,
     }
-    await _render_and_save_html("beginworld_finance.html", context, "index.html")
+    await _render_and_save_html("beginworld_finance.html", context, "index.html", pool)
 
 
-async def generate_command_page(cmd_dict, winner):
+async def generate_command_page(cmd_dict, winner, pool=None):
     name = cmd_dict["name"]
-    Path(base_url).joinpath("commands").mkdir(exist_ok=True)
+    rendered_template_path.joinpath("commands").mkdir(exist_ok=True, parents=True)
 
     if len(cmd_dict["permitted_users"]) > -1:
         context = {
@@ -162,12 +151,12 @@ async def generate_command_page(cmd_dict, winner):
         }
 
         await _render_and_save_html(
-            "command.html", context, f"commands/{cmd_dict['name']}.html"
+            "command.html", context, f"commands/{cmd_dict['name']}.html", pool
         )
 
 
 # We could add some logic here so it shows your a stream god
-async def generate_user_page(user_dict, all_commands):
+async def generate_user_page(user_dict, all_commands, pool=None):
     name = user_dict["name"]
     if name in STREAM_GODS:
         commands = all_commands
@@ -219,16 +208,16 @@ async def generate_user_page(user_dict, all_commands):
         "deactivated_widgets": deactivated_widgets,
     }
 
-    await _render_and_save_html("user.html", context, f"{name}.html")
+    await _render_and_save_html("user.html", context, f"{name}.html", pool)
 
 
-# cyberbeni: Isn't asyncio single threaded? I think you need a
-# ProcessPoolExecutor or a ThreadPoolExecutor to speed it up.
-async def main():
+# The generate_ functions only build contexts, the pool does the rendering
+async def main(pool=None):
     warning("Fetching All Data")
+    start = time.perf_counter()
     all_data = StitchAndSort().call()
     stats = StatsDepartment().stats()
-    success("All Data Fetched...Creating Tasks")
+    success(f"All Data Fetched in {time.perf_counter() - start:.2f}s...Creating Tasks")
     all_commands = [command["name"] for command in all_data["commands"]]
 
     static_dir = Path(__file__).parent.parent.joinpath("static")
@@ -244,21 +233,56 @@ async def main():
 
     warning("Setting Up Tasks")
     tasks = (
-        [generate_home(all_data, stylish_users, homepage_candidates, winner)]
-        + [generate_bots_page(winner)]
-        + [generate_widgets_page(winner)]
-        + [generate_stats_page(stats, winner)]
+        [generate_home(all_data, stylish_users, homepage_candidates, winner, pool)]
+        + [generate_bots_page(winner, pool)]
+        + [generate_widgets_page(winner, pool)]
+        + [generate_stats_page(stats, winner, pool)]
         + [
-            generate_user_page(user_dict, all_commands)
+            generate_user_page(user_dict, all_commands, pool)
             for user_dict in all_data["users"]
         ]
-        + [generate_command_page(command, winner) for command in all_data["commands"]]
+        + [
+            generate_command_page(command, winner, pool)
+            for command in all_data["commands"]
+        ]
     )
     success("Finished Setting Up Tasks")
 
     await asyncio.gather(*[asyncio.create_task(task) for task in tasks])
 
+    if pool:
+        warning(f"Rendering Pages on {pool.workers or 1} Workers")
+        start = time.perf_counter()
+        pool.run()
+        for file_name, timing in sorted(pool.timings.items()):
+            print(
+                f"{file_name}: {timing['pages']} pages in {timing['secs']:.2f}s "
+                f"({timing['secs'] / timing['pages'] * 1000:.1f}ms per page)"
+            )
+        success(f"Finished Rendering in {time.perf_counter() - start:.2f}s")
+
 
 if __name__ == "__main__":
-    setup_build_dir()
-    asyncio.run(main())
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--full", action="store_true", help="Render every page, changed or not"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes to render with, 0 renders in this one (default: every core)",
+    )
+    args = parser.parse_args()
+
+    manifest = BuildManifest(rendered_template_path, full=args.full)
+    setup_build_dir(manifest)
+    pool = RenderPool(
+        template_path, rendered_template_path, manifest=manifest, workers=args.workers
+    )
+    asyncio.run(main(pool))
+    manifest.save()
+    success(
+        f"Published {len(manifest.changed)} changed and "
+        f"{len(manifest.removed)} removed files"
+    )
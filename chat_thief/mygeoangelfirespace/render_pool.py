@@ -0,0 +1,108 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import os
+import time
+
+import jinja2
+
+from chat_thief.config.log import error
+
+# How many pages a worker renders and writes per trip to the pool
+RENDER_CHUNK_SIZE = 50
+BYTECODE_CACHE_PATH = Path(__file__).parent.parent.parent.joinpath("tmp/jinja_cache")
+
+# One environment per process, so each template only gets compiled once
+_environments = {}
+
+
+def template_environment(template_path) -> jinja2.Environment:
+    template_path = str(template_path)
+    if template_path not in _environments:
+        BYTECODE_CACHE_PATH.mkdir(exist_ok=True, parents=True)
+        _environments[template_path] = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(template_path),
+            bytecode_cache=jinja2.FileSystemBytecodeCache(str(BYTECODE_CACHE_PATH)),
+        )
+    return _environments[template_path]
+
+
+# Runs in the workers, pages are (template, context, html_file)
+def render_pages(template_path, build_path, pages):
+    environment = template_environment(template_path)
+    timings = []
+    for file_name, context, html_file in pages:
+        start = time.perf_counter()
+        rendered_template = environment.get_template(file_name).render(context)
+        with open(Path(build_path).joinpath(html_file), "w") as f:
+            f.write(rendered_template)
+        timings.append((file_name, html_file, time.perf_counter() - start))
+    return timings
+
+
+class RenderPool:
+    """
+    Collects the pages for a publish, then renders them across processes.
+
+    Pages the manifest says haven't changed never make it into the pool.
+    With workers=0 everything renders in this process.
+    """
+
+    def __init__(
+        self,
+        template_path,
+        build_path,
+        manifest=None,
+        workers=None,
+        chunk_size=RENDER_CHUNK_SIZE,
+    ):
+        self.template_path = template_path
+        self.build_path = build_path
+        self.manifest = manifest
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        # template -> {"pages": count, "secs": render and write time}
+        self.timings = {}
+        self._pages = []
+
+    def add(self, file_name, context, html_file) -> None:
+        template_mtime = self.template_path.joinpath(file_name).stat().st_mtime_ns
+        if self.manifest and self.manifest.is_fresh(
+            html_file, file_name, template_mtime, context
+        ):
+            return
+        self._pages.append((file_name, context, html_file))
+
+    def run(self) -> None:
+        # Sorting keeps a chunk on one template
+        pages = sorted(self._pages, key=lambda page: page[0])
+        self._pages = []
+        chunks = [
+            pages[start : start + self.chunk_size]
+            for start in range(0, len(pages), self.chunk_size)
+        ]
+
+        if self.workers and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [
+                    executor.submit(
+                        render_pages, self.template_path, self.build_path, chunk
+                    )
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    try:
+                        self._record(future.result())
+                    except Exception as e:
+                        # Those pages stay out of the manifest and get another go
+                        error(f"Error Rendering Pages: {e}")
+        else:
+            for chunk in chunks:
+                self._record(render_pages(self.template_path, self.build_path, chunk))
+
+    def _record(self, timings) -> None:
+        for file_name, html_file, secs in timings:
+            if self.manifest:
+                self.manifest.wrote(html_file)
+            timing = self.timings.setdefault(file_name, {"pages": 0, "secs": 0})
+            timing["pages"] += 1
+            timing["secs"] += secs
@@ -1,4 +1,5 @@
 from typing import List, Dict
+import asyncio
 import json
 import random
 import traceback
@@ -14,6 +15,7 @@ from chat_thief.models.user import User
 from chat_thief.prize_dropper import drop_random_soundeffect_to_user
 
 BLACKLIST = []
+DEPLOY_INTERVAL_IN_SECS = 300
 
 
 # I feel like this could also handle checking for the news
@@ -22,7 +24,7 @@ def sync_main():
         try:
             # os.system("time make full_deploy")
             os.system("time make deploy")
-            time.sleep(300)
+            time.sleep(DEPLOY_INTERVAL_IN_SECS)
             # time.sleep(60)
         except Exception as e:
             time.sleep(30)
@@ -32,5 +34,13 @@ def sync_main():
                 traceback.print_exc()
 
 
+# For the bot supervisor, the deploy runs without holding up the other bots
+async def run():
+    while True:
+        deploy = await asyncio.create_subprocess_shell("time make deploy")
+        await deploy.wait()
+        await asyncio.sleep(DEPLOY_INTERVAL_IN_SECS)
+
+
 if __name__ == "__main__":
     sync_main()
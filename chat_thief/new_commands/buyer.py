@@ -64,7 +64,7 @@ class Buyer:
     def _buy_sfx(self, user, effect):
         current_cool_points = user.cool_points()
 
-        if effect not in SoundeffectsLibrary.fetch_soundeffect_names():
+        if not SoundeffectsLibrary.has_sample(effect):
             return PurchaseReceipt(
                 user=user.name,
                 sfx=effect,
@@ -84,8 +84,8 @@ class Buyer:
                 cool_points=current_cool_points,
             )
 
-        if current_cool_points >= command_cost:
-            user.update_cool_points(-command_cost)
+        # Checked again as it's taken, another bot may have spent it since
+        if user.debit_if_at_least(command_cost):
             command.allow_user(user.name)
             command.increase_cost()
 
@@ -57,9 +57,14 @@ class Stealer:
             self._steal(command, thief, the_odds)
 
     def _steal(self, command, thief, the_odds):
-        command.allow_user(self._thief)
-        command.unallow_user(self._victim)
-        command.increase_cost(command.cost())
+        with Command.unit_of_work():
+            # Someone else may have taken it since we looked
+            if not command.transfer_permission_if_owner(self._victim, self._thief):
+                self.metadata[
+                    "stealing_result"
+                ] = f"!{self._target_sfx} is not owned by @{self._victim}"
+                return
+            command.increase_cost(command.cost())
         self.metadata[
             "stealing_result"
         ] = f"@{self._thief} stole from @{self._victim}. Chance of Success: {the_odds}"
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+import random
+import threading
+import time
+
+from chat_thief.chat_logs import ChatLogs
+
+# How long after their last message (or JOIN) somebody still counts as here
+PRESENCE_TTL_IN_SECS = 30 * 60
+
+
+class Presence:
+    """
+    Who's in chat right now, fed straight from the IRC stream.
+
+    Chatting or JOINing marks you as here, PARTing or going quiet for
+    longer than the ttl drops you. Only chatters get picked by random_user:
+    Twitch sends JOINs for lurkers and viewer bots too. Chatters also sit
+    in a list with their index tracked, so adding, dropping and picking a
+    random one are O(1).
+    """
+
+    def __init__(self, ttl=PRESENCE_TTL_IN_SECS, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        # user -> last seen, oldest first
+        self._last_seen = OrderedDict()
+        # Chatters, the ones random_user picks from
+        self._users = []
+        self._index = {}
+        # JOINed, but haven't said anything yet
+        self._lurkers = set()
+        self._lock = threading.Lock()
+
+    def saw(self, user, chatted=True) -> None:
+        if not user:
+            return
+        with self._lock:
+            self._last_seen[user] = self._clock()
+            self._last_seen.move_to_end(user)
+            if user in self._index:
+                return
+            if chatted:
+                self._lurkers.discard(user)
+                self._index[user] = len(self._users)
+                self._users.append(user)
+            else:
+                self._lurkers.add(user)
+
+    def left(self, user) -> None:
+        with self._lock:
+            self._drop(user)
+
+    def users(self) -> List[str]:
+        with self._lock:
+            self._expire()
+            return self._users + list(self._lurkers)
+
+    def chatters(self) -> List[str]:
+        with self._lock:
+            self._expire()
+            return list(self._users)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._last_seen.clear()
+            self._users.clear()
+            self._index.clear()
+            self._lurkers.clear()
+
+    def __contains__(self, user) -> bool:
+        with self._lock:
+            self._expire()
+            return user in self._index or user in self._lurkers
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._users) + len(self._lurkers)
+
+    def random_user(self, exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        A uniformly random chatter not in exclude, None if there's nobody.
+
+        Shuffles as it goes instead of resampling, so every user gets looked
+        at once at most, and it finishes even when everybody is excluded.
+        """
+        exclude = set(exclude)
+        with self._lock:
+            self._expire()
+            for position in range(len(self._users)):
+                self._swap(position, random.randrange(position, len(self._users)))
+                if self._users[position] not in exclude:
+                    return self._users[position]
+        return None
+
+    def _expire(self) -> None:
+        oldest_allowed = self._clock() - self.ttl
+        while self._last_seen:
+            user, last_seen = next(iter(self._last_seen.items()))
+            if last_seen >= oldest_allowed:
+                break
+            self._drop(user)
+
+    def _drop(self, user) -> None:
+        self._last_seen.pop(user, None)
+        self._lurkers.discard(user)
+        if user not in self._index:
+            return
+        self._swap(self._index[user], len(self._users) - 1)
+        self._users.pop()
+        del self._index[user]
+
+    def _swap(self, first, second) -> None:
+        users = self._users
+        users[first], users[second] = users[second], users[first]
+        self._index[users[first]] = first
+        self._index[users[second]] = second
+
+
+_presence = Presence()
+
+
+# Only the chat bot's process is fed by IRC
+def presence() -> Presence:
+    return _presence
+
+
+def current_presence() -> Presence:
+    if _presence.chatters():
+        return _presence
+
+    # Every other bot falls back on the tail of the chat log
+    from_chat_log = Presence()
+    for user in ChatLogs().recent_stream_peasants():
+        from_chat_log.saw(user)
+    return from_chat_log
+
+
+def random_present_user(exclude: Iterable[str] = ()) -> Optional[str]:
+    return current_presence().random_user(exclude)
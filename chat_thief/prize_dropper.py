@@ -1,11 +1,11 @@
 import random
-from pathlib import Path
 import traceback
 
 from chat_thief.audioworld.soundeffects_library import SoundeffectsLibrary
-from chat_thief.chat_logs import ChatLogs
+from chat_thief.chat_logs import chat_log_tail
 from chat_thief.config.stream_lords import STREAM_GODS
 from chat_thief.models.command import Command
+from chat_thief.presence import random_present_user
 
 INVALID_USERS = ["nightbot", ".tim.twitch.tv"] + STREAM_GODS
 CONNECTING_MSG = '{"message": "Connecting to #beginbot as beginbotbot"}'
@@ -17,17 +17,7 @@ def random_soundeffect():
 
 
 def random_user(blacklisted_users=[]):
-    try:
-        looking_for_user = True
-        while looking_for_user:
-            users = ChatLogs().recent_stream_peasants()
-            user = random.sample(users, 1)[0]
-            if user not in INVALID_USERS + blacklisted_users:
-                looking_for_user = False
-        return user
-    except:
-        traceback.print_exc()
-        return None
+    return random_present_user(exclude=INVALID_USERS + blacklisted_users)
 
 
 def drop_effect(user, soundeffect):
@@ -52,14 +42,14 @@ def drop_random_soundeffect_to_random_user():
 
 
 def dropreward():
-    with Path(__file__).parent.parent.joinpath("logs/chat.log") as log:
-        chat_lines = [
-            line
-            for line in log.read_text().split("\n")
-            if line
-            and line.split(":")[0] not in INVALID_USERS
-            and line != CONNECTING_MSG
-        ]
+    # The last person to chat, out of the lines the tail already has
+    chat_lines = [
+        line
+        for line in chat_log_tail().lines()
+        if line.split(":")[0] not in INVALID_USERS and line != CONNECTING_MSG
+    ]
+    if not chat_lines:
+        return
     user = chat_lines[-1].split(":")[0]
     soundeffect = random_soundeffect()
     return drop_effect(user, soundeffect)
@@ -2,20 +2,30 @@ from abc import ABC
 import abc
 
 from chat_thief.chat_parsers.command_parser import CommandParser
+from chat_thief.chat_parsers.known_names import KnownNames
 
 
 # Routers are for Pairing a Parser Class
 class BaseRouter(ABC):
-    def __init__(self, user, command, args=[], parser=None):
+    # Every command name and alias route() can answer,
+    # CommandRouter only builds the routers registered for a command
+    commands = []
+
+    def __init__(self, user, command, args=[], parser=None, known_names=None):
         self.user = user
         self.command = command
         self.args = args
+        # Routers that parse the args again reuse these instead of reloading them
+        self.known_names = known_names or KnownNames()
 
         if parser:
             self.parser = parser
         else:
             self.parser = CommandParser(
-                user=self.user, command=self.command, args=self.args
+                user=self.user,
+                command=self.command,
+                args=self.args,
+                known_names=self.known_names,
             ).parse()
 
     @abc.abstractmethod
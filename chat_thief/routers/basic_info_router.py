@@ -8,6 +8,8 @@ from chat_thief.routers.base_router import BaseRouter
 
 
 class BasicInfoRouter(BaseRouter):
+    commands = ["la_libre", "streamlords", "streamgods", "so", "bankrupt", "paperup"]
+
     def route(self):
         if self.command == "la_libre":
             return " | ".join(LaLibre.inform())
@@ -23,7 +25,10 @@ class BasicInfoRouter(BaseRouter):
 
         if self.user in STREAM_GODS:
             parser = CommandParser(
-                user=self.user, command=self.command, args=self.args
+                user=self.user,
+                command=self.command,
+                args=self.args,
+                known_names=self.known_names,
             ).parse()
 
             if self.command == "bankrupt":
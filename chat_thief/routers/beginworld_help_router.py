@@ -3,6 +3,8 @@ from chat_thief.config.help_menu import HELP_COMMANDS
 
 
 class BeginworldHelpRouter(BaseRouter):
+    commands = ["help"]
+
     def route(self):
         if self.command == "help":
             if len(self.args) > 0:
@@ -6,6 +6,8 @@ from chat_thief.routers.base_router import BaseRouter
 
 
 class BotSurvivorRouter(BaseRouter):
+    commands = ["hatebot", "votebotout", "tribal_council"]
+
     def route(self):
         if self.command in ["hatebot", "votebotout"]:
             if self.parser.target_user:
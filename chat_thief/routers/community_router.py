@@ -14,6 +14,15 @@ DEFAULT_SUPPORT_REQUIREMENT = 3
 
 class CommunityRouter(BaseRouter):
     SUPPORT_REQUIREMENT = DEFAULT_SUPPORT_REQUIREMENT
+    commands = [
+        "top8",
+        "hate8",
+        "clear8",
+        "propose",
+        "iasip",
+        "alwayssunny",
+        "support",
+    ]
 
     def top8(self):
         user = User(self.user)
@@ -22,58 +22,74 @@ from chat_thief.routers.base_router import BaseRouter
 
 BASE_URL = "https://mygeoangelfirespace.city"
 
-COMMANDS = {"give": {"aliases": ["transfer", "give"],}}
+COMMANDS = {
+    "insurance": {"aliases": ["insurance"]},
+    "css": {"aliases": ["css"]},
+    "me": {"aliases": ["me", "perm"]},
+    "perms": {"aliases": ["permissions", "permission", "perms", "perm"]},
+    "donate": {"aliases": ["donate"]},
+    "love": {"aliases": ["love", "like"]},
+    "hate": {"aliases": ["dislike", "hate", "detract"]},
+    "props": {"aliases": ["props", "bigups", "endorse"]},
+    "steal": {"aliases": ["steal"]},
+    "buy": {"aliases": ["buy"]},
+    "give": {"aliases": ["transfer", "give"]},
+    "share": {
+        "aliases": [
+            "share",
+            "clone",
+            "add_perm",
+            "add_perms",
+            "share_perm",
+            "share_perms",
+        ]
+    },
+}
 
 
 class EconomyRouter(BaseRouter):
+    commands = list(
+        dict.fromkeys(
+            alias for command in COMMANDS.values() for alias in command["aliases"]
+        )
+    )
+
     def route(self):
-        if self.command == "insurance":
+        if self.command in COMMANDS["insurance"]["aliases"]:
             return User(self.user).buy_insurance()
 
-        if self.command == "css":
+        if self.command in COMMANDS["css"]["aliases"]:
             # if self.user in STREAM_LORDS:
             return self.set_css()
 
-        if self.command in ["me", "perm"]:
+        if self.command in COMMANDS["me"]["aliases"]:
             return self.me()
 
-        if self.command in ["permissions", "permission", "perms", "perm"]:
+        if self.command in COMMANDS["perms"]["aliases"]:
             return self.perms()
 
-        if self.command == "donate":
+        if self.command in COMMANDS["donate"]["aliases"]:
             return self.donate()
 
-        if self.command in ["love", "like"]:
+        if self.command in COMMANDS["love"]["aliases"]:
             return self.love()
 
-        if self.command in ["dislike", "hate", "detract"]:
+        if self.command in COMMANDS["hate"]["aliases"]:
             return self.hate()
 
-        if self.command in [
-            "props",
-            "bigups",
-            "endorse",
-        ]:
+        if self.command in COMMANDS["props"]["aliases"]:
             return self.props()
 
-        if self.command in ["steal"]:
+        if self.command in COMMANDS["steal"]["aliases"]:
             return self.steal()
 
-        if self.command == "buy":
+        if self.command in COMMANDS["buy"]["aliases"]:
             return self.buy()
 
-        # So What are the aliases here
         if self.command in COMMANDS["give"]["aliases"]:
             return self.give()
 
-        if self.command in [
-            "share",
-            "clone",
-            "add_perm",
-            "add_perms",
-            "share_perm",
-            "share_perms",
-        ]:
+        if self.command in COMMANDS["share"]["aliases"]:
             return self.share()
 
     def donate(self):
@@ -89,7 +105,11 @@ class EconomyRouter(BaseRouter):
     def set_css(self):
         custom_css = self.args[0]
         User(self.user).set_value("custom_css", custom_css)
+        # Not while we're holding the users
+        User.after_commit(lambda: self._download_css(custom_css))
+        return f"Thanks for the custom CSS @{self.user}! {BASE_URL}/{self.user}.html"
 
+    def _download_css(self, custom_css):
         # Switch to NOT USE requests
         response = requests.get(custom_css)
         new_css_path = Path(__file__).parent.parent.joinpath(f"static/{self.user}.css")
@@ -97,8 +117,6 @@ class EconomyRouter(BaseRouter):
         with open(new_css_path, "w") as f:
             f.write(response.text)
 
-        return f"Thanks for the custom CSS @{self.user}! {BASE_URL}/{self.user}.html"
-
     def me(self):
         stats = User(self.user).stats()
         return f"{stats} | {BASE_URL}/{self.user}.html"
@@ -119,7 +137,11 @@ class EconomyRouter(BaseRouter):
 
     def buy(self):
         parser = CommandParser(
-            user=self.user, command=self.command, args=self.args, allow_random_sfx=True,
+            user=self.user,
+            command=self.command,
+            args=self.args,
+            known_names=self.known_names,
+            allow_random_sfx=True,
         ).parse()
 
         result = Buyer(
@@ -133,6 +155,7 @@ class EconomyRouter(BaseRouter):
             user=self.user,
             command=self.command,
             args=self.args,
+            known_names=self.known_names,
             allow_random_sfx=True,
             allow_random_user=True,
         ).parse()
@@ -179,6 +202,7 @@ class EconomyRouter(BaseRouter):
             user=self.user,
             command=self.command,
             args=self.args,
+            known_names=self.known_names,
             allow_random_sfx=True,
             allow_random_user=True,
         ).parse()
@@ -209,6 +233,7 @@ class EconomyRouter(BaseRouter):
             user=self.user,
             command=self.command,
             args=self.args,
+            known_names=self.known_names,
             allow_random_user=True,
         ).parse()
 
@@ -8,6 +8,18 @@ from chat_thief.models.issue import Issue
 
 
 class FeedbackRouter(BaseRouter):
+    commands = [
+        "soundeffect",
+        "approve",
+        "deny",
+        "issue",
+        "bug",
+        "feature",
+        "delete_issue",
+        "issues",
+        "requests",
+    ]
+
     def route(self):
         if self.command == "soundeffect":
             try:
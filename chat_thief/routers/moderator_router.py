@@ -10,6 +10,15 @@ from chat_thief.data_scrubber import DataScrubber
 
 
 class ModeratorRouter(BaseRouter):
+    commands = [
+        "no_news",
+        "do_over",
+        "revive",
+        "silence",
+        "dropeffect",
+        "dropreward",
+    ]
+
     def route(self):
         if self.user in STREAM_GODS:
             if self.command == "no_news":
@@ -9,6 +9,8 @@ from chat_thief.formatters.cube_casino_formatter import CubeCasinoFormatter
 
 
 class NewCubeCasinoRouter(BaseRouter):
+    commands = ["bet", "cubed", "all_bets", "all_bet", "bets", "new_cube"]
+
     def route(self):
         if self.command == "bet":
             return self._process_bet()
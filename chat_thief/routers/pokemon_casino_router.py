@@ -6,6 +6,8 @@ from chat_thief.new_commands.pokemon_casino import PokemonCasino
 
 
 class PokemonCasinoRouter(BaseRouter):
+    commands = ["pokemon", "guess", "replay"]
+
     def route(self):
         if self.command == "pokemon":
             return PokemonCasino.whos_that_pokemon()
@@ -5,6 +5,8 @@ from chat_thief.commands.revolution import Revolution
 
 
 class RevolutionRouter(BaseRouter):
+    commands = ["coup", "peace", "revolution", "vote"]
+
     def route(self):
         # if self.command == "coup" and self.user == "beginbotbot":
 
@@ -9,11 +9,21 @@ from chat_thief.models.user_code import UserCode
 from chat_thief.models.user_page import UserPage
 from chat_thief.routers.base_router import BaseRouter
 
-
 BASE_URL = "https://mygeoangelfirespace.city"
 
 
 class UserCodeRouter(BaseRouter):
+    commands = [
+        "css",
+        "js",
+        "approvejs",
+        "buyjs",
+        "deactivate",
+        "removejs",
+        "activate",
+        "addjs",
+    ]
+
     def route(self):
         if self.command == "css":
             return self.set_css()
@@ -64,31 +74,37 @@ class UserCodeRouter(BaseRouter):
                 user=self.user, code_link=custom_js, code_type="js", name=widget_name
             ).update_or_create()
 
+        # Not while we're holding the user code
+        UserCode.after_commit(lambda: self._download_js(custom_js, user_code._name))
+
+        return f"Thanks for the custom JS @{self.user}!"
+        # return f"Thanks for the custom JS @{self.user}! {BASE_URL}/{self.user}.html"
+
+    def _download_js(self, custom_js, name):
         # Switch to NOT USE requests
         response = requests.get(custom_js)
 
         new_js_dir = Path(__file__).parent.parent.joinpath(f"js")
         new_js_dir.mkdir(exist_ok=True)
 
-        new_js_path = new_js_dir.joinpath(f"{user_code._name}.js")
+        new_js_path = new_js_dir.joinpath(f"{name}.js")
         print(f"Saving Custom js for @{self.user} {new_js_path}")
 
         with open(new_js_path, "w") as f:
             f.write(response.text)
 
-        return f"Thanks for the custom JS @{self.user}!"
-        # return f"Thanks for the custom JS @{self.user}! {BASE_URL}/{self.user}.html"
-
     def set_css(self):
         custom_css = self.args[0]
         # We Might want to create Widgets
         User(self.user).set_value("custom_css", custom_css)
+        # Not while we're holding the users
+        User.after_commit(lambda: self._download_css(custom_css))
+        return f"Thanks for the custom CSS @{self.user}! {BASE_URL}/{self.user}.html"
 
+    def _download_css(self, custom_css):
         # Switch to NOT USE requests
         response = requests.get(custom_css)
         new_css_path = Path(__file__).parent.parent.joinpath(f"static/{self.user}.css")
         print(f"Saving Custom CSS for @{self.user} {new_css_path}")
         with open(new_css_path, "w") as f:
             f.write(response.text)
-
-        return f"Thanks for the custom CSS @{self.user}! {BASE_URL}/{self.user}.html"
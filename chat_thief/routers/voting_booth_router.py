@@ -7,6 +7,8 @@ from chat_thief.models.css_vote import CSSVote
 
 
 class VotingBoothRouter(BaseRouter):
+    commands = ["bestcss", "homepage"]
+
     def route(self):
         if self.command == "bestcss":
             if self.parser.target_user:
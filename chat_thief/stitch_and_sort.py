@@ -12,7 +12,11 @@ class StitchAndSort:
         self._all_cmds = Command.db().all()
         # self._user_code = UserCode.db().all()
         self._all_sfxs = SoundeffectsLibrary.fetch_soundeffect_samples()
+        # Joins built once up front, so stitching is one pass over each table
         self.command_users = self._setup_command_users()
+        self._sfx_files = self._setup_sfx_files()
+        self._command_votes = self._setup_command_votes()
+        self._user_widgets = UserCode.js_by_user()
 
     def call(self):
         cmd_data = self._cmd_data()
@@ -25,17 +29,13 @@ class StitchAndSort:
         # Iterate through each user
         for user_dict in self._all_users:
 
-            widgets = UserCode.js_for_user(user_dict["name"])
-            user_dict["widgets"] = widgets
+            user_dict["widgets"] = self._user_widgets.get(
+                user_dict["name"],
+                {"approved": [], "unapproved": [], "deactivated": []},
+            )
 
             # Looking for Matching Soundeffects
-            matching_effects = [
-                sfx
-                for sfx in self._all_sfxs
-                if user_dict["name"] == sfx.name[: -len(sfx.suffix)]
-            ]
-            if matching_effects:
-                command_file = matching_effects[0]
+            if command_file := self._sfx_files.get(user_dict["name"]):
                 user_dict["command_file"] = command_file.name
 
             if user_dict["name"] in self.command_users:
@@ -44,11 +44,9 @@ class StitchAndSort:
                 user_dict["wealth"] = user_dict["cool_points"] + total_propery_value
 
             # This small change to have all the command info
-            user_dict["commands"] = [
-                cmd
-                for cmd in self._all_cmds
-                if user_dict["name"] in cmd["permitted_users"]
-            ]
+            user_dict["commands"] = self.command_users.get(
+                user_dict["name"], {"commands": []}
+            )["commands"]
 
             user_dict["sfx_count"] = len(user_dict["commands"])
 
@@ -59,22 +57,9 @@ class StitchAndSort:
         results = []
 
         for cmd_dict in self._all_cmds:
-            sfx_vote = next(
-                (
-                    vote
-                    for vote in self._all_votes
-                    if vote["command"] == cmd_dict["name"]
-                ),
-                None,
-            )
+            sfx_vote = self._command_votes.get(cmd_dict["name"])
 
-            matching_effects = [
-                sfx
-                for sfx in self._all_sfxs
-                if cmd_dict["name"] == sfx.name[: -len(sfx.suffix)]
-            ]
-            if matching_effects:
-                command_file = matching_effects[0]
+            if command_file := self._sfx_files.get(cmd_dict["name"]):
                 cmd_dict["command_file"] = command_file.name
 
             if sfx_vote:
@@ -96,8 +81,20 @@ class StitchAndSort:
     def _setup_command_users(self):
         command_users = {}
         for command in self._all_cmds:
-            for user in command["permitted_users"]:
+            for user in dict.fromkeys(command["permitted_users"]):
                 if user not in command_users:
                     command_users[user] = {"commands": []}
                 command_users[user]["commands"].append(command)
         return command_users
+
+    def _setup_sfx_files(self):
+        sfx_files = {}
+        for sfx in self._all_sfxs:
+            sfx_files.setdefault(sfx.name[: -len(sfx.suffix)], sfx)
+        return sfx_files
+
+    def _setup_command_votes(self):
+        command_votes = {}
+        for vote in self._all_votes:
+            command_votes.setdefault(vote["command"], vote)
+        return command_votes
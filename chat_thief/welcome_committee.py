@@ -13,8 +13,8 @@ DEFAULT_WELCOME_FILE = Path(__file__).parent.parent.joinpath(".welcome")
 
 
 class WelcomeCommittee:
-    def __init__(self, welcome_file=DEFAULT_WELCOME_FILE):
-        self.welcome_file = welcome_file
+    def __init__(self, welcome_file=None):
+        self.welcome_file = welcome_file or DEFAULT_WELCOME_FILE
 
     def present_users(self):
         if self.welcome_file.is_file():
@@ -0,0 +1,121 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from chat_thief.audioworld.playback_engine import DecodedSampleCache, PlaybackEngine
+
+FAKE_MPLAYER = Path(__file__).parent.parent.joinpath("support/fake_mplayer.py")
+
+
+class TestPlaybackEngine:
+    @pytest.fixture
+    def play_log(self, tmp_path):
+        return tmp_path.joinpath("played.log")
+
+    @pytest.fixture
+    def samples(self, tmp_path):
+        samples = []
+        for name in ["clap", "damn", "wow"]:
+            sample = tmp_path.joinpath(f"{name}.mp3")
+            sample.touch()
+            samples.append(sample)
+        return samples
+
+    def _played(self, play_log):
+        return [line.split(" ", 1) for line in play_log.read_text().splitlines()]
+
+    def test_queued_playback_on_one_player(self, play_log, samples):
+        subject = PlaybackEngine([sys.executable, str(FAKE_MPLAYER), str(play_log)])
+        for sample in samples:
+            subject.play(sample)
+        assert subject.wait_until_idle(timeout=5)
+
+        played = self._played(play_log)
+        assert [sound_file for _, sound_file in played] == [str(s) for s in samples]
+        assert len({pid for pid, _ in played}) == 1
+
+        metrics = subject.metrics()
+        assert metrics["queue_depth"] == 0
+        assert metrics["time_to_first_audio"]["clap"]["plays"] == 1
+        assert metrics["time_to_first_audio"]["wow"]["last"] > 0
+        subject.close()
+
+    def test_queue_depth(self, play_log, samples, monkeypatch):
+        monkeypatch.setenv("FAKE_SAMPLE_LENGTH", "0.3")
+        subject = PlaybackEngine([sys.executable, str(FAKE_MPLAYER), str(play_log)])
+        for sample in samples:
+            subject.play(sample)
+        time.sleep(0.1)
+        assert subject.queue_depth() >= 1
+        assert not subject.is_ready()
+        subject.close()
+
+    def test_overlapping_playback(self, play_log, samples, monkeypatch):
+        monkeypatch.setenv("FAKE_SAMPLE_LENGTH", "0.5")
+        subject = PlaybackEngine(
+            [sys.executable, str(FAKE_MPLAYER), str(play_log)], overlap=True
+        )
+        for sample in samples:
+            subject.play(sample)
+        assert subject.wait_until_idle(timeout=5)
+
+        assert len({pid for pid, _ in self._played(play_log)}) == 3
+        subject.close()
+
+    def test_waiting_is_woken_instead_of_polling(self, play_log, samples, monkeypatch):
+        monkeypatch.setenv("FAKE_SAMPLE_LENGTH", "0.5")
+        subject = PlaybackEngine([sys.executable, str(FAKE_MPLAYER), str(play_log)])
+        checks = []
+        is_ready = subject.is_ready
+
+        def _is_ready():
+            checks.append(True)
+            return is_ready()
+
+        monkeypatch.setattr(subject, "is_ready", _is_ready)
+        subject.play(samples[0])
+        assert subject.wait_until_ready(timeout=5)
+        assert len(checks) < 10
+        subject.close()
+
+    def test_missing_player(self, samples):
+        subject = PlaybackEngine(["/not/a/real/mplayer"])
+        subject.play(samples[0])
+        assert subject.wait_until_idle(timeout=5)
+        assert subject.metrics()["time_to_first_audio"] == {}
+
+
+class TestDecodedSampleCache:
+    def test_hot_samples_get_decoded(self, tmp_path):
+        clap = tmp_path.joinpath("clap.m4a")
+        damn = tmp_path.joinpath("damn.m4a")
+        clap.write_text("clap")
+        damn.write_text("damn")
+
+        def _copy(sound_file, decoded_file):
+            return ["cp", sound_file, decoded_file]
+
+        subject = DecodedSampleCache(
+            size=1, decode_command=_copy, cache_dir=tmp_path.joinpath("decoded")
+        )
+        tmp_path.joinpath("decoded").mkdir()
+
+        assert subject.get(clap) == clap
+        self._wait_for(lambda: subject.get(clap) != clap)
+        decoded_clap = subject.get(clap)
+        assert decoded_clap.suffix == ".wav"
+        assert decoded_clap.read_text() == "clap"
+
+        subject.get(damn)
+        self._wait_for(lambda: subject.get(damn) != damn)
+        # Only room for one
+        assert not decoded_clap.exists()
+        subject.close()
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
@@ -0,0 +1,66 @@
+import pytest
+
+import chat_thief.audioworld.sample_catalog as sample_catalog
+from chat_thief.audioworld.sample_catalog import SampleCatalog
+
+ALLOWED_AUDIO_FORMATS = [".mp3", ".m4a", ".wav", ".opus"]
+
+
+class TestSampleCatalog:
+    @pytest.fixture(params=["inotify", "polling"])
+    def subject(self, request, tmp_path, monkeypatch):
+        if request.param == "polling":
+
+            def _no_inotify():
+                raise OSError("no inotify here")
+
+            monkeypatch.setattr(sample_catalog, "_Inotify", _no_inotify)
+            monkeypatch.setattr(sample_catalog, "POLL_INTERVAL_IN_SECS", 0)
+
+        tmp_path.joinpath("theme_songs").mkdir()
+        tmp_path.joinpath("clap.mp3").touch()
+        tmp_path.joinpath("notes.txt").touch()
+        tmp_path.joinpath("theme_songs/thugga.opus").touch()
+
+        catalog = SampleCatalog(
+            tmp_path, tmp_path.joinpath("theme_songs"), ALLOWED_AUDIO_FORMATS
+        )
+        yield catalog
+        catalog.close()
+
+    def test_building_the_catalog(self, subject, tmp_path):
+        assert sorted(subject.names()) == ["clap", "thugga"]
+        assert subject.theme_songs() == ["thugga"]
+        assert subject.soundeffects_only() == {"clap"}
+        assert subject.paths_for("clap") == [tmp_path.joinpath("clap.mp3")]
+        assert subject.is_soundeffect("clap")
+        assert not subject.is_soundeffect("thugga")
+        assert subject.is_theme_song("thugga")
+        assert not subject.has_sample("notes")
+
+    def test_picking_up_new_and_deleted_samples(self, subject, tmp_path):
+        assert subject.has_sample("clap")
+
+        tmp_path.joinpath("damn.wav").touch()
+        tmp_path.joinpath("clap.mp3").unlink()
+        subject.refresh(force=True)
+        assert subject.has_sample("damn")
+        assert not subject.has_sample("clap")
+
+    def test_picking_up_new_folders(self, subject, tmp_path):
+        assert not subject.has_sample("pokewin")
+
+        tmp_path.joinpath("pokemon").mkdir()
+        tmp_path.joinpath("pokemon/pokewin.mp3").touch()
+        subject.refresh(force=True)
+        tmp_path.joinpath("pokemon/pokewho.mp3").touch()
+        subject.refresh(force=True)
+        assert subject.has_sample("pokewin")
+        assert subject.has_sample("pokewho")
+
+        tmp_path.joinpath("pokemon/pokewin.mp3").unlink()
+        tmp_path.joinpath("pokemon/pokewho.mp3").unlink()
+        tmp_path.joinpath("pokemon").rmdir()
+        subject.refresh(force=True)
+        assert not subject.has_sample("pokewin")
+        assert not subject.has_sample("pokewho")
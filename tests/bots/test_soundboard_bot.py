@@ -0,0 +1,34 @@
+import asyncio
+import threading
+
+from chat_thief.audioworld.audio_player import AudioPlayer
+from chat_thief.bots import soundboard_bot
+from chat_thief.models.play_soundeffect_request import PlaySoundeffectRequest
+
+from tests.support.database_setup import DatabaseConfig
+
+
+class TestSoundboardBot(DatabaseConfig):
+    def test_waits_for_the_player_off_the_event_loop(self, monkeypatch):
+        waited_in = []
+        played = []
+
+        def _wait_until_ready(timeout=None):
+            waited_in.append(threading.current_thread())
+            # Still busy the first time
+            return len(waited_in) > 1
+
+        monkeypatch.setattr(AudioPlayer, "wait_until_ready", _wait_until_ready)
+        monkeypatch.setattr(soundboard_bot, "play_soundeffect", played.append)
+        PlaySoundeffectRequest(user="uzi", command="clap").save()
+
+        async def _play_one():
+            bot = asyncio.create_task(soundboard_bot.run())
+            while not played:
+                await asyncio.sleep(0.01)
+            bot.cancel()
+
+        asyncio.run(asyncio.wait_for(_play_one(), timeout=5))
+        assert played == [{"user": "uzi", "command": "clap", "notification": True}]
+        assert len(waited_in) >= 2
+        assert threading.main_thread() not in waited_in
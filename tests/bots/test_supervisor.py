@@ -0,0 +1,132 @@
+import asyncio
+import json
+import socket
+
+import pytest
+
+from chat_thief.bots import supervisor
+from chat_thief.bots.supervisor import Supervisor, restart_delay
+
+
+async def _get(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(bytes(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n", "utf-8"))
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return head.split(b"\r\n")[0].decode(), json.loads(body)
+
+
+@pytest.fixture
+def unused_tcp_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestSupervisor:
+    @pytest.fixture(autouse=True)
+    def quick_restarts(self, monkeypatch):
+        monkeypatch.setattr(supervisor, "FIRST_RESTART_DELAY_IN_SECS", 0.01)
+        monkeypatch.setattr(supervisor, "MAX_RESTART_DELAY_IN_SECS", 0.04)
+
+    def test_restart_delay_backs_off_up_to_the_max(self):
+        assert [restart_delay(crashes) for crashes in range(5)] == [
+            0.01,
+            0.02,
+            0.04,
+            0.04,
+            0.04,
+        ]
+
+    def _run_until(self, bots, done):
+        async def main():
+            running = asyncio.create_task(bots.run(status_port=None))
+            while not done():
+                await asyncio.sleep(0.01)
+            running.cancel()
+            await asyncio.gather(running, return_exceptions=True)
+
+        asyncio.run(asyncio.wait_for(main(), timeout=5))
+
+    def test_crashing_bots_get_restarted(self, capsys):
+        runs = []
+
+        async def flaky():
+            runs.append(len(runs))
+            if len(runs) < 4:
+                raise ValueError(f"crash number {len(runs)}")
+            await asyncio.sleep(10)
+
+        async def steady():
+            await asyncio.sleep(10)
+
+        bots = Supervisor({"flaky": flaky, "steady": steady})
+        self._run_until(bots, lambda: len(runs) == 4)
+
+        assert runs == [0, 1, 2, 3]
+        flaky_status = bots.bots["flaky"].status()
+        assert flaky_status["state"] == "stopped"
+        assert flaky_status["restarts"] == 3
+        assert flaky_status["last_error"] == "ValueError: crash number 3"
+        assert bots.bots["steady"].status()["restarts"] == 0
+        assert "crash number 1" in capsys.readouterr().out
+
+    def test_bots_that_return_get_restarted(self):
+        runs = []
+
+        async def quitter():
+            runs.append(len(runs))
+
+        bots = Supervisor({"quitter": quitter})
+        self._run_until(bots, lambda: len(runs) == 3)
+
+        status = bots.bots["quitter"].status()
+        assert status["restarts"] >= 2
+        assert status["last_error"] == "Returned"
+
+    def test_cancelling_while_backing_off(self, monkeypatch):
+        monkeypatch.setattr(supervisor, "FIRST_RESTART_DELAY_IN_SECS", 10)
+        monkeypatch.setattr(supervisor, "MAX_RESTART_DELAY_IN_SECS", 10)
+
+        async def broken():
+            raise RuntimeError("no speakers")
+
+        bots = Supervisor({"broken": broken})
+        self._run_until(bots, lambda: bots.bots["broken"].state == "backing off")
+
+        status = bots.bots["broken"].status()
+        assert status["state"] == "stopped"
+        assert status["restart_in_secs"] is None
+
+    def test_status_endpoint(self, unused_tcp_port):
+        started = asyncio.Event()
+
+        async def waiting():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def broken():
+            raise RuntimeError("no speakers")
+
+        async def main():
+            bots = Supervisor({"waiting": waiting, "broken": broken})
+            running = asyncio.create_task(bots.run(status_port=unused_tcp_port))
+            await started.wait()
+            await asyncio.sleep(0.02)
+            try:
+                return (
+                    await _get(unused_tcp_port, "/status"),
+                    await _get(unused_tcp_port, "/nope"),
+                )
+            finally:
+                running.cancel()
+                await asyncio.gather(running, return_exceptions=True)
+
+        (status_line, status), (not_found, _) = asyncio.run(main())
+        assert status_line == "HTTP/1.1 200 OK"
+        assert not_found == "HTTP/1.1 404 Not Found"
+        assert status["bots"]["waiting"]["state"] == "running"
+        assert status["bots"]["broken"]["restarts"] >= 1
+        assert status["bots"]["broken"]["last_error"] == "RuntimeError: no speakers"
+        assert isinstance(status["databases"], list)
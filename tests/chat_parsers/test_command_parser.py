@@ -1,6 +1,7 @@
 import pytest
 
 from chat_thief.chat_parsers.command_parser import CommandParser
+from chat_thief.chat_parsers.known_names import KnownNames
 from chat_thief.welcome_committee import WelcomeCommittee
 from chat_thief.models.user import User
 
@@ -169,3 +170,31 @@ class TestCommandParser(DatabaseConfig):
         assert result.target_command == "dropeffect"
         assert result.target_sfx == "1080"
         assert result.amount == 1
+
+    def test_names_are_loaded_once_per_message(self, monkeypatch):
+        User("artmattdank").save()
+        loads = []
+        all_users = User.all
+        present_users = WelcomeCommittee.present_users
+
+        def _counted_all():
+            loads.append("all users")
+            return all_users()
+
+        def _counted_present_users(self):
+            loads.append("present_users")
+            return present_users(self)
+
+        monkeypatch.setattr(User, "all", _counted_all)
+        monkeypatch.setattr(WelcomeCommittee, "present_users", _counted_present_users)
+
+        known_names = KnownNames()
+        args = ["@fake_viewer", "@nobody", "@noone", "clap", "10"]
+        first = CommandParser("fake_user", "give", args, known_names=known_names)
+        second = CommandParser(
+            "fake_user", "give", args, allow_random_user=True, known_names=known_names
+        )
+        assert first.parse().target_user == "fake_viewer"
+        assert second.parse().target_user == "fake_viewer"
+        # The users are looked up by name instead of all loaded
+        assert loads == ["present_users"]
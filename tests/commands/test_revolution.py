@@ -149,3 +149,23 @@ class TestRevolution(DatabaseConfig):
         assert fence_sitter.cool_points() == 0
         assert peace_keeper.street_cred() == 0
         assert peace_keeper.cool_points() == 0
+
+    def test_theme_songs_survive_a_coup(self):
+        fence_sitter = User("coolcat")
+        Command("coolcat").allow_user(fence_sitter.name)
+        Command("clap").allow_user(fence_sitter.name)
+
+        peace_keeper = User("picakhu")
+        Command("picakhu").allow_user(peace_keeper.name)
+        Command("damn").allow_user(peace_keeper.name)
+        Vote(peace_keeper.name).vote("peace")
+
+        revolutionary = User("beginbot")
+        Vote(revolutionary.name).vote("revolution")
+        revolutionary.update_cool_points(11)
+        Revolution(revolutionary.name).attempt_coup("revolution")
+
+        assert fence_sitter.name in Command("coolcat").users()
+        assert peace_keeper.name in Command("picakhu").users()
+        assert Command("damn").users() == [revolutionary.name]
+        assert Command("clap").users() == []
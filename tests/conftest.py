@@ -1,7 +1,29 @@
 import pytest
 
+from chat_thief import welcome_committee
+
+from tests.support.database_setup import remove_generated_files
+from tests.support.fake_irc_server import FakeIrcServer
+
+
+@pytest.fixture(autouse=True, scope="session")
+def clean_up_db_files():
+    yield
+    remove_generated_files()
+
 
 @pytest.fixture(autouse=True)
-def env_setup(monkeypatch):
+def env_setup(monkeypatch, tmp_path):
     monkeypatch.setenv("TEST_MODE", "true")
     monkeypatch.setenv("BLOCK_TWITCH_MSGS", "true")
+    # Welcoming users in the tests shouldn't add them to the real .welcome
+    monkeypatch.setattr(
+        welcome_committee, "DEFAULT_WELCOME_FILE", tmp_path.joinpath(".welcome")
+    )
+
+
+@pytest.fixture
+def fake_irc_server():
+    server = FakeIrcServer()
+    yield server
+    server.close()
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+import os
+
+from chat_thief.models.breaking_news import BreakingNews
+from chat_thief.models.event_log import EventLog
+from chat_thief.models.user_event import UserEvent
+
+from tests.support.database_setup import DatabaseConfig
+
+
+def steal(user, created_at):
+    return {
+        "user": user,
+        "command": "steal",
+        "msg": "!steal damn",
+        "result": [],
+        "created_at": created_at,
+    }
+
+
+class TestArchive(DatabaseConfig):
+    def test_old_news_moves_into_the_archive(self):
+        BreakingNews.db().insert_multiple(
+            [
+                {"scope": "coup", "user": "uzi", "timestamp": "2020-07-03 20:00:00"},
+                {"scope": "peace", "user": "carti", "timestamp": "2020-07-04 09:30:00"},
+                {"scope": "iasip", "user": "uzi", "timestamp": "2020-07-06 12:00:00"},
+            ]
+        )
+
+        assert BreakingNews.compact(now=datetime(2020, 7, 6, 13)) == 2
+        assert BreakingNews.count() == 1
+        archive_path = Path(__file__).parent.parent.joinpath("db/archive/breaking_news")
+        assert sorted(path.name for path in archive_path.iterdir()) == [
+            "2020-07-03.json.gz",
+            "2020-07-04.json.gz",
+        ]
+
+        news = BreakingNews.between("2020-07-01", "2020-07-07", user="uzi")
+        assert [story["scope"] for story in news] == ["coup", "iasip"]
+        news = BreakingNews.between("2020-07-04 09:00", "2020-07-04 10:00")
+        assert [story["scope"] for story in news] == ["peace"]
+
+    def test_user_events_archive_whole_days(self):
+        log = UserEvent.log()
+        log.append(steal("uzi", "2020-07-03 20:00:00"))
+        log.append(steal("carti", "2020-07-03 21:00:00"))
+        # Last written to yesterday, so the next save starts a new segment
+        yesterday = (datetime.now() - timedelta(days=1)).timestamp()
+        for segment in log.folder.glob("*.jsonl"):
+            os.utime(segment, (yesterday, yesterday))
+        UserEvent(user="uzi", command="steal", msg="!steal clap", result=[]).save()
+
+        assert UserEvent.compact() == 2
+        assert len(list(log.folder.glob("*.jsonl"))) == 1
+        assert UserEvent.count() == 3
+        assert UserEvent.count_for("uzi", "steal") == 2
+        assert EventLog(log.folder).count("steal", "uzi") == 2
+
+        steals = UserEvent.between("2020-07-03", "2020-07-04", command="steal")
+        assert [event["user"] for event in steals] == ["uzi", "carti"]
+        today = UserEvent.between(datetime.now() - timedelta(hours=1), datetime.now())
+        assert [event["msg"] for event in today] == ["!steal clap"]
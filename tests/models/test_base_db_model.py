@@ -1,10 +1,8 @@
 import pytest
 
-from pathlib import Path
-
 from chat_thief.models.base_db_model import BaseDbModel
 
-from tests.support.database_setup import DatabaseConfig
+from tests.support.database_setup import DatabaseConfig, remove_database
 
 
 class FakeClass(BaseDbModel):
@@ -27,9 +25,7 @@ class TestBaseDbModel(DatabaseConfig):
     @pytest.fixture(autouse=True)
     def destroy_db(self):
         for model in MODEL_CLASSES:
-            db_path = Path(__file__).parent.parent.joinpath(model.database_path)
-            if db_path.is_file():
-                db_path.unlink()
+            remove_database(model)
         yield
 
     def test_class_without_doc(self):
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from tinydb import Query
+
+from chat_thief.models.breaking_news import BreakingNews
+from chat_thief.models.change_bus import INSERTED, REMOVED, ChangeBus
+from chat_thief.models.command import Command
+from chat_thief.models.user import User
+
+from tests.support.database_setup import (
+    DatabaseConfig,
+    other_process_table,
+    remove_database,
+)
+
+
+class TestChangeBus(DatabaseConfig):
+    @pytest.fixture(params=["json", "sqlite"])
+    def backend(self, request, monkeypatch):
+        for model in [Command, User]:
+            monkeypatch.setattr(model, "storage_backend", request.param)
+            remove_database(model)
+        yield request.param
+
+    def test_writes_publish_the_fields_they_change(self, backend):
+        User("uzi")
+        with User.subscribe(
+            User.topic(),
+            User.topic("cool_points"),
+            User.topic("mana"),
+            User.topic(INSERTED),
+            User.topic(REMOVED),
+        ) as changes:
+            User("uzi").update_cool_points(5)
+            assert changes.changed() == {"users", "users.cool_points"}
+            assert changes.changed() == set()
+
+            User("eno")
+            assert "users:inserted" in changes.changed()
+
+            User.delete(User.get_by("name", "eno").doc_id)
+            assert changes.changed() == {"users", "users:removed"}
+
+    def test_topics_from_other_models_and_processes(self, backend):
+        Command("clap").save()
+        with User.subscribe(
+            Command.topic("cost"), User.topic("cool_points")
+        ) as changes:
+            Command("clap").allow_user("uzi")
+            assert changes.changed() == set()
+
+            other_process_table(Command).update({"cost": 10}, Query().name == "clap")
+            assert changes.changed() == {"commands.cost"}
+
+    def test_a_unit_of_work_publishes_once_it_lands(self, backend):
+        User("uzi")
+        with User.subscribe(User.topic("cool_points")) as changes:
+            with User.unit_of_work():
+                User("uzi").update_cool_points(5)
+                User("uzi").update_cool_points(5)
+                assert changes.changed() == set()
+            assert changes.changed() == {"users.cool_points"}
+
+    def test_wait_blocks_until_a_write(self):
+        with BreakingNews.subscribe(BreakingNews.topic(INSERTED)) as news:
+            assert news.wait(timeout=0.05) == set()
+
+            def report():
+                time.sleep(0.1)
+                BreakingNews(scope="@uzi is the richest").save()
+
+            thread = threading.Thread(target=report)
+            started = time.monotonic()
+            thread.start()
+            assert news.wait(timeout=5) == {"breaking_news:inserted"}
+            # Woken up by the write, not the poll interval
+            assert time.monotonic() - started < 2
+            thread.join()
+
+    def test_wait_async_lets_the_loop_run(self):
+        async def report():
+            await asyncio.sleep(0.1)
+            await asyncio.to_thread(BreakingNews(scope="@uzi is the richest").save)
+
+        async def main(news):
+            reporter = asyncio.create_task(report())
+            started = time.monotonic()
+            changed = await news.wait_async(timeout=5)
+            await reporter
+            return changed, time.monotonic() - started
+
+        with BreakingNews.subscribe(BreakingNews.topic(INSERTED)) as news:
+            assert asyncio.run(news.wait_async(timeout=0.05)) == set()
+            changed, waited = asyncio.run(main(news))
+            assert changed == {"breaking_news:inserted"}
+            assert waited < 2
+
+    def test_subscribers_that_died_get_cleaned_up(self, tmp_path):
+        bus = ChangeBus(tmp_path)
+        dead = bus.subscribe(["users"])
+        # Like a bot killed before it could close it
+        dead._wakeup.close()
+        alive = bus.subscribe(["users"])
+
+        bus.publish({"users"})
+        assert [path.name for path in bus.subscribers_path.iterdir()] == [
+            alive._wakeup_path.name
+        ]
+        assert alive.wait(timeout=1) == {"users"}
+        alive.close()
+        assert list(bus.subscribers_path.iterdir()) == []
@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 
 import pytest
@@ -6,7 +7,7 @@ from chat_thief.models.command import Command
 from chat_thief.models.user import User
 from chat_thief.models.sfx_vote import SFXVote
 
-from tests.support.database_setup import DatabaseConfig
+from tests.support.database_setup import DatabaseConfig, other_process_table
 
 
 class TestCommand(DatabaseConfig):
@@ -48,6 +49,43 @@ class TestCommand(DatabaseConfig):
         subject.unallow_user("spfar")
         assert not subject.allowed_to_play("spfar")
 
+    def test_for_user(self):
+        Command("clap").allow_user("spfar")
+        Command("damn").allow_user("spfar")
+        Command("damn").allow_user("rando")
+        assert [cmd["name"] for cmd in Command.for_user("spfar")] == ["clap", "damn"]
+        assert [cmd["name"] for cmd in Command.for_user("rando")] == ["damn"]
+
+        Command("clap").unallow_user("spfar")
+        assert [cmd["name"] for cmd in Command.for_user("spfar")] == ["damn"]
+        assert Command.for_user("nobody") == []
+
+    def test_for_user_sees_other_processes_writes(self):
+        Command("clap").allow_user("spfar")
+        assert [cmd["name"] for cmd in Command.for_user("spfar")] == ["clap"]
+
+        other_process_table(Command).update({"permitted_users": ["rando"]}, doc_ids=[1])
+
+        assert Command.for_user("spfar") == []
+        assert [cmd["name"] for cmd in Command.for_user("rando")] == ["clap"]
+
+    def test_for_user_index_follows_writes_without_a_rebuild(self):
+        Command("clap").allow_user("spfar")
+        Command("damn").allow_user("rando")
+        assert [cmd["name"] for cmd in Command.for_user("spfar")] == ["clap"]
+        index = Command.db()._indexes["permitted_users"]
+
+        Command("damn").allow_user("spfar")
+        Command("clap").unallow_user("spfar")
+        other_process_table(Command).update(
+            {"permitted_users": ["rando", "eno"]}, doc_ids=[1]
+        )
+
+        assert [cmd["name"] for cmd in Command.for_user("spfar")] == ["damn"]
+        assert [cmd["name"] for cmd in Command.for_user("rando")] == ["clap", "damn"]
+        assert [cmd["name"] for cmd in Command.for_user("eno")] == ["clap"]
+        assert Command.db()._indexes["permitted_users"] is index
+
     def test_cost(self):
         subject = Command("clap")
         subject.save()
@@ -71,6 +109,15 @@ class TestCommand(DatabaseConfig):
         subject.revive()
         assert subject.health() == 3
 
+    def test_transfer_permission_if_owner(self):
+        command = Command("damn")
+        command.allow_user("uzi")
+        assert not command.transfer_permission_if_owner("eno", "thugga")
+        assert command.transfer_permission_if_owner("uzi", "thugga")
+        assert command.users() == ["thugga"]
+        assert not command.transfer_permission_if_owner("uzi", "thugga")
+        assert Command.for_user("uzi") == []
+
     def test_most_expensive_command(self):
         assert not Command.most_expensive()
         damn_cmd = Command("damn")
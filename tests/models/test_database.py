@@ -0,0 +1,205 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from chat_thief.models import database
+from chat_thief.models.database import (
+    DEFAULT_STORAGE_BACKEND,
+    SharedJSONStorage,
+    db_table,
+)
+from chat_thief.models.issue import Issue
+from chat_thief.models.user import User
+
+from tests.support.database_setup import (
+    DatabaseConfig,
+    other_process_table,
+    remove_database,
+)
+
+# For the tests about the JSON file and its WAL themselves
+json_only = pytest.mark.skipif(
+    DEFAULT_STORAGE_BACKEND != "json", reason="Only the JSON storage has a WAL file"
+)
+
+
+class TestDatabase(DatabaseConfig):
+    def test_table_handles_are_shared(self):
+        assert db_table("tests/db/issues.json", "issues") is Issue.db()
+
+    def test_picks_up_writes_from_other_processes(self):
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        assert Issue.count() == 1
+
+        other_process_table(Issue).insert_multiple(
+            [
+                {"user": "thugga", "msg": "!clap is too loud"},
+                {"user": "thugga", "msg": "!clap still too loud"},
+            ]
+        )
+
+        assert Issue.count() == 3
+        Issue(user="eno", msg="new issue").save()
+        assert Issue.last()["user"] == "eno"
+        assert Issue.last().doc_id == 4
+
+    def test_recreates_deleted_files(self):
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        remove_database(Issue)
+        assert Issue.count() == 0
+        Issue(user="eno", msg="new issue").save()
+        assert Issue.count() == 1
+
+    def test_indexes_follow_inserts_updates_and_removes(self):
+        User("thugga")
+        User("eno")
+        assert User.get_by("name", "thugga")["cool_points"] == 0
+        assert [user["name"] for user in User.find_by("name", "eno")] == ["eno"]
+
+        User("thugga").update_cool_points(10)
+        assert User.get_by("name", "thugga")["cool_points"] == 10
+
+        User.set_value_by_id(User.get_by("name", "eno").doc_id, "name", "brian")
+        assert User.get_by("name", "eno") is None
+        assert User.get_by("name", "brian").doc_id == 2
+
+        User.delete(User.get_by("name", "brian").doc_id)
+        assert User.find_by("name", "brian") == []
+
+    def test_indexes_are_updated_in_place(self):
+        User("thugga")
+        User("eno")
+        assert User.get_by("name", "eno").doc_id == 2
+        index = User.db()._indexes["name"]
+
+        User("thugga").update_cool_points(10)
+        User("brian")
+        other_process_table(User).update({"name": "future"}, doc_ids=[2])
+        with User.unit_of_work():
+            User.delete(User.get_by("name", "thugga").doc_id)
+            assert User.get_by("name", "thugga") is None
+            assert User.get_by("name", "future").doc_id == 2
+
+        assert User.get_by("name", "eno") is None
+        assert [user.doc_id for user in User.find_by("name", "brian")] == [3]
+        assert User.db()._indexes["name"] is index
+
+    def test_unindexed_fields_fall_back_to_search(self):
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        assert Issue.get_by("user", "beginbotsmonster")["msg"] == "!me doesn't work"
+        assert Issue.find_by("user", "eno") == []
+
+    @json_only
+    def test_writes_only_append_to_the_wal(self):
+        db_path = Path(__file__).parent.parent.joinpath("db/issues.json")
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        Issue(user="eno", msg="new issue").save()
+
+        assert db_path.read_text() == ""
+        wal_lines = Path(f"{db_path}.wal").read_text().splitlines()
+        # The snapshot header, creating the table, then the two inserts
+        assert len(wal_lines) == 4
+        assert json.loads(wal_lines[-1])["set"] == {
+            "2": {"user": "eno", "msg": "new issue"}
+        }
+
+    @json_only
+    def test_checkpoint_keeps_the_json_readable(self):
+        db_path = Path(__file__).parent.parent.joinpath("db/issues.json")
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        Issue.db()._storage._storage.checkpoint()
+
+        assert json.loads(db_path.read_text()) == {
+            "issues": {"1": {"user": "beginbotsmonster", "msg": "!me doesn't work"}}
+        }
+        assert len(Path(f"{db_path}.wal").read_text().splitlines()) == 1
+
+        # Something outside the WAL writing the JSON is a new snapshot
+        db_path.write_text(json.dumps({"issues": {}}))
+        assert Issue.count() == 0
+
+    @json_only
+    def test_recovering_after_a_torn_append(self):
+        db_path = Path(__file__).parent.parent.joinpath("db/issues.json")
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        with open(f"{db_path}.wal", "a") as wal:
+            wal.write('{"table": "issues", "set": {"2": {"us')
+
+        assert Issue.count() == 1
+        Issue(user="eno", msg="new issue").save()
+
+        restarted = SharedJSONStorage(db_path)
+        assert [issue["user"] for issue in restarted.read()["issues"].values()] == [
+            "beginbotsmonster",
+            "eno",
+        ]
+        restarted.close()
+
+    @json_only
+    def test_wal_of_a_deleted_snapshot_is_not_replayed(self):
+        db_path = Path(__file__).parent.parent.joinpath("db/issues.json")
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        db_path.unlink()
+
+        restarted = SharedJSONStorage(db_path)
+        assert restarted.read() == {}
+        restarted.close()
+
+    @json_only
+    def test_fsyncs_are_batched(self, monkeypatch):
+        fsyncs = []
+        monkeypatch.setattr(database.os, "fsync", fsyncs.append)
+
+        for points in range(20):
+            User("thugga").update_cool_points(1)
+        Issue.db()._storage._storage.sync()
+        User.db()._storage._storage.sync()
+
+        assert User("thugga").cool_points() == 20
+        assert len(fsyncs) < 5
+
+    @json_only
+    def test_a_unit_of_work_is_one_append(self):
+        db_path = Path(__file__).parent.parent.joinpath("db/issues.json")
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        wal_path = Path(f"{db_path}.wal")
+        wal_lines = len(wal_path.read_text().splitlines())
+
+        with Issue.unit_of_work():
+            Issue(user="eno", msg="new issue").save()
+            Issue(user="thugga", msg="!clap is too loud").save()
+            assert Issue.count() == 3
+            assert len(wal_path.read_text().splitlines()) == wal_lines
+
+        assert len(wal_path.read_text().splitlines()) == wal_lines + 1
+        assert Issue.count() == 3
+
+    def test_a_unit_of_work_that_raises_writes_nothing(self):
+        User("thugga").update_cool_points(5)
+
+        with pytest.raises(ValueError):
+            with User.unit_of_work():
+                User("thugga").update_cool_points(10)
+                User("eno")
+                raise ValueError("robbery went wrong")
+
+        assert User("thugga").cool_points() == 5
+        assert User.get_by("name", "eno") is None
+
+    def test_side_effects_wait_for_the_commit(self):
+        played = []
+        User.after_commit(lambda: played.append("now"))
+        assert played == ["now"]
+
+        with User.unit_of_work():
+            User("thugga").update_cool_points(5)
+            User.after_commit(lambda: played.append(User("thugga").cool_points()))
+            assert played == ["now"]
+        assert played == ["now", 5]
+
+        with pytest.raises(ValueError):
+            with User.unit_of_work():
+                User.after_commit(lambda: played.append("rolled back"))
+                raise ValueError("robbery went wrong")
+        assert played == ["now", 5]
@@ -0,0 +1,70 @@
+import json
+
+from chat_thief.models.event_log import EventLog
+from chat_thief.models.user_event import UserEvent
+
+from tests.support.database_setup import DatabaseConfig
+
+
+def steal(user):
+    return {"user": user, "command": "steal", "msg": "!steal damn @carti"}
+
+
+class TestEventLog:
+    def test_counts_per_command_and_user(self, tmp_path):
+        log = EventLog(tmp_path)
+        for user in ["uzi", "carti", "uzi"]:
+            log.append(steal(user))
+        log.append({"user": "uzi", "command": "give", "msg": "!give damn @carti"})
+
+        assert log.count() == 4
+        assert log.count("steal") == 3
+        assert log.count("steal", "uzi") == 2
+        assert log.count("share", "uzi") == 0
+        assert log.counts_for("steal") == {"uzi": 2, "carti": 1}
+        assert log.last()["command"] == "give"
+
+    def test_full_segments_get_sealed(self, tmp_path):
+        log = EventLog(tmp_path, segment_bytes=100)
+        for _ in range(10):
+            log.append(steal("uzi"))
+
+        assert len(list(tmp_path.glob("*.jsonl"))) > 2
+        sealed = json.loads(tmp_path.joinpath("000001.counts.json").read_text())
+        assert sealed["counts"] == {"steal": {"uzi": sealed["total"]}}
+
+        # A fresh process only reads the counts files and the last segment
+        restarted = EventLog(tmp_path, segment_bytes=100)
+        assert restarted.count("steal", "uzi") == 10
+        assert len(restarted.all()) == 10
+
+    def test_picks_up_other_processes_appends(self, tmp_path):
+        log = EventLog(tmp_path, segment_bytes=100)
+        other_process = EventLog(tmp_path, segment_bytes=100)
+        log.append(steal("uzi"))
+        for _ in range(5):
+            other_process.append(steal("carti"))
+
+        assert log.counts_for("steal") == {"uzi": 1, "carti": 5}
+
+    def test_torn_appends_are_skipped(self, tmp_path):
+        log = EventLog(tmp_path)
+        log.append(steal("uzi"))
+        with open(tmp_path.joinpath("000001.jsonl"), "a") as segment:
+            segment.write('{"user": "car')
+
+        assert log.count() == 1
+        log.append(steal("carti"))
+        assert EventLog(tmp_path).counts_for("steal") == {"uzi": 1, "carti": 1}
+
+
+class TestUserEventLog(DatabaseConfig):
+    def test_moves_old_events_over(self):
+        UserEvent.db().insert(
+            {"user": "uzi", "command": "steal", "msg": "!steal damn", "result": []}
+        )
+
+        assert UserEvent.count() == 1
+        assert UserEvent.count_for("uzi", "steal") == 1
+        UserEvent(user="uzi", command="steal", msg="!steal clap", result=[]).save()
+        assert UserEvent.count_for("uzi", "steal") == 2
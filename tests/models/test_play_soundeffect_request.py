@@ -2,6 +2,7 @@ import pytest
 
 from chat_thief.models.notification import Notification
 from chat_thief.models.play_soundeffect_request import PlaySoundeffectRequest
+from chat_thief.models.user import User
 from chat_thief.prize_dropper import random_soundeffect
 from tests.support.database_setup import DatabaseConfig
 
@@ -13,3 +14,29 @@ class TestPlaySoundeffectRequest(DatabaseConfig):
         subject = PlaySoundeffectRequest(user=user, command=command, notification=False)
         subject.save()
         assert subject.command == "wassup"
+
+    def test_requests_are_queued_for_the_soundboard(self):
+        PlaySoundeffectRequest(user="uzi", command="clap").save()
+        PlaySoundeffectRequest(user="thugga", command="damn").save()
+        assert PlaySoundeffectRequest.count() == 2
+
+        consumer = PlaySoundeffectRequest.queue().consumer()
+        item = consumer.get(timeout=0)
+        assert item.doc == {"user": "uzi", "command": "clap", "notification": True}
+        consumer.ack(item)
+        consumer.close()
+        assert PlaySoundeffectRequest.count() == 1
+
+    def test_requests_wait_for_the_unit_of_work(self):
+        with User.unit_of_work():
+            PlaySoundeffectRequest(user="uzi", command="clap").save()
+            assert PlaySoundeffectRequest.count() == 0
+        assert PlaySoundeffectRequest.count() == 1
+
+        with pytest.raises(ValueError):
+            with User.unit_of_work():
+                PlaySoundeffectRequest(user="uzi", command="damn").save()
+                raise ValueError("couldn't pay for it")
+        assert [request["command"] for request in PlaySoundeffectRequest.all()] == [
+            "clap"
+        ]
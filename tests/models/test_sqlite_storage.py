@@ -0,0 +1,180 @@
+import json
+import sqlite3
+
+import pytest
+from tinydb import Query
+
+from chat_thief.models.command import Command
+from chat_thief.models.database import SharedJSONStorage
+from chat_thief.models.issue import Issue
+from chat_thief.models.sqlite_storage import SQLiteStorage, export, migrate
+from chat_thief.models.user import User
+
+from tests.support.database_setup import (
+    DatabaseConfig,
+    database_file,
+    other_process_table,
+    remove_database,
+)
+
+
+class TestStorageBackends(DatabaseConfig):
+    @pytest.fixture(params=["json", "sqlite"])
+    def backend(self, request, monkeypatch):
+        for model in [Command, Issue, User]:
+            monkeypatch.setattr(model, "storage_backend", request.param)
+            remove_database(model)
+        yield request.param
+
+    def test_each_model_picks_its_file(self, backend):
+        User("thugga")
+        assert database_file(User).suffix == f".{backend}"
+        assert database_file(User).is_file()
+
+    def test_the_db_surface_works_the_same(self, backend):
+        table = Issue.db()
+        table.insert({"user": "thugga", "msg": "!clap is too loud"})
+        table.insert({"user": "eno", "msg": "new issue"})
+        table.update({"msg": "!clap is still too loud"}, Query().user == "thugga")
+        table.upsert({"user": "uzi", "msg": "!me"}, Query().user == "uzi")
+        table.remove(Query().user == "eno")
+
+        assert [issue["user"] for issue in table.search(Query().msg.exists())] == [
+            "thugga",
+            "uzi",
+        ]
+        assert table.get(Query().user == "thugga")["msg"] == "!clap is still too loud"
+        assert table.get(doc_id=3)["user"] == "uzi"
+
+    def test_models_on_each_backend(self, backend):
+        User("thugga").update_cool_points(10)
+        Command("clap").allow_user("thugga")
+
+        assert User("thugga").cool_points() == 10
+        assert User.get_by("name", "thugga")["cool_points"] == 10
+        assert Command("clap").users() == ["thugga"]
+        assert [command["name"] for command in Command.for_user("thugga")] == ["clap"]
+
+    def test_picks_up_other_processes_writes(self, backend):
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        other = other_process_table(Issue)
+        other.insert({"user": "thugga", "msg": "!clap is too loud"})
+        other.update({"msg": "!me works now"}, doc_ids=[1])
+        assert Issue.count() == 2
+
+        assert Issue.get_by("user", "beginbotsmonster")["msg"] == "!me works now"
+
+        other.remove(doc_ids=[1])
+        assert [issue["user"] for issue in Issue.all()] == ["thugga"]
+        Issue(user="eno", msg="new issue").save()
+        assert Issue.last().doc_id == 3
+        assert [issue["user"] for issue in other.all()] == ["thugga", "eno"]
+
+    def test_a_unit_of_work_that_raises_writes_nothing(self, backend):
+        User("thugga").update_cool_points(5)
+
+        with pytest.raises(ValueError):
+            with User.unit_of_work():
+                User("thugga").update_cool_points(10)
+                User("eno")
+                raise ValueError("robbery went wrong")
+
+        assert User("thugga").cool_points() == 5
+        assert User.get_by("name", "eno") is None
+
+
+class TestSQLiteStorage(DatabaseConfig):
+    @pytest.fixture(autouse=True)
+    def sqlite_issues(self, monkeypatch):
+        monkeypatch.setattr(Issue, "storage_backend", "sqlite")
+        remove_database(Issue)
+        yield
+
+    def test_docs_can_be_looked_up_with_plain_sql(self):
+        Issue(user="thugga", msg="!clap is too loud").save()
+        Issue(user="eno", msg="new issue").save()
+
+        connection = sqlite3.connect(database_file(Issue))
+        plan = connection.execute(
+            "EXPLAIN QUERY PLAN SELECT doc FROM docs WHERE tbl = ? AND user = ?",
+            ("issues", "eno"),
+        ).fetchall()
+        assert "docs_user" in str(plan)
+        assert connection.execute(
+            "SELECT json_extract(doc, '$.msg') FROM docs WHERE tbl = ? AND user = ?",
+            ("issues", "eno"),
+        ).fetchall() == [("new issue",)]
+        connection.close()
+
+    def test_other_processes_reload_after_a_checkpoint(self):
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        other = other_process_table(Issue)
+        assert other.count(Query().user.exists()) == 1
+
+        Issue(user="thugga", msg="!clap is too loud").save()
+        Issue.delete(1)
+        Issue.db()._storage._storage.checkpoint()
+
+        assert [issue["user"] for issue in other.all()] == ["thugga"]
+
+    def test_dropping_a_table(self):
+        Issue(user="beginbotsmonster", msg="!me doesn't work").save()
+        other = other_process_table(Issue)
+        assert len(other) == 1
+
+        Issue.db()._storage._storage.write({})
+        assert other.all() == []
+        assert Issue.count() == 0
+
+
+class TestMigration:
+    def test_copies_every_json_table(self, tmp_path):
+        users = SharedJSONStorage(tmp_path.joinpath("users.json"))
+        users.write({"users": {"1": {"name": "thugga", "cool_points": 10}}})
+        commands = SharedJSONStorage(tmp_path.joinpath("commands.json"))
+        commands.write({"commands": {"1": {"name": "clap", "permitted_users": []}}})
+        # Still only in the WAL, which gets replayed
+        commands.write(
+            {"commands": {"1": {"name": "clap", "permitted_users": ["thugga"]}}}
+        )
+        users.close()
+        commands.close()
+
+        migrate(tmp_path)
+
+        migrated = SQLiteStorage(tmp_path.joinpath("users.sqlite"))
+        assert migrated.read() == {
+            "users": {"1": {"name": "thugga", "cool_points": 10}}
+        }
+        assert SQLiteStorage(tmp_path.joinpath("commands.sqlite")).read() == {
+            "commands": {"1": {"name": "clap", "permitted_users": ["thugga"]}}
+        }
+
+        # Doing it again leaves them alone, unless it's forced
+        migrated.write({"users": {}})
+        migrate(tmp_path)
+        assert migrated.read() == {"users": {}}
+        migrate(tmp_path, force=True)
+        assert migrated.read()["users"]["1"]["name"] == "thugga"
+
+    def test_exporting_back_to_json(self, tmp_path):
+        for name in ["users", "commands"]:
+            storage = SQLiteStorage(tmp_path.joinpath(f"{name}.sqlite"))
+            storage.write({name: {"1": {"name": "thugga"}}})
+            storage.close()
+        stale = SharedJSONStorage(tmp_path.joinpath("users.json"))
+        stale.write({"users": {}, "old": {}})
+        stale.close()
+
+        export(tmp_path, names=["users"])
+
+        assert json.loads(tmp_path.joinpath("users.json").read_text()) == {
+            "users": {"1": {"name": "thugga"}}
+        }
+        assert not tmp_path.joinpath("commands.json").exists()
+
+        # And migrating just that one back in
+        restored = SQLiteStorage(tmp_path.joinpath("users.sqlite"))
+        restored.write({"users": {}})
+        migrate(tmp_path, force=True, names=["users"])
+        assert restored.read() == {"users": {"1": {"name": "thugga"}}}
@@ -36,6 +36,15 @@ class TestUser(DatabaseConfig):
         assert subject.commands() == []
         assert command.permitted_users() == []
 
+    def test_debit_if_at_least(self):
+        subject = User("uzi")
+        subject.update_cool_points(5)
+        assert not subject.debit_if_at_least(6)
+        assert subject.cool_points() == 5
+        assert subject.debit_if_at_least(5)
+        assert subject.cool_points() == 0
+        assert not subject.debit_if_at_least(1)
+
     def test_bankrupt(self):
         subject = User("artmattdank")
         subject.update_street_cred(10)
@@ -221,3 +230,20 @@ class TestUser(DatabaseConfig):
         result = subject.buy_insurance()
         assert result == "@snorlax thank you for purchasing insurance"
         assert subject.insured()
+
+    def test_insurance_is_paid_for_in_one_write(self, monkeypatch):
+        subject = User("snorlax")
+        subject.update_cool_points(1)
+        storage = User.db()._storage._storage
+        writes = []
+        write = storage.write
+
+        def _write(data):
+            writes.append(data)
+            return write(data)
+
+        monkeypatch.setattr(storage, "write", _write)
+        subject.buy_insurance()
+        assert len(writes) == 1
+        assert subject.insured()
+        assert subject.cool_points() == 0
@@ -133,3 +133,31 @@ class TestUserCode(DatabaseConfig):
             "unapproved": ["fun.js"],
             "deactivated": ["fun.js"],
         }
+
+    def test_js_by_user(self):
+        UserCode(
+            user="eno",
+            code_link="https://gitlab.com/real_url/raw/bubbles.js",
+            code_type="js",
+            owners=["future"],
+            approved=True,
+        ).save()
+
+        UserCode(
+            user="uzi",
+            code_link="https://gitlab.com/real_url/raw/fun.js",
+            code_type="js",
+            owners=["future"],
+            approved=False,
+        ).save()
+
+        UserPage.bootstrap_user_page("future", ["bubbles", "fun"])
+        UserPage.deactivate("future", "fun")
+        result = UserCode.js_by_user()
+        assert result["future"] == UserCode.js_for_user("future")
+        assert result["eno"] == UserCode.js_for_user("eno")
+        assert result["uzi"] == {
+            "approved": [],
+            "unapproved": ["fun.js"],
+            "deactivated": [],
+        }
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from chat_thief.models.work_queue import WorkQueue
+
+
+class TestWorkQueue:
+    @pytest.fixture
+    def queue(self, tmp_path):
+        return WorkQueue(tmp_path.joinpath("requests.spool"), fair_by="user")
+
+    @pytest.fixture
+    def consumer(self, queue):
+        consumer = queue.consumer()
+        yield consumer
+        consumer.close()
+
+    def test_getting_and_acking(self, queue, consumer):
+        queue.put({"user": "uzi", "command": "clap"})
+        assert queue.pending() == [{"user": "uzi", "command": "clap"}]
+
+        item = consumer.get(timeout=0)
+        assert item.doc == {"user": "uzi", "command": "clap"}
+        assert consumer.get(timeout=0) is None
+
+        consumer.ack(item)
+        assert queue.pending() == []
+        # Everything acked, so the spool starts over
+        assert queue.spool_path.stat().st_size == 0
+
+    def test_unacked_items_are_handed_out_again(self, queue, consumer):
+        queue.put({"user": "uzi", "command": "clap"})
+        queue.put({"user": "uzi", "command": "damn"})
+        first = consumer.get(timeout=0)
+        consumer.get(timeout=0)
+        consumer.ack(first)
+        consumer.close()
+
+        # The consumer died playing !damn
+        restarted = queue.consumer()
+        assert restarted.get(timeout=0).doc["command"] == "damn"
+        assert restarted.get(timeout=0) is None
+        restarted.close()
+
+    def test_users_take_turns(self, queue, consumer):
+        for command in ["clap", "damn", "wow", "ha"]:
+            queue.put({"user": "spammer", "command": command})
+        queue.put({"user": "uzi", "command": "yoink"})
+        queue.put({"user": "eno", "command": "nope"})
+
+        played = []
+        while item := consumer.get(timeout=0):
+            played.append((item.doc["user"], item.doc["command"]))
+            consumer.ack(item)
+
+        assert played == [
+            ("spammer", "clap"),
+            ("uzi", "yoink"),
+            ("eno", "nope"),
+            ("spammer", "damn"),
+            ("spammer", "wow"),
+            ("spammer", "ha"),
+        ]
+
+    def test_consumer_wakes_up_on_put(self, queue, consumer):
+        results = []
+
+        def _consume():
+            start = time.monotonic()
+            item = consumer.get(timeout=10)
+            results.append((item.doc, time.monotonic() - start))
+
+        thread = threading.Thread(target=_consume)
+        thread.start()
+        time.sleep(0.1)
+        queue.put({"user": "uzi", "command": "clap"})
+        thread.join()
+
+        doc, waited = results[0]
+        assert doc == {"user": "uzi", "command": "clap"}
+        assert waited < 1
+
+    def test_get_async_wakes_up_on_put(self, queue, consumer):
+        async def put_later():
+            await asyncio.sleep(0.1)
+            queue.put({"user": "uzi", "command": "clap"})
+
+        async def main():
+            putter = asyncio.create_task(put_later())
+            start = time.monotonic()
+            item = await consumer.get_async(timeout=10)
+            await putter
+            return item, time.monotonic() - start
+
+        item, waited = asyncio.run(main())
+        assert item.doc == {"user": "uzi", "command": "clap"}
+        assert waited < 1
+        assert asyncio.run(consumer.get_async(timeout=0.05)) is None
+
+    def test_cleared_spools_start_over(self, queue, consumer):
+        queue.put({"user": "uzi", "command": "clap"})
+        consumer.get(timeout=0)
+        queue.clear()
+
+        queue.put({"user": "eno", "command": "damn"})
+        assert consumer.get(timeout=0).doc["command"] == "damn"
@@ -0,0 +1,185 @@
+import multiprocessing
+import threading
+
+import pytest
+from tinydb import Query
+
+from chat_thief.models import database
+from chat_thief.models.base_db_model import BaseDbModel
+from chat_thief.models.command import Command
+from chat_thief.models.database import WriteLockTimeout, db_table
+from chat_thief.models.user import User
+
+from tests.support.database_setup import (
+    DatabaseConfig,
+    other_process_table,
+    remove_database,
+)
+
+BUYERS = 4
+ATTEMPTS = 15
+
+
+# Runs in a bot process of its own, spending 3 Cool Points a go
+def _buyer(backend, start, bought):
+    BaseDbModel.database_folder = "tests/"
+    User.database_folder = "tests/"
+    User.storage_backend = backend
+
+    start.wait()
+    purchases = 0
+    for _ in range(ATTEMPTS):
+        with User.unit_of_work():
+            if User("uzi").debit_if_at_least(3):
+                purchases += 1
+    bought.put(purchases)
+
+
+def _in_another_thread(func):
+    errors = []
+
+    def run():
+        try:
+            func()
+        except Exception as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    return errors
+
+
+class TestWriteLocks(DatabaseConfig):
+    @pytest.fixture(params=["json", "sqlite"])
+    def backend(self, request, monkeypatch):
+        monkeypatch.setattr(User, "storage_backend", request.param)
+        remove_database(User)
+        yield request.param
+
+    def test_update_if_only_changes_docs_that_pass(self, backend):
+        User("uzi").update_cool_points(5)
+        User("eno").update_cool_points(1)
+
+        def add_one(doc):
+            doc["cool_points"] += 1
+
+        changed = User.db().update_if(
+            lambda doc: doc["cool_points"] > 2, add_one, Query().cool_points.exists()
+        )
+        assert changed == [User.get_by("name", "uzi").doc_id]
+        assert [User("uzi").cool_points(), User("eno").cool_points()] == [6, 1]
+
+    def test_transactions_keep_other_processes_from_writing(self, backend, monkeypatch):
+        User("uzi").update_cool_points(5)
+        other = other_process_table(User)
+        monkeypatch.setattr(database, "WRITE_LOCK_WAIT_IN_SECS", 0.05)
+
+        def welcome_eno():
+            other.insert({"name": "eno", "cool_points": 1})
+
+        with User.db().transaction() as tr:
+            tr.update({"cool_points": 6}, Query().name == "uzi")
+            [error] = _in_another_thread(welcome_eno)
+            assert isinstance(error, WriteLockTimeout)
+
+        assert _in_another_thread(welcome_eno) == []
+        assert [User("uzi").cool_points(), User("eno").cool_points()] == [6, 1]
+
+    def test_a_unit_of_work_keeps_other_processes_from_writing(
+        self, backend, monkeypatch
+    ):
+        User("uzi").update_cool_points(10)
+        other = other_process_table(User)
+        monkeypatch.setattr(database, "WRITE_LOCK_WAIT_IN_SECS", 0.05)
+
+        def steal_it_all():
+            other.update({"cool_points": 0}, Query().name == "uzi")
+
+        with User.unit_of_work():
+            assert User("uzi").debit_if_at_least(7)
+            [error] = _in_another_thread(steal_it_all)
+            assert isinstance(error, WriteLockTimeout)
+
+        assert User("uzi").cool_points() == 3
+        assert _in_another_thread(steal_it_all) == []
+        assert User("uzi").cool_points() == 0
+
+    def test_checks_catch_up_under_a_units_writes(self, backend):
+        User("uzi").update_cool_points(3)
+        other = other_process_table(User)
+
+        def spend_it_all():
+            other.update({"cool_points": 0}, Query().name == "uzi")
+
+        with User.unit_of_work():
+            # Reading a table that isn't there yet writes the empty table
+            lurkers = db_table(
+                User.database_folder + User.database_path, "lurkers", backend
+            )
+            assert lurkers.all() == []
+            assert _in_another_thread(spend_it_all) == []
+            assert not User("uzi").debit_if_at_least(3)
+
+        assert User("uzi").cool_points() == 0
+        assert lurkers.all() == []
+
+    def test_units_in_two_threads_cant_deadlock(self, backend, monkeypatch):
+        monkeypatch.setattr(database, "NESTED_WRITE_LOCK_WAIT_IN_SECS", 0.05)
+        User("uzi")
+        Command("clap").save()
+        both_started = threading.Barrier(2, timeout=5)
+        errors = []
+
+        def users_then_commands():
+            with User.unit_of_work():
+                User("uzi").update_cool_points(1)
+                both_started.wait()
+                Command("clap").allow_user("uzi")
+
+        def commands_then_users():
+            with User.unit_of_work():
+                Command("clap").allow_user("eno")
+                both_started.wait()
+                User("uzi").update_cool_points(1)
+
+        def run(func):
+            try:
+                func()
+            except WriteLockTimeout as error:
+                errors.append(error)
+
+        threads = [
+            threading.Thread(target=run, args=(func,))
+            for func in [users_then_commands, commands_then_users]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        assert not any(thread.is_alive() for thread in threads)
+        # Whoever gave up rolled back, whoever didn't made both writes
+        assert len(errors) in [1, 2]
+        assert User("uzi").cool_points() == 2 - len(errors)
+
+    def test_concurrent_buyers_never_overspend(self, backend):
+        User("uzi").update_cool_points(100)
+
+        context = multiprocessing.get_context("spawn")
+        start = context.Event()
+        bought = context.Queue()
+        buyers = [
+            context.Process(target=_buyer, args=(backend, start, bought))
+            for _ in range(BUYERS)
+        ]
+        for buyer in buyers:
+            buyer.start()
+        start.set()
+        purchases = sum(bought.get(timeout=60) for _ in buyers)
+        for buyer in buyers:
+            buyer.join()
+
+        # Every purchase got paid for, and nobody spent money that wasn't there
+        assert purchases == 33
+        assert User("uzi").cool_points() == 1
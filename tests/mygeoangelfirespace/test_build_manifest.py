@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from chat_thief.mygeoangelfirespace import publisher
+from chat_thief.mygeoangelfirespace.build_manifest import BuildManifest
+from chat_thief.mygeoangelfirespace.render_pool import RenderPool
+
+
+class TestBuildManifest:
+    @pytest.fixture
+    def build_path(self, tmp_path, monkeypatch):
+        build_path = tmp_path.joinpath("beginworld_finance")
+        build_path.mkdir()
+        monkeypatch.setattr(publisher, "rendered_template_path", build_path)
+        return build_path
+
+    def publish(self, build_path, commands, full=False):
+        manifest = BuildManifest(build_path, full=full)
+        pool = RenderPool(publisher.template_path, build_path, manifest, workers=0)
+        for cmd_dict in commands:
+            asyncio.run(publisher.generate_command_page(cmd_dict, "uzi", pool))
+        pool.run()
+        manifest.save()
+        return manifest
+
+    def command(self, name, cost=1):
+        return {
+            "name": name,
+            "permitted_users": ["uzi"],
+            "cost": cost,
+            "like_to_hate_ratio": 100,
+        }
+
+    def test_only_changed_pages_are_rendered(self, build_path):
+        manifest = self.publish(
+            build_path, [self.command("clap"), self.command("hello")]
+        )
+        assert manifest.changed == ["commands/clap.html", "commands/hello.html"]
+
+        manifest = self.publish(
+            build_path, [self.command("clap"), self.command("hello")]
+        )
+        assert manifest.changed == []
+
+        manifest = self.publish(
+            build_path, [self.command("clap", cost=5), self.command("hello")]
+        )
+        assert manifest.changed == ["commands/clap.html"]
+
+    def test_full_publish_renders_everything(self, build_path):
+        self.publish(build_path, [self.command("clap")])
+        manifest = self.publish(build_path, [self.command("clap")], full=True)
+        assert manifest.changed == ["commands/clap.html"]
+
+    def test_deleted_pages_get_rendered_again(self, build_path):
+        self.publish(build_path, [self.command("clap")])
+        build_path.joinpath("commands/clap.html").unlink()
+
+        manifest = self.publish(build_path, [self.command("clap")])
+        assert manifest.changed == ["commands/clap.html"]
+
+    def test_pages_that_are_gone_are_removed(self, build_path):
+        self.publish(build_path, [self.command("clap"), self.command("hello")])
+
+        manifest = self.publish(build_path, [self.command("clap")])
+        assert manifest.removed == ["commands/hello.html"]
+        assert manifest.removed_path.read_text() == "commands/hello.html\n"
+        assert not build_path.joinpath("commands/hello.html").exists()
+
+    def test_the_lists_pile_up_until_they_are_synced(self, build_path):
+        manifest = self.publish(build_path, [self.command("clap")])
+        self.publish(build_path, [self.command("clap"), self.command("hello")])
+        assert manifest.changed_path.read_text() == (
+            "commands/clap.html\ncommands/hello.html\n"
+        )
+
+        self.publish(build_path, [self.command("hello")])
+        assert manifest.changed_path.read_text() == "commands/hello.html\n"
+        assert manifest.removed_path.read_text() == "commands/clap.html\n"
+
+        # What sync_html.sh does after syncing
+        manifest.changed_path.write_text("")
+        manifest.removed_path.write_text("")
+        self.publish(build_path, [self.command("clap"), self.command("hello")])
+        assert manifest.changed_path.read_text() == "commands/clap.html\n"
+        assert manifest.removed_path.read_text() == ""
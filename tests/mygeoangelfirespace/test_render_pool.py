@@ -0,0 +1,54 @@
+from chat_thief.mygeoangelfirespace import publisher
+from chat_thief.mygeoangelfirespace.render_pool import (
+    RenderPool,
+    template_environment,
+)
+
+
+class TestRenderPool:
+    def command_page(self, name):
+        context = {
+            "name": name,
+            "users": ["uzi"],
+            "cost": 1,
+            "like_to_hate_ratio": 100,
+            "base_url": publisher.DEPLOY_URL,
+        }
+        return ("command.html", context, f"{name}.html")
+
+    def test_environment_is_shared(self):
+        assert template_environment(publisher.template_path) is template_environment(
+            publisher.template_path
+        )
+
+    def test_rendering_across_workers(self, tmp_path):
+        pool = RenderPool(publisher.template_path, tmp_path, workers=2, chunk_size=2)
+        for name in ["clap", "hello", "damn", "wow", "yes"]:
+            pool.add(*self.command_page(name))
+        pool.run()
+
+        assert pool.timings["command.html"]["pages"] == 5
+        for name in ["clap", "hello", "damn", "wow", "yes"]:
+            assert (
+                f"Command Name: {name}" in tmp_path.joinpath(f"{name}.html").read_text()
+            )
+
+    def test_rendering_in_process_matches(self, tmp_path):
+        in_process = tmp_path.joinpath("in_process")
+        in_process.mkdir()
+        pooled = tmp_path.joinpath("pooled")
+        pooled.mkdir()
+
+        for build_path, workers in [(in_process, 0), (pooled, 2)]:
+            pool = RenderPool(
+                publisher.template_path, build_path, workers=workers, chunk_size=1
+            )
+            pool.add(*self.command_page("clap"))
+            pool.add(*self.command_page("hello"))
+            pool.run()
+
+        for name in ["clap.html", "hello.html"]:
+            assert (
+                in_process.joinpath(name).read_text()
+                == pooled.joinpath(name).read_text()
+            )
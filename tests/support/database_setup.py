@@ -1,7 +1,16 @@
 from pathlib import Path
+import shutil
+
 import pytest
+from tinydb import TinyDB
 
 from chat_thief.models.base_db_model import BaseDbModel
+from chat_thief.models.database import (
+    DEFAULT_STORAGE_BACKEND,
+    close_databases,
+    storage_class,
+    storage_path,
+)
 from chat_thief.models.breaking_news import BreakingNews
 from chat_thief.models.command import Command
 from chat_thief.models.cube_bet import CubeBet
@@ -22,6 +31,7 @@ from chat_thief.models.tribal_council import TribalCouncil
 from chat_thief.models.css_vote import CSSVote
 from chat_thief.models.user_code import UserCode
 from chat_thief.models.user_page import UserPage
+from chat_thief.presence import presence
 
 MODEL_CLASSES = [
     BreakingNews,
@@ -31,7 +41,6 @@ MODEL_CLASSES = [
     CubeStats,
     Issue,
     Notification,
-    PlaySoundeffectRequest,
     Proposal,
     RapSheet,
     SFXVote,
@@ -46,6 +55,17 @@ MODEL_CLASSES = [
     UserCode,
 ]
 
+# What the storages and the change bus leave in tests/db
+GENERATED_DB_FILES = [
+    "*.json",
+    "*.json.wal",
+    "*.json.lock",
+    "*.sqlite",
+    "*.sqlite-wal",
+    "*.sqlite-shm",
+    "changes/versions.json",
+]
+
 
 class DatabaseConfig:
     @pytest.fixture(autouse=True)
@@ -54,7 +74,46 @@ class DatabaseConfig:
 
         for model in MODEL_CLASSES:
             model.database_folder = "tests/"
-            db_path = Path(__file__).parent.parent.joinpath(model.database_path)
-            if db_path.is_file():
-                db_path.unlink()
+            remove_database(model)
+            if log_path := getattr(model, "log_path", None):
+                shutil.rmtree(
+                    Path(__file__).parent.parent.joinpath(log_path), ignore_errors=True
+                )
+        shutil.rmtree(
+            Path(__file__).parent.parent.joinpath("db/archive"), ignore_errors=True
+        )
+        PlaySoundeffectRequest.database_folder = "tests/"
+        PlaySoundeffectRequest.queue().clear()
+        presence().clear()
         yield
+
+
+# Once the tests are done, see tests/conftest.py. Closes the databases
+# first, so nothing still has the files open.
+def remove_generated_files():
+    close_databases()
+    db_folder = Path(__file__).parent.parent.joinpath("db")
+    for pattern in GENERATED_DB_FILES:
+        for path in db_folder.glob(pattern):
+            path.unlink(missing_ok=True)
+
+
+def database_file(model):
+    db_path = Path(__file__).parent.parent.joinpath(model.database_path)
+    return Path(storage_path(db_path, model.storage_backend))
+
+
+# The model's database file, and SQLite's -wal and -shm files next to it
+def remove_database(model):
+    db_path = database_file(model)
+    for path in [db_path, Path(f"{db_path}-wal"), Path(f"{db_path}-shm")]:
+        if path.is_file():
+            path.unlink()
+
+
+# A TinyDB handle of its own on the model's file, like another bot process has
+def other_process_table(model):
+    backend = model.storage_backend or DEFAULT_STORAGE_BACKEND
+    return TinyDB(database_file(model), storage=storage_class(backend)).table(
+        model.table_name, cache_size=0
+    )
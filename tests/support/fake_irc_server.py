@@ -0,0 +1,78 @@
+import socket
+import threading
+import time
+
+
+class FakeIrcServer:
+    """
+    Stands in for irc.chat.twitch.tv: accepts any number of clients and
+    records every line they send, so IRC code can be tested offline.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.connections = 0
+        self._clients = []
+        self._lock = threading.Lock()
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self.address = self._listener.getsockname()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def privmsgs(self):
+        with self._lock:
+            return [
+                line.split(" :", 1)[1]
+                for line in self.lines
+                if line.startswith("PRIVMSG")
+            ]
+
+    def commands(self, command):
+        with self._lock:
+            return [line for line in self.lines if line.startswith(command)]
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Fake IRC server gave up waiting: {self.lines}")
+            time.sleep(0.01)
+
+    def send_to_clients(self, line):
+        with self._lock:
+            for client in self._clients:
+                client.sendall(f"{line}\r\n".encode())
+
+    def drop_connections(self):
+        with self._lock:
+            for client in self._clients:
+                client.shutdown(socket.SHUT_RDWR)
+                client.close()
+            self._clients = []
+
+    def close(self):
+        self.drop_connections()
+        self._listener.close()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+                self._clients.append(client)
+            threading.Thread(target=self._read, args=(client,), daemon=True).start()
+
+    def _read(self, client):
+        buffer = b""
+        while True:
+            try:
+                data = client.recv(4096)
+            except OSError:
+                return
+            if not data:
+                return
+            *lines, buffer = (buffer + data).split(b"\r\n")
+            with self._lock:
+                self.lines.extend(line.decode() for line in lines)
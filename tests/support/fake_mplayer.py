@@ -0,0 +1,16 @@
+import os
+import sys
+import time
+
+# Pretends to be `mplayer -slave -idle`, logging what it plays to argv[1]
+SAMPLE_LENGTH_IN_SECS = float(os.environ.get("FAKE_SAMPLE_LENGTH", "0.05"))
+
+for line in sys.stdin:
+    if line.startswith("loadfile"):
+        sound_file = line.split('"')[1]
+        with open(sys.argv[1], "a") as log:
+            log.write(f"{os.getpid()} {sound_file}\n")
+        print(f"Playing {sound_file}.", flush=True)
+        print("Starting playback...", flush=True)
+        time.sleep(SAMPLE_LENGTH_IN_SECS)
+        print("EOF code: 1", flush=True)
@@ -1,6 +1,11 @@
 import pytest
 
-from chat_thief.chat_logs import ChatLogs
+from chat_thief.chat_logs import (
+    ChatLogs,
+    ChatLogTail,
+    DEFAULT_LINE_COUNT,
+    tail_lines,
+)
 
 
 # This need to target other logs
@@ -17,3 +22,55 @@ class TestChatLogs:
     def test_recent_stream_peasants(self):
         msg_counts = ChatLogs().recent_stream_peasants()
         assert msg_counts
+
+
+class TestChatLogTail:
+    @pytest.fixture
+    def chat_log(self, tmp_path):
+        chat_log = tmp_path.joinpath("chat.log")
+        chat_log.write_text("".join(f"user{i}: hello {i}\n" for i in range(1000)))
+        return chat_log
+
+    def append(self, chat_log, text):
+        with open(chat_log, "a") as log:
+            log.write(text)
+
+    def test_tail_lines(self, chat_log):
+        assert tail_lines(chat_log, 3, block_size=16) == [
+            "user997: hello 997",
+            "user998: hello 998",
+            "user999: hello 999",
+        ]
+        assert len(tail_lines(chat_log, 5000)) == 1000
+
+    def test_only_appended_lines_are_read(self, chat_log):
+        tail = ChatLogTail(chat_log, window_size=3)
+        assert tail.lines()[-1] == "user999: hello 999"
+        offset = tail.offset
+        assert offset == chat_log.stat().st_size
+
+        self.append(chat_log, "beginbot: hi\nuzi: half a li")
+        assert tail.lines() == [
+            "user998: hello 998",
+            "user999: hello 999",
+            "beginbot: hi",
+        ]
+        assert tail.offset == offset + len("beginbot: hi\n")
+
+        self.append(chat_log, "ne\n")
+        assert tail.lines()[-1] == "uzi: half a line"
+
+    def test_truncated_log_starts_over(self, chat_log):
+        tail = ChatLogTail(chat_log, window_size=3)
+        tail.lines()
+
+        chat_log.write_text("uzi: new stream\n")
+        assert tail.lines() == ["uzi: new stream"]
+
+    def test_recent_stream_peasants(self, chat_log):
+        self.append(chat_log, "beginbotbot: not a peasant\n")
+        peasants = ChatLogs(chat_log).recent_stream_peasants()
+        assert len(peasants) == DEFAULT_LINE_COUNT - 1
+        assert "user999" in peasants
+        assert "beginbotbot" not in peasants
+        assert ChatLogs(chat_log).most_msgs()["user0"] == 1
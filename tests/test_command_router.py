@@ -3,8 +3,10 @@ from pathlib import Path
 
 import pytest
 
-from chat_thief.command_router import CommandRouter
+from chat_thief.command_router import CommandRouter, DISPATCH_TABLE, ROUTERS
+from chat_thief.chat_parsers.command_parser import CommandParser
 from chat_thief.config.log import logger
+from chat_thief.models import database
 from chat_thief.models.breaking_news import BreakingNews
 from chat_thief.models.command import Command
 from chat_thief.models.proposal import Proposal
@@ -148,6 +150,20 @@ class TestCommandRouter(DatabaseConfig):
         assert last_event["result"] == "@miles.davis is now in @bill.evans's Top 8!"
         assert last_event["command"] == "top8"
 
+    def test_user_events_are_saved_after_the_unit_of_work(self, irc_msg, monkeypatch):
+        in_unit_of_work = []
+        save = UserEvent.save
+
+        def _save(self):
+            in_unit_of_work.append(database._current_unit_of_work() is not None)
+            return save(self)
+
+        monkeypatch.setattr(UserEvent, "save", _save)
+        User("miles.davis").save()
+        irc_response = irc_msg("bill.evans", "!top8 miles.davis")
+        CommandRouter(irc_response, logger).build_response()
+        assert in_unit_of_work == [False]
+
     def test_buying_event(self, irc_msg):
         user = User("bill.evans")
         user.update_cool_points(10)
@@ -201,3 +217,21 @@ class TestCommandRouter(DatabaseConfig):
         irc_response = irc_msg("uzi", "!pokemon")
         result = CommandRouter(irc_response, logger).build_response()
         assert result == "Guess Which Pokemon This Is!!!"
+
+    def test_dispatch_table(self):
+        assert [Router.__name__ for Router in DISPATCH_TABLE["css"]] == [
+            "EconomyRouter",
+            "UserCodeRouter",
+        ]
+        for Router in ROUTERS:
+            for command in Router.commands:
+                assert Router in DISPATCH_TABLE[command]
+
+    def test_unrouted_commands_skip_the_routers(self, irc_msg, monkeypatch):
+        def _no_parsing(self):
+            raise AssertionError("parsed a command no router handles")
+
+        monkeypatch.setattr(CommandParser, "parse", _no_parsing)
+        irc_response = irc_msg("beginbotbot", "!not_a_real_command")
+        assert CommandRouter(irc_response, logger).build_response() is None
+        assert UserEvent.count() == 0
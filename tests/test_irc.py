@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+import chat_thief.irc as irc
+from chat_thief.config.twitch import TwitchConfig
+from chat_thief.irc import TwitchSender, coalesce
+from chat_thief.irc_client import RateLimiter
+
+
+class TestCoalesce:
+    def test_joining_messages(self):
+        assert coalesce(["hello", "there"]) == ["hello | there"]
+
+    def test_never_going_over_the_limit(self):
+        assert coalesce(["a" * 8, "b" * 3, "c"], limit=10) == [
+            "a" * 8,
+            "bbb | c",
+        ]
+        assert coalesce(["a" * 12], limit=10) == ["a" * 10, "aa"]
+
+
+class TestTwitchSender:
+    @pytest.fixture
+    def subject(self, fake_irc_server):
+        config = TwitchConfig(token="oauth:x", bot="beginbotbot", channel="beginbot")
+        return TwitchSender(fake_irc_server.address, config)
+
+    def test_one_connection_for_many_messages(self, subject, fake_irc_server):
+        subject.send("hello")
+        assert subject.flush()
+        subject.send("there")
+        assert subject.flush()
+
+        fake_irc_server.wait_for(lambda: len(fake_irc_server.privmsgs()) == 2)
+        assert fake_irc_server.privmsgs() == ["hello", "there"]
+        assert fake_irc_server.connections == 1
+        assert fake_irc_server.commands("PASS") == ["PASS oauth:x"]
+        assert fake_irc_server.commands("JOIN") == ["JOIN #beginbot"]
+
+    def test_coalescing_bursts(self, subject, fake_irc_server):
+        for user in ["thugga", "eno", "uzi"]:
+            subject.send(f"Welcome @{user}")
+        assert subject.flush()
+
+        fake_irc_server.wait_for(lambda: fake_irc_server.privmsgs())
+        assert fake_irc_server.privmsgs() == [
+            "Welcome @thugga | Welcome @eno | Welcome @uzi"
+        ]
+
+    def test_reconnecting(self, subject, fake_irc_server):
+        subject.send("hello")
+        assert subject.flush()
+        fake_irc_server.wait_for(lambda: fake_irc_server.privmsgs())
+        fake_irc_server.drop_connections()
+
+        subject.send("still here")
+        assert subject.flush()
+        fake_irc_server.wait_for(lambda: len(fake_irc_server.privmsgs()) == 2)
+        assert fake_irc_server.privmsgs() == ["hello", "still here"]
+        assert fake_irc_server.connections == 2
+
+    def test_answering_pings(self, subject, fake_irc_server, monkeypatch):
+        monkeypatch.setattr(irc, "KEEPALIVE_INTERVAL_IN_SECS", 0.05)
+        subject.send("hello")
+        assert subject.flush()
+        fake_irc_server.wait_for(lambda: fake_irc_server.connections == 1)
+
+        fake_irc_server.send_to_clients("PING :tmi.twitch.tv")
+        fake_irc_server.wait_for(lambda: fake_irc_server.commands("PONG"))
+        assert fake_irc_server.commands("PONG") == ["PONG :tmi.twitch.tv"]
+
+    def test_rate_limiting(self, subject, fake_irc_server, monkeypatch):
+        monkeypatch.setattr(irc, "COALESCE_WINDOW_IN_SECS", 0)
+        subject.rate_limiter = RateLimiter(limit=2, window=0.3)
+
+        start = time.monotonic()
+        for msg in ["one", "two", "three"]:
+            subject.send(msg)
+        assert subject.flush()
+
+        assert time.monotonic() - start >= 0.3
+        fake_irc_server.wait_for(lambda: len(fake_irc_server.privmsgs()) == 3)
+        assert fake_irc_server.privmsgs() == ["one", "two", "three"]
+
+    def test_flush_gives_up_after_the_timeout(self, subject):
+        # Queued without a thread to send it
+        subject._queue.put("hello")
+        assert not subject.flush(timeout=0.05)
@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+
+from chat_thief import irc_client
+from chat_thief.irc_client import (
+    IrcClient,
+    RateLimiter,
+    SharedRateLimiter,
+    parse_irc_line,
+)
+from chat_thief.irc_msg import IrcMsg
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestParseIrcLine:
+    def test_parsing_a_tagged_privmsg(self):
+        line = parse_irc_line(
+            "@badge-info=;color=#FF0000;display-name=Thugga;"
+            "system-msg=hello\\sthere\\:\\\\;emotes= "
+            ":thugga!thugga@thugga.tmi.twitch.tv PRIVMSG #beginbot :!buy  clap"
+        )
+        assert line.command == "PRIVMSG"
+        assert line.user == "thugga"
+        assert line.params == ["#beginbot", "!buy  clap"]
+        assert line.tags["display-name"] == "Thugga"
+        assert line.tags["system-msg"] == "hello there;\\"
+        assert line.tags["emotes"] == ""
+
+        irc_msg = IrcMsg(line.to_irc_msg())
+        assert irc_msg.user == "thugga"
+        assert irc_msg.command == "buy"
+        assert irc_msg.args == ["clap"]
+
+    def test_parsing_a_ping(self):
+        line = parse_irc_line("PING :tmi.twitch.tv")
+        assert line.command == "PING"
+        assert line.prefix is None
+        assert line.trailing == "tmi.twitch.tv"
+
+    @pytest.mark.parametrize("line", [" ", ":", "@a=b ", ":nick!u@h"])
+    def test_lines_without_a_command(self, line):
+        with pytest.raises(ValueError):
+            parse_irc_line(line)
+
+
+class TestRateLimiter:
+    def test_waits_for_the_oldest_send_to_leave_the_window(self):
+        clock = FakeClock()
+        subject = RateLimiter(limit=2, window=30, clock=clock)
+        subject.record()
+        clock.now = 10
+        subject.record()
+        assert subject.delay() == 20
+
+        clock.now = 30
+        assert subject.delay() == 0
+
+    def test_take_counts_the_send(self):
+        clock = FakeClock()
+        subject = RateLimiter(limit=1, window=30, clock=clock)
+        assert subject.take() == 0
+        assert subject.take() == 30
+
+    def test_processes_share_one_budget(self, tmp_path):
+        clock = FakeClock()
+        sends = tmp_path.joinpath("twitch_sends")
+        chat_bot = SharedRateLimiter(sends, limit=2, window=30, clock=clock)
+        background_bots = SharedRateLimiter(sends, limit=2, window=30, clock=clock)
+
+        assert chat_bot.take() == 0
+        clock.now = 10
+        assert background_bots.take() == 0
+        assert chat_bot.take() == 20
+        assert background_bots.delay() == 20
+
+        clock.now = 30
+        assert chat_bot.take() == 0
+        assert background_bots.take() == 10
+
+
+class TestIrcClient:
+    def test_framing_and_sending(self):
+        received = []
+
+        async def _fake_twitch(reader, writer):
+            # Split lines across writes, and several lines in one write
+            writer.write(b"PING :tmi.twitch.tv\r\n:thugga!thugga@thugga.tmi")
+            await writer.drain()
+            writer.write(b".twitch.tv PRIVMSG #beginbot :!me\r\n:eno!eno@eno")
+            await writer.drain()
+            writer.write(b".tmi.twitch.tv PRIVMSG #beginbot :hi\r\n")
+            await writer.drain()
+            while line := await reader.readline():
+                received.append(line.decode())
+                if line.startswith(b"PRIVMSG"):
+                    break
+            writer.close()
+
+        async def _run():
+            server = await asyncio.start_server(_fake_twitch, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            client = IrcClient("127.0.0.1", port, "oauth:x", "beginbotbot", "beginbot")
+            await client.connect()
+            sender = asyncio.create_task(client.run_sender())
+
+            lines = []
+            with pytest.raises(ConnectionError):
+                async for line in client.lines():
+                    lines.append(line)
+                    if line.command == "PING":
+                        await client.pong(line)
+                    if len(lines) == 3:
+                        client.send_msg("hello @thugga")
+
+            sender.cancel()
+            await client.close()
+            server.close()
+            return lines
+
+        lines = asyncio.run(_run())
+        assert [(line.user, line.trailing) for line in lines] == [
+            (None, "tmi.twitch.tv"),
+            ("thugga", "!me"),
+            ("eno", "hi"),
+        ]
+        assert "PONG :tmi.twitch.tv\r\n" in received
+        assert received[-1] == "PRIVMSG #beginbot :hello @thugga\r\n"
+
+    def test_bad_lines_are_skipped(self, monkeypatch):
+        monkeypatch.setattr(irc_client, "READ_LIMIT", 64)
+
+        async def _fake_twitch(reader, writer):
+            writer.write(b" \r\n:\r\n@a=b \r\n:nick!u@h\r\n")
+            # Too long to read, none of it should come out as a line
+            writer.write(b"PING :" + b"x" * 200 + b" PING :oops\r\n")
+            writer.write(b"PING :tmi.twitch.tv\r\n")
+            await writer.drain()
+            writer.close()
+
+        async def _run():
+            server = await asyncio.start_server(_fake_twitch, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            client = IrcClient("127.0.0.1", port, "oauth:x", "beginbotbot", "beginbot")
+            await client.connect()
+
+            lines = []
+            with pytest.raises(ConnectionError):
+                async for line in client.lines():
+                    lines.append(line)
+
+            await client.close()
+            server.close()
+            return lines
+
+        lines = asyncio.run(_run())
+        assert [(line.command, line.trailing) for line in lines] == [
+            ("PING", "tmi.twitch.tv")
+        ]
+
+    def test_long_messages_are_split(self):
+        client = IrcClient("127.0.0.1", 6667, "oauth:x", "beginbotbot", "beginbot")
+        client.send_msg("a" * 501)
+        assert client.outbound.qsize() == 2
@@ -0,0 +1,42 @@
+from chat_thief.economist.leaderboard import leaderboard
+from chat_thief.models.command import Command
+from chat_thief.models.user import User
+
+from tests.support.database_setup import DatabaseConfig
+
+
+class TestLeaderboard(DatabaseConfig):
+    def test_economy_totals(self):
+        User("thugga", 10).update_street_cred(2)
+        User("eno", 3)
+        damn = Command("damn")
+        damn.allow_user("thugga")
+        damn.allow_user("eno")
+        damn.set_value("cost", 5)
+        Command("clap").allow_user("eno")
+
+        economy = leaderboard()
+        assert economy.total_cool_points == 13
+        assert economy.total_street_cred == 2
+        assert economy.total_user_sfx_property == 11
+        assert economy.wealth == {"thugga": 15, "eno": 9}
+        assert economy.wealthiest == "thugga"
+        assert economy.top_users == [("eno", 2), ("thugga", 1)]
+        assert economy.most_expensive["name"] == "damn"
+        assert economy.richest_cool_points["name"] == "thugga"
+
+    def test_snapshot_is_shared_until_something_changes(self):
+        User("thugga", 10)
+        economy = leaderboard()
+        assert leaderboard() is economy
+
+        User("eno").update_cool_points(20)
+        assert leaderboard() is not economy
+        assert leaderboard().richest_cool_points["name"] == "eno"
+
+    def test_ties_go_to_the_newest(self):
+        User("thugga", 10)
+        User("eno", 10)
+        assert leaderboard().wealthiest == "eno"
+        assert User.richest_cool_points()["name"] == "eno"
+        assert [user["name"] for user in User.by_cool_points()] == ["eno", "thugga"]
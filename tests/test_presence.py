@@ -0,0 +1,71 @@
+from chat_thief.presence import Presence
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPresence:
+    def test_chatters_decay(self):
+        clock = FakeClock()
+        presence = Presence(ttl=60, clock=clock)
+        presence.saw("uzi")
+        presence.saw("beginbot")
+        clock.now = 30
+        presence.saw("uzi")
+
+        clock.now = 80
+        assert sorted(presence.users()) == ["uzi"]
+        assert "beginbot" not in presence
+
+        clock.now = 100
+        assert presence.users() == []
+
+    def test_leaving(self):
+        presence = Presence()
+        for user in ["uzi", "beginbot", "artmattdank"]:
+            presence.saw(user)
+        presence.left("beginbot")
+        presence.left("not_here")
+
+        assert sorted(presence.users()) == ["artmattdank", "uzi"]
+
+    def test_random_user_skips_the_excluded(self):
+        presence = Presence()
+        users = [f"user{i}" for i in range(20)]
+        for user in users:
+            presence.saw(user)
+
+        picked = {presence.random_user(exclude=users[1:]) for _ in range(20)}
+        assert picked == {"user0"}
+        assert {presence.random_user() for _ in range(200)} == set(users)
+
+    def test_random_user_when_everybody_is_excluded(self):
+        presence = Presence()
+        assert presence.random_user() is None
+
+        presence.saw("uzi")
+        presence.saw("beginbot")
+        assert presence.random_user(exclude=["uzi", "beginbot"]) is None
+        # Nothing got lost shuffling
+        assert sorted(presence.users()) == ["beginbot", "uzi"]
+
+    def test_lurkers_are_here_but_never_picked(self):
+        presence = Presence()
+        presence.saw("uzi")
+        presence.saw("viewerbot", chatted=False)
+        presence.saw("uzi", chatted=False)
+
+        assert sorted(presence.users()) == ["uzi", "viewerbot"]
+        assert "viewerbot" in presence
+        assert presence.chatters() == ["uzi"]
+        assert {presence.random_user() for _ in range(20)} == {"uzi"}
+
+        presence.saw("viewerbot")
+        assert sorted(presence.chatters()) == ["uzi", "viewerbot"]
+        presence.left("viewerbot")
+        assert presence.users() == ["uzi"]
@@ -0,0 +1,28 @@
+from chat_thief import prize_dropper
+from chat_thief.chat_logs import ChatLogTail
+from chat_thief.models.command import Command
+from tests.support.database_setup import DatabaseConfig
+
+
+class TestPrizeDropper(DatabaseConfig):
+    def test_dropreward_goes_to_the_last_chatter(self, tmp_path, monkeypatch):
+        chat_log = tmp_path.joinpath("chat.log")
+        chat_log.write_text("thugga: hello\nuzi: hi\nnightbot: welcome\n")
+        tail = ChatLogTail(chat_log)
+        monkeypatch.setattr(prize_dropper, "chat_log_tail", lambda: tail)
+        monkeypatch.setattr(prize_dropper, "random_soundeffect", lambda: "clap")
+
+        assert (
+            prize_dropper.dropreward() == "@uzi now has access to Sound Effect: !clap"
+        )
+        assert "uzi" in Command("clap").users()
+
+        with open(chat_log, "a") as log:
+            log.write("thugga: me next\n")
+        prize_dropper.dropreward()
+        assert "thugga" in Command("clap").users()
+
+    def test_no_dropreward_without_chatters(self, tmp_path, monkeypatch):
+        tail = ChatLogTail(tmp_path.joinpath("chat.log"))
+        monkeypatch.setattr(prize_dropper, "chat_log_tail", lambda: tail)
+        assert prize_dropper.dropreward() is None